@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Benchmark respów
+Offline'owy benchmark bota: sztuczne kanały/konteksty Discorda (bez sieci) i wirtualny
+zegar sterujący datetime.utcnow(). Mierzy koszt przebiegu check_resp, czas komend,
+pamięć i dokładność pingów w symulowanych dniach dla 10 - 100k timerów.
+
+Użycie:
+    python benchmark_resp.py --sizes 10,100,1000,10000,100000 --days 1
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import resp_ledger
+from resp_dispatcher import MESSAGE_LIMIT
+from resp_runtime import rss_mb
+
+# Baza w katalogu tymczasowym - benchmark nie dotyka prawdziwych timerów
+_TMP = tempfile.mkdtemp(prefix="resp_bench_")
+os.environ["RESP_DB_PATH"] = os.path.join(_TMP, "bench.db")
+os.environ.setdefault("DISCORD_BOT_TOKEN", "")
+
+
+# ------------------- WIRTUALNY ZEGAR -------------------
+class VirtualClock:
+    """Zegar symulacji - podmienia datetime w modułach bota"""
+
+    def __init__(self, start):
+        self.now = start
+        clock = self
+
+        class VirtualDatetime(datetime):
+            @classmethod
+            def utcnow(cls):
+                return clock.now
+
+            @classmethod
+            def now(cls, tz=None):
+                if tz is None:
+                    return clock.now
+                return tz.fromutc(clock.now.replace(tzinfo=tz))
+
+        self.datetime = VirtualDatetime
+
+    def install(self, *modules):
+        for module in modules:
+            module.datetime = self.datetime
+
+    def utcnow(self):
+        return self.now
+
+    def advance(self, delta):
+        self.now += delta
+
+
+# ------------------- SZTUCZNY DISCORD -------------------
+class FakeMessage:
+    def __init__(self, message_id, content=None, embed=None):
+        self.id = message_id
+        self.content = content
+        self.embed = embed
+
+    async def pin(self):
+        pass
+
+    async def edit(self, **kwargs):
+        self.content = kwargs.get("content", self.content)
+        self.embed = kwargs.get("embed", self.embed)
+
+
+class FakeChannel:
+    """Kanał zapisujący wysłane wiadomości wraz z wirtualnym czasem wysłania"""
+
+    def __init__(self, channel_id, clock):
+        self.id = channel_id
+        self.clock = clock
+        self.mention = f"<#{channel_id}>"
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        if content is not None and len(content) > MESSAGE_LIMIT:
+            # Jak Discord (400 Bad Request) - za długa wiadomość nie jest wysyłana
+            raise ValueError(f"wiadomość ma {len(content)} znaków (limit {MESSAGE_LIMIT})")
+        self.sent.append((self.clock.now, content, kwargs.get("embed")))
+        return FakeMessage(len(self.sent), content, kwargs.get("embed"))
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(message_id)
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeAuthor:
+    bot = False
+
+    def __str__(self):
+        return "benchmark#0001"
+
+
+class FakeContext:
+    """Minimalny commands.Context: guild, channel, author, send (komenda z prefiksem)"""
+
+    interaction = None
+
+    def __init__(self, guild, channel):
+        self.guild = guild
+        self.channel = channel
+        self.author = FakeAuthor()
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+# ------------------- POMIARY -------------------
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def fmt_ms(seconds):
+    return f"{seconds * 1000:.3f}ms"
+
+
+# ------------------- SCENARIUSZ -------------------
+async def timed(samples, coro, dispatcher):
+    """Czas komendy razem z pracą pętli, którą wywołała (słuchacze, wysyłka odpowiedzi)"""
+    started = time.perf_counter()
+    await coro
+    await drain(dispatcher)
+    samples.append(time.perf_counter() - started)
+
+
+async def run_scenario(bot_module, clock, size, days, stall, command_runs, max_ticks):
+    w = bot_module
+    guild = FakeGuild(size)
+    channel = FakeChannel(size * 10 + 1, clock)
+    ctx = FakeContext(guild, channel)
+    w.bot.get_channel = lambda channel_id: channel if channel_id == channel.id else None
+    w.bot.is_ready = lambda: True  # połączony klient (przed on_ready pingi czekają na nadrobienie)
+    w.state.set_channel(guild.id, channel.id)
+    ns = w.state.namespace(guild.id, channel.id)
+    rss_before = rss_mb()
+
+    # Załadunek: ostatnie respy rozłożone tak, by wszystkie pingi były jeszcze przed nami
+    started = time.perf_counter()
+    step = (w.RESP_TIME - w.PING_BEFORE) / size
+    for i in range(size):
+        w.state.set(ns, f"Czempion {i}", clock.now - step * i)
+        w.catalog.learn(f"Czempion {i}")  # jak restore_state() - zapisane nazwy trafiają do indeksu
+    await drain(w.dispatcher)
+    load_cost = time.perf_counter() - started
+    rss_loaded = rss_mb()
+
+    runs = min(command_runs, size)
+    set_latency, resp_latency, del_latency = [], [], []
+    for i in range(runs):
+        await timed(resp_latency, w.resp.callback(ctx), w.dispatcher)
+    for i in range(runs):
+        await timed(del_latency, w.del_resp.callback(ctx, champion=f"czempion {i}"), w.dispatcher)
+        await timed(set_latency, w.set_resp.callback(ctx, champion=f"czempion {i}"), w.dispatcher)
+
+    from resp_timetable import future_resp_lines
+    started = time.perf_counter()
+    future_resp_lines(
+        ((entry.champion, entry.last_resp) for entry in w.upcoming.current(ns).entries),
+        10, w.rotations, {},
+    )
+    generate_cost = time.perf_counter() - started
+
+    channel.sent.clear()
+    w.dispatcher.ping_latency.clear()
+
+    # Symulacja: zegar skacze do najbliższego terminu (+ opcjonalne zawieszenie pętli)
+    simulated_from = clock.now
+    end = clock.now + timedelta(days=days)
+    check_cost, tick_cost, handled_total = [], [], 0
+    scheduler = w.state.scheduler
+    while len(tick_cost) < max_ticks:
+        deadline = scheduler.next_deadline()
+        if deadline is None or deadline > end:
+            break
+        clock.now = max(clock.now, deadline + stall)
+        started = time.perf_counter()
+        handled_total += await scheduler.run_pending(clock.now)
+        check_cost.append(time.perf_counter() - started)
+        await drain(w.dispatcher)
+        tick_cost.append(time.perf_counter() - started)
+    simulated = (clock.now - simulated_from).total_seconds() / 3600
+
+    pings = [content for _, content, _ in channel.sent if content and "@everyone" in content]
+    ping_lines = sum(content.count("@everyone") for content in pings)
+    lateness = list(w.dispatcher.ping_latency)
+    statuses = [status for key, status in w.ledger.entries.items() if key[:2] == ns]
+    sent = statuses.count(resp_ledger.SENT)
+
+    result = {
+        "timers": size,
+        "load": fmt_ms(load_cost),
+        "rss +MB": f"{rss_loaded - rss_before:.1f}",
+        "resp p50": fmt_ms(percentile(resp_latency, 0.5)),
+        "set_resp p50": fmt_ms(percentile(set_latency, 0.5)),
+        "del_resp p50": fmt_ms(percentile(del_latency, 0.5)),
+        "generate_resps(10)": fmt_ms(generate_cost),
+        "sim h": f"{simulated:.1f}",
+        "ticks": len(tick_cost),
+        "due": handled_total,
+        "check p50": fmt_ms(percentile(check_cost, 0.5)),
+        "tick p50": fmt_ms(percentile(tick_cost, 0.5)),
+        "tick p99": fmt_ms(percentile(tick_cost, 0.99)),
+        "tick max": fmt_ms(max(tick_cost, default=0)),
+        "ping msgs": len(pings),
+        "ping lines": ping_lines,
+        "ping max chars": max(map(len, pings), default=0),
+        "duplicates": max(0, ping_lines - sent),
+        "missed": statuses.count(resp_ledger.MISSED),
+        "late p50": f"{percentile(lateness, 0.5):.2f}s",
+        "late max": f"{max(lateness, default=0):.2f}s",
+    }
+
+    # Sprzątanie przed kolejnym scenariuszem
+    for champion in list(w.state.get(ns)):
+        w.state.delete(ns, champion)
+    await drain(w.dispatcher)
+    return result
+
+
+async def drain(dispatcher):
+    """Poczekaj aż pętla obsłuży odłożone wywołania i kolejka wysyłek się opróżni"""
+    await asyncio.sleep(0)
+    while dispatcher.pending() or dispatcher._inflight:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)  # callbacki zakończonych wysyłek (ledger.delivered)
+
+
+async def check_ping_split(dispatcher, clock, count=40):
+    """Pingi z jednej minuty ponad limit znaków idą kilkoma wiadomościami - żadna nie przepada"""
+    channel = FakeChannel(0, clock)
+    target = clock.now.replace(second=0, microsecond=0)
+    futures = [
+        dispatcher.ping(channel, f"🔔 @everyone **Czempion {i:03d}** resp w lochu za 30 minut! 🔔", target)
+        for i in range(count)
+    ]
+    await asyncio.gather(*futures)
+    lines = sum(content.count("@everyone") for _, content, _ in channel.sent)
+    longest = max(len(content) for _, content, _ in channel.sent)
+    assert lines == count and longest <= MESSAGE_LIMIT, (lines, longest)
+    print(f"✅ {count} pingów z jednej minuty: {len(channel.sent)} wiadomości, najdłuższa {longest} znaków")
+
+
+async def main(args):
+    clock = VirtualClock(datetime(2026, 1, 5, 12, 0, 0))
+
+    import discord_bot_workflow
+    import resp_dispatcher
+    from resp_dispatcher import RateBucket
+
+    w = discord_bot_workflow
+    # Logi pojedynczych pingów zagłuszyłyby wyniki (i zaburzyły pomiar)
+    logging.disable(logging.INFO)
+    clock.install(w, resp_dispatcher, resp_ledger)
+    w.state.scheduler.clock = clock.utcnow
+    # Sztuczny kanał nie ma limitów Discorda - nie chcemy mierzyć czekania na tokeny
+    w.dispatcher.route_limit = (10**9, 1.0)
+    w.dispatcher._global = RateBucket(10**9, 1.0)
+    w.restore_state()
+    w.dispatcher.start()
+    await check_ping_split(w.dispatcher, clock)
+
+    stall = timedelta(seconds=args.stall)
+    results = []
+    for size in args.sizes:
+        print(f"▶️ Scenariusz: {size} timerów, {args.days} dni", flush=True)
+        results.append(await run_scenario(w, clock, size, args.days, stall, args.command_runs, args.max_ticks))
+
+    columns = list(results[0])
+    widths = [max(len(column), *(len(str(row[column])) for row in results)) for column in columns]
+    print()
+    print(" | ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    print("-+-".join("-" * width for width in widths))
+    for row in results:
+        print(" | ".join(str(row[column]).rjust(width) for column, width in zip(columns, widths)))
+
+    w.dispatcher.stop()
+    w.state.store.close()
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline'owy benchmark bota respów")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000",
+                        type=lambda value: [int(part) for part in value.split(",")],
+                        help="liczby timerów w scenariuszach (po przecinku)")
+    parser.add_argument("--days", type=float, default=1.0, help="symulowane dni na scenariusz")
+    parser.add_argument("--stall", type=float, default=0.0,
+                        help="sztuczne spóźnienie pętli przy każdym terminie (s)")
+    parser.add_argument("--command-runs", type=int, default=50, help="powtórzenia pomiaru komend")
+    parser.add_argument("--max-ticks", type=int, default=1000,
+                        help="limit przebiegów harmonogramu na scenariusz (skraca symulację dużych)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -1,113 +1,403 @@
 import discord
-from discord.ext import commands, tasks
+from discord import app_commands
+from discord.ext import commands
 from datetime import datetime, timedelta
+import asyncio
+import io
+import logging
+import math
 import os
+import sys
+import time
+from urllib.parse import quote
 import pytz
 
+from resp_board import LiveBoard
+from resp_bulk import MAX_FILE_BYTES, decode, export_lines, parse_lines
+from resp_catalog import ChampionCatalog, normalize
+from resp_dispatcher import Dispatcher, PRIORITY_BULK
+from resp_fanout import FanOut
+from resp_heartbeat import heartbeat_from_env
+from resp_history import SpawnHistory
+from resp_http import start_http
+from resp_lease import LeaderElector, LeaderLease
+from resp_ledger import PingLedger
+from resp_logging import rate_limited, setup_logging, stop_logging
+from resp_metrics import COMMAND_LATENCY, DM_QUEUE, SEND_QUEUE, TRACKED_TIMERS
+from resp_rotation import RotationTable
+from resp_runtime import bot_options, memory_report
+from resp_scheduler import PING
+from resp_state import RespState
+from resp_store import RespStore
+from resp_subscriptions import SubscriptionIndex
+from resp_timetable import future_resp_lines, local_range
+from resp_snapshot import SnapshotPublisher, share_publisher
+from resp_view import UpcomingView, share_view
+
 # ------------------- KONFIGURACJA -------------------
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
-GUILD_ID = 1394086742436614316
-CHANNEL_ID = 1394086743061299349
+# Domyślny serwer i kanał pingów (inne serwery ustawiają kanał komendą !set_channel)
+GUILD_ID = int(os.getenv("DISCORD_GUILD_ID", "1394086742436614316"))
+CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID", "1394086743061299349"))
 
 RESP_TIME = timedelta(hours=5, minutes=30)
 PING_BEFORE = timedelta(minutes=30)
+PING_GRACE = timedelta(minutes=float(os.getenv("RESP_PING_GRACE_MINUTES", "10")))  # do tylu minut spóźnienia ping jest nadrabiany
 
 POLAND_TZ = pytz.timezone("Europe/Warsaw")
 
+RESP_DB_PATH = os.getenv("RESP_DB_PATH", "resp_times.db")
+RESP_SCOPE = os.getenv("RESP_SCOPE", "guild")  # "guild" - timery per serwer, "channel" - per kanał
+SHARDED = os.getenv("DISCORD_SHARDED", "0") == "1"
+LIVE_BOARD = os.getenv("RESP_LIVE_BOARD", "0") == "1"  # !resp odświeża jedną przypiętą wiadomość
+BOARD_INTERVAL = float(os.getenv("RESP_BOARD_INTERVAL", "30"))  # minimalny odstęp edycji tablicy (s)
+HTTP_MODE = os.getenv("RESP_HTTP", "aiohttp")  # "aiohttp" - serwer w pętli bota, "flask" - Flask w wątku, "off"
+HTTP_HOST = os.getenv("RESP_HTTP_HOST", "0.0.0.0")
+HTTP_PORT = int(os.getenv("PORT", "5000"))
+PUBLIC_URL = os.getenv("RESP_PUBLIC_URL") or os.getenv("RENDER_EXTERNAL_URL")  # publiczny adres serwera HTTP (linki do kalendarza)
+LOG_FILE = os.getenv("RESP_LOG_FILE")  # domyślnie tylko stdout
+LOW_MEMORY = os.getenv("RESP_LOW_MEMORY", "0") == "1"  # Minimalne intencje i cache (darmowe plany hostingu)
+MESSAGE_CONTENT = os.getenv("RESP_MESSAGE_CONTENT", "1") == "1"  # 0 - bez intencji message_content (same komendy /slash)
+SYNC_COMMANDS = os.getenv("RESP_SYNC_COMMANDS", "1") == "1"  # rejestracja komend /slash w Discordzie przy starcie
+HA = os.getenv("RESP_HA", "0") == "1"  # lider/zapasowa: kilka instancji na tym samym RESP_DB_PATH, pinguje tylko lider
+LEASE_TTL = float(os.getenv("RESP_LEASE_TTL", "10"))  # po tylu sekundach bez odnowienia zapasowa przejmuje
+STANDBY_POLL = float(os.getenv("RESP_STANDBY_POLL", "1"))  # co ile sekund zapasowa czyta dziennik lidera
+DM_CONCURRENCY = int(os.getenv("RESP_DM_CONCURRENCY", "8"))  # równoległe wysyłki DM do subskrybentów
+DM_PER_SECOND = float(os.getenv("RESP_DM_PER_SECOND", "20"))  # limit DM - zapas do globalnych 50/s Discorda dla pingów i odpowiedzi
+CALIBRATION_MIN_SAMPLES = int(os.getenv("RESP_CALIBRATION_MIN_SAMPLES", "5"))  # tyle odstępów w historii, zanim !kalibracja zaproponuje czas
+CHAMPIONS_FILE = os.getenv("RESP_CHAMPIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "champions.json"))
+
 # ------------------- DISCORD BOT -------------------
-intents = discord.Intents.default()
-intents.messages = True
-intents.message_content = True
+# Bez treści wiadomości bot nie pobiera całego czatu - komendy działają jako /slash i @wzmianka.
+# Profil low-memory: tylko intencja guilds, bez cache członków i wiadomości, bez chunkowania serwerów
+client_options = bot_options(low_memory=LOW_MEMORY, message_content=MESSAGE_CONTENT)
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot_class = commands.AutoShardedBot if SHARDED else commands.Bot
+bot = bot_class(command_prefix=commands.when_mentioned_or("!"), **client_options)
+dispatcher = Dispatcher()  # kolejka wysyłek: pingi > odpowiedzi > listy
+logger = logging.getLogger('discord_bot')
+# Log każdej komendy z on_message - z limitem, żeby spam nie zalał logów
+message_logger = rate_limited('discord_bot.messages', int(os.getenv("RESP_LOG_MESSAGES_PER_MINUTE", "30")))
 
 # ------------------- ZMIENNE -------------------
-resp_times = {}
-champion_aliases = {
-    "kowal": "Kowal Lugusa",
-    "straz": "Straż Lugusa"
-}
-lugus_rotation = {
-    "Kowal Lugusa": "Straż Lugusa",
-    "Straż Lugusa": "Kowal Lugusa"
-}
+# Katalog czempionów (nazwy, skróty, emotki) - rozpoznawanie nazw i podpowiedzi
+catalog = ChampionCatalog.from_file(CHAMPIONS_FILE)
+# Rotacje (np. Kowal Lugusa → Straż Lugusa → ...) z czasami respu członków - też z champions.json
+rotations = RotationTable.from_file(CHAMPIONS_FILE, RESP_TIME)
 
 # ------------------- FUNKCJE -------------------
-def next_resp(last_resp):
-    return last_resp + RESP_TIME
+def next_resp(last_resp, champion=None):
+    return last_resp + rotations.interval(champion)
+
+def ping_resp(champion, channel, target_time, spawn_time):
+    """Zleca ping przez kolejkę wysyłek (nie czeka na Discorda)"""
+    minutes = max(0, round((spawn_time - datetime.utcnow()).total_seconds() / 60))
+    return dispatcher.ping(channel, f"🔔 @everyone **{champion}** resp w lochu za {minutes} minut! 🔔", target_time)
+
+def subscriber_message(champion, channel, spawn_time):
+    minutes = max(0, round((spawn_time - datetime.utcnow()).total_seconds() / 60))
+    return f"🔔 **{champion}** resp w lochu za {minutes} minut! ({channel.guild.name}, #{channel.name})"
 
-async def ping_resp(champion, channel):
-    await channel.send(f"🔔 @everyone **{champion}** resp w lochu za 30 minut! 🔔")
+async def open_dm(user_id):
+    return await bot.create_dm(discord.Object(user_id))
+
+def mention_fallback(channel, content, user_ids):
+    """Subskrybenci z zamkniętymi DM - zbiorcza wzmianka na kanale pingów (bez @everyone)"""
+    allowed = discord.AllowedMentions(everyone=False, roles=False, users=True)
+    mentions = [f"<@{user_id}>" for user_id in user_ids]
+    for i in range(0, len(mentions), 50):  # 50 wzmianek mieści się w jednej wiadomości
+        sent = dispatcher.send(channel, f"📬 {content}\n{' '.join(mentions[i:i + 50])}", allowed_mentions=allowed)
+        sent.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+async def reply(ctx, content=None, **kwargs):
+    """Odpowiedź na komendę przez kolejkę wysyłek (ustępuje pingom)"""
+    return await dispatcher.send(ctx, content, **kwargs)
+
+async def resolve_champion(ctx, text):
+    """Nazwa czempiona z katalogu; przy literówce odpowiada podpowiedziami i zwraca None"""
+    name, suggestions = catalog.lookup(text)
+    if name is None:
+        hints = ", ".join(f"**{suggestion}**" for suggestion in suggestions)
+        embed = discord.Embed(
+            title="❓ Nieznany czempion",
+            description=f"Nie znam czempiona **{text.strip()}**. Czy chodziło o: {hints}?",
+            color=0xff9900
+        )
+        await reply(ctx, embed=embed)
+    return name
+
+def not_found_embed(text):
+    """Embed "nie znaleziono" z podpowiedziami z katalogu"""
+    embed = discord.Embed(
+        title="❌ Nie znaleziono",
+        description=f"Nie znaleziono czempiona **{text.strip()}** na liście",
+        color=0xff6b6b
+    )
+    suggestions = catalog.suggest(text, limit=3)
+    if suggestions:
+        embed.add_field(name="Czy chodziło o:", value=", ".join(f"**{name}**" for name in suggestions), inline=False)
+    return embed
 
 def utc_to_poland(utc_dt):
     return utc_dt.replace(tzinfo=pytz.utc).astimezone(POLAND_TZ)
 
+def format_duration(seconds):
+    """Sekundy jako "5h 30m" """
+    hours, minutes = divmod(round(seconds / 60), 60)
+    return f"{hours}h {minutes:02d}m"
+
 # ------------------- TASK -------------------
-@tasks.loop(seconds=30)
-async def check_resp():
-    now = datetime.utcnow()
-    for champion, last_resp in resp_times.copy().items():
-        next_resp_time = next_resp(last_resp)
-        time_until_next_resp = next_resp_time - now
-
-        if PING_BEFORE >= time_until_next_resp > PING_BEFORE - timedelta(seconds=30):
-            channel = bot.get_channel(CHANNEL_ID)
-            if channel:
-                await ping_resp(champion, channel)
-
-        if time_until_next_resp.total_seconds() <= 0:
-            if champion in lugus_rotation:
-                next_champion = lugus_rotation[champion]
-                resp_times[next_champion] = next_resp_time
-                del resp_times[champion]
-            else:
-                resp_times[champion] = next_resp_time
+async def check_resp(key, kind, deadline):
+    """Obsługa terminu z harmonogramu - wywoływana tylko gdy coś jest do zrobienia"""
+    ns, champion = key
+    if champion not in state.get(ns):
+        return
+    if elector is not None and not elector.is_leader():
+        return  # dzierżawa wygasła (np. zawieszony proces) - pinguje już inna instancja
+
+    if kind == PING:
+        spawn_time = deadline + PING_BEFORE
+        channel = bot.get_channel(state.channel_for(ns) or 0)
+        if channel and ledger.claim(ns, champion, spawn_time, deadline, datetime.utcnow()):
+            sent = ping_resp(champion, channel, deadline, spawn_time)
+            sent.add_done_callback(
+                lambda f: ledger.delivered(ns, champion, spawn_time, not f.cancelled() and f.exception() is None)
+            )
+            # DM subskrybentów w osobnej puli - ping na kanale jest już w kolejce i na nie nie czeka
+            subscribers = subscriptions.subscribers(ns, champion)
+            if subscribers:
+                fanout.notify(channel, subscriber_message(champion, channel, spawn_time), subscribers)
+        return
+
+    state.advance(ns, champion)
+
+state = RespState(
+    RespStore(RESP_DB_PATH), check_resp, RESP_TIME, PING_BEFORE,
+    rotation=rotations, scope=RESP_SCOPE, default_channels={GUILD_ID: CHANNEL_ID},
+)
+
+# Rejestr pingów - każdy resp pingowany dokładnie raz, także po restarcie
+ledger = PingLedger(state.store, PING_GRACE, retention=timedelta(days=2))
+
+# Historia zaobserwowanych respów - rozkład odstępów i kalibracja czasów respu
+history = SpawnHistory(state.store)
+
+# Subskrypcje respów (czempion -> użytkownicy) i pula wysyłek DM
+subscriptions = SubscriptionIndex(state.store)
+fanout = FanOut(
+    open_dm, mention_fallback, concurrency=DM_CONCURRENCY, rate=(DM_PER_SECOND, 1.0),
+    global_bucket=dispatcher.global_bucket,
+)
+
+upcoming = UpcomingView(rotations)
+state.listeners.append(upcoming.apply)
+share_view(upcoming)
+
+publisher = SnapshotPublisher(upcoming)
+state.listeners.append(publisher.on_change)
+share_publisher(publisher)
+
+def bot_health():
+    """Stan bota dla /api/health"""
+    if elector is not None and not elector.is_leader():
+        discord_status = "standby"
+    else:
+        discord_status = "connected" if bot.is_ready() and not bot.is_closed() else "disconnected"
+    return {
+        "discord_bot": discord_status,
+        "role": "single" if elector is None else "leader" if elector.is_leader() else "standby",
+        "latency_ms": None if math.isnan(bot.latency) else round(bot.latency * 1000),
+        "guilds": len(bot.guilds),
+        "timers": state.count(),
+        "scheduler": state.scheduler.is_running(),
+        "send_queue": dispatcher.pending(),
+        "dm_queue": fanout.pending(),
+    }
+
+publisher.health = bot_health
+TRACKED_TIMERS.set_function(state.count)
+SEND_QUEUE.set_function(dispatcher.pending)
+DM_QUEUE.set_function(fanout.pending)
+
+def build_resp_embed(ns):
+    """Embed ze statusem respów przestrzeni (dla !resp i tablicy na żywo)"""
+    view = upcoming.current(ns)
+    embed = discord.Embed(title="⏰ Status respów czempionów", color=0x00ff00)
+    if not view.entries:
+        embed.description = "📋 Brak zapisanych respów czempionów. Użyj `!set_resp [nazwa]` aby dodać czempiona."
+    for entry in view.entries[:25]:  # limit pól embeda
+        embed.add_field(
+            name=f"{catalog.emoji(entry.champion)} {entry.champion}",
+            value=f"Czas respu: {entry.next_local}" + (
+                f" - {utc_to_poland(entry.window_end).strftime('%H:%M:%S')}" if entry.window_end > entry.next_resp else ""
+            ),
+            inline=True
+        )
+    return embed
+
+board = LiveBoard(bot, state.store, build_resp_embed, interval=BOARD_INTERVAL, dispatcher=dispatcher)
+if LIVE_BOARD:
+    state.listeners.append(board.on_change)
+
+def restore_state():
+    """Przywraca timery zapisane przed restartem/redeployem"""
+    saved = state.restore(legacy_namespace=state.namespace(GUILD_ID, CHANNEL_ID))
+    board.restore(saved.get("board", {}))
+    ledger.restore(saved.get("ledger", {}), take_over=not HA)
+    subscriptions.restore(saved.get("sub", {}))
+    history.load(RESP_DB_PATH)
+    for timers in state.timers.values():
+        for champion in timers:
+            catalog.learn(champion)
+    logger.info(f"💾 Przywrócono {state.count()} timerów respów")
+
+# ------------------- WYSOKA DOSTĘPNOŚĆ -------------------
+async def follow_store():
+    """Instancja zapasowa: wczytaj zmiany lidera z dziennika (stan, widoki, rejestr pingów)"""
+    loop = asyncio.get_running_loop()
+    ops = await loop.run_in_executor(None, state.store.tail)
+    if ops is None:
+        # Lider przyciął dziennik snapshotem, zanim go przeczytaliśmy - pełny odczyt
+        saved = await loop.run_in_executor(None, state.store.load)
+        subscriptions.restore(saved.get("sub", {}))
+        other = state.resync(saved)
+    else:
+        other = state.replicate(ops)
+    for op, table, key, value in other:
+        if table == "ledger":
+            ledger.replicate(key, value)
+        elif table == "sub":
+            subscriptions.replicate(key, value)
+        elif table == "board" and value is not None:
+            board.restore({key: value})
+
+def take_over():
+    """Przejęcie przywództwa: niedokończone pingi poprzednika nie są powtarzane"""
+    ledger.take_over()
+    history.load(RESP_DB_PATH)  # historia nie idzie dziennikiem - czytamy dopisane przez poprzednika
+    for timers in state.timers.values():
+        for champion in timers:
+            catalog.learn(champion)
+    logger.info("👑 Ta instancja jest liderem - łączę z Discordem")
+
+def step_down():
+    state.scheduler.stop()
+    fanout.stop()
+    logger.warning("⚠️ Utracono dzierżawę lidera - pingi wstrzymane")
+
+elector = LeaderElector(
+    LeaderLease(RESP_DB_PATH, ttl=LEASE_TTL), follow=follow_store,
+    on_promote=take_over, on_demote=step_down, poll=STANDBY_POLL,
+) if HA else None
+
+_commands_synced = False
+
+async def sync_commands():
+    """Zarejestruj komendy /slash w Discordzie - raz na proces (limitowane przez API)"""
+    global _commands_synced
+    if _commands_synced or not SYNC_COMMANDS:
+        return
+    try:
+        synced = await bot.tree.sync()
+        _commands_synced = True
+        logger.info(f"🔗 Zarejestrowano {len(synced)} komend /slash")
+    except discord.HTTPException as e:
+        logger.warning(f"⚠️ Nie udało się zarejestrować komend /slash: {e}")
 
 # ------------------- EVENTY -------------------
 @bot.event
 async def on_ready():
-    print(f'🤖 {bot.user} jest online!')
+    logger.info(f'🤖 {bot.user} jest online!')
     guild = bot.get_guild(GUILD_ID)
     if guild:
         channel = guild.get_channel(CHANNEL_ID)
         if channel:
             permissions = channel.permissions_for(guild.me)
-            print(f'✅ Dostęp do kanału: {channel.name}, send_messages={permissions.send_messages}')
-    if not check_resp.is_running():
-        check_resp.start()
-        print("⏰ Timer sprawdzania respów uruchomiony!")
+            logger.info(f'✅ Dostęp do kanału: {channel.name}, send_messages={permissions.send_messages}')
+    logger.info(f'📊 Bot jest na {len(bot.guilds)} serwerach')
+    if not dispatcher.is_running():
+        dispatcher.start()
+    fanout.start()
+    if not state.scheduler.is_running():
+        state.scheduler.start()
+        logger.info("⏰ Harmonogram respów uruchomiony!")
+    await sync_commands()
+    memory_report(bot, state, "po połączeniu")
 
 @bot.event
 async def on_message(message):
     if message.content.startswith('!') and not message.author.bot:
-        print(f'📨 Odebrano komendę: {message.content} od {message.author}')
+        message_logger.info('📨 Odebrano komendę: %s od %s', message.content, message.author)
     await bot.process_commands(message)
 
+# ------------------- METRYKI KOMEND -------------------
+# Komendy odpowiadające tylko wywołującemu (ephemeral) - !resp przy tablicy na żywo także
+PRIVATE_COMMANDS = {"subscribe", "unsubscribe"}
+
+def replies_privately(ctx):
+    return ctx.command.qualified_name in PRIVATE_COMMANDS or (LIVE_BOARD and ctx.command.qualified_name == "resp")
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+    # Komenda /slash: potwierdź od razu - odpowiedź idzie przez kolejkę wysyłek i może ustąpić pingom
+    if ctx.interaction is not None and not ctx.interaction.response.is_done():
+        # Po publicznym defer ephemeral=True w odpowiedzi jest ignorowane - prywatne komendy potwierdzamy prywatnie
+        await ctx.defer(ephemeral=replies_privately(ctx))
+
+@bot.after_invoke
+async def observe_command_latency(ctx):
+    started_at = getattr(ctx, "started_at", None)
+    if started_at is not None:
+        COMMAND_LATENCY.observe(time.perf_counter() - started_at, command=ctx.command.qualified_name)
+
+# ------------------- KOMENDY SLASH -------------------
+async def champion_autocomplete(interaction, current):
+    """Podpowiedzi nazw z katalogu czempionów (trie + trigramy)"""
+    return [app_commands.Choice(name=name, value=name) for name in catalog.suggest(current, limit=25)]
+
+async def subscribed_autocomplete(interaction, current):
+    """Podpowiedzi spośród subskrypcji użytkownika"""
+    ns = state.namespace(interaction.guild_id, interaction.channel_id)
+    key = normalize(current)
+    names = [name for name in subscriptions.of_user(ns, interaction.user.id) if key in normalize(name)]
+    return [app_commands.Choice(name=name, value=name) for name in names[:25]]
+
+async def tracked_autocomplete(interaction, current):
+    """Podpowiedzi spośród czempionów z timerami w tym kanale/serwerze"""
+    tracked = state.get(state.namespace(interaction.guild_id, interaction.channel_id))
+    names = [name for name in catalog.suggest(current, limit=25) if name in tracked]
+    key = normalize(current)
+    names += sorted(name for name in tracked if key in normalize(name) and name not in names)
+    return [app_commands.Choice(name=name, value=name) for name in names[:25]]
+
 # ------------------- KOMENDY -------------------
-@bot.command()
+@bot.hybrid_command(description="Pokazuje kiedy respią się czempioni")
+@commands.guild_only()
 async def resp(ctx):
-    if not resp_times:
-        await ctx.send("📋 Brak zapisanych respów czempionów. Użyj `!set_resp [nazwa]` aby dodać czempiona.")
+    ns = state.namespace_for(ctx)
+    if LIVE_BOARD:
+        # Zamiast nowej wiadomości - scalona edycja przypiętej tablicy
+        board.request_update(ctx.channel, ns)
+        if ctx.interaction is not None:
+            await reply(ctx, "🔄 Tablica respów zostanie odświeżona.", ephemeral=True)
         return
 
-    now = datetime.utcnow()
-    embed = discord.Embed(title="⏰ Status respów czempionów", color=0x00ff00)
-    for champion, last_resp in resp_times.items():
-        next_resp_time = next_resp(last_resp)
-        resp_local = utc_to_poland(next_resp_time)
-        embed.add_field(
-            name=f"🐉 {champion}",
-            value=f"Czas respu: {resp_local.strftime('%Y-%m-%d %H:%M:%S')}",
-            inline=True
-        )
+    if not upcoming.current(ns).entries:
+        await reply(ctx, "📋 Brak zapisanych respów czempionów. Użyj `!set_resp [nazwa]` aby dodać czempiona.")
+        return
 
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=build_resp_embed(ns))
 
-@bot.command()
+@bot.hybrid_command(description="Ustawia czas respu czempiona (domyślnie na teraz)")
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa lub skrót czempiona", time_str="Godzina respu HH:MM (czas polski)")
+@app_commands.autocomplete(champion=champion_autocomplete)
 async def set_resp(ctx, champion: str, time_str: str = None):
-    champion = champion.strip().lower()
-    full_name = champion_aliases.get(champion, champion.title())
+    full_name = await resolve_champion(ctx, champion)
+    if full_name is None:
+        return
     now_poland = datetime.now(POLAND_TZ)
 
     if time_str:
@@ -116,35 +406,147 @@ async def set_resp(ctx, champion: str, time_str: str = None):
             resp_time_poland = now_poland.replace(hour=hour, minute=minute, second=0, microsecond=0)
             resp_time_utc = resp_time_poland.astimezone(pytz.utc).replace(tzinfo=None)
         except:
-            await ctx.send("❌ Niepoprawny format godziny! Użyj `HH:MM`.")
+            await reply(ctx, "❌ Niepoprawny format godziny! Użyj `HH:MM`.")
             return
     else:
         resp_time_utc = datetime.utcnow()
 
-    resp_times[full_name] = resp_time_utc
+    ns = state.namespace_for(ctx)
+    state.set(ns, full_name, resp_time_utc)
+    history.record(ns, full_name, resp_time_utc)
+    catalog.learn(full_name)
 
     embed = discord.Embed(
         title="✅ Resp zapisany!",
         description=f"**{full_name}** - czas respu ustawiony",
         color=0x00ff00
     )
-    if full_name in lugus_rotation:
-        next_champion = lugus_rotation[full_name]
-        embed.add_field(name="🔄 Rotacja Lugusa:", value=f"Po **{full_name}** → następny resp: **{next_champion}**", inline=False)
-    await ctx.send(embed=embed)
+    rotation = rotations.rotation(full_name)
+    if rotation is not None:
+        next_champion = rotations.next(full_name)
+        embed.add_field(name=f"🔄 Rotacja {rotation.name}:", value=f"Po **{full_name}** → następny resp: **{next_champion}**", inline=False)
+    await reply(ctx, embed=embed)
+
+@bot.hybrid_command(description="Ustawia wiele respów naraz z listy `czempion HH:MM` (wklejonej albo z pliku .txt/.csv)")
+@commands.guild_only()
+@app_commands.describe(file="Plik .txt/.csv z liniami `czempion HH:MM`", text="Linie `czempion HH:MM` (czas polski)")
+async def import_resp(ctx, file: discord.Attachment = None, *, text: str = None):
+    if file is not None:
+        if file.size > MAX_FILE_BYTES:
+            await reply(ctx, f"❌ Plik jest za duży (maksymalnie {MAX_FILE_BYTES // 1024} KB).")
+            return
+        text = decode(await file.read())
+    if not text or not text.strip():
+        await reply(ctx, "❌ Podaj listę `czempion HH:MM` (każdy w nowej linii) albo załącz plik .txt/.csv.")
+        return
+
+    # Najpierw cała lista, potem zapis - jeden błąd i żaden timer się nie zmienia
+    entries, errors = parse_lines(text, catalog, datetime.utcnow())
+    if errors:
+        embed = discord.Embed(
+            title="❌ Import przerwany",
+            description="\n".join(f"Linia {number}: {error}" for number, error in errors[:15])[:4000],
+            color=0xff6b6b
+        )
+        footer = "Nic nie zostało zapisane - popraw linie i wyślij całą listę ponownie."
+        if len(errors) > 15:
+            footer = f"...i {len(errors) - 15} innych błędów. " + footer
+        embed.set_footer(text=footer)
+        await reply(ctx, embed=embed)
+        return
+    if not entries:
+        await reply(ctx, "❌ Lista nie zawiera żadnego respu.")
+        return
+
+    # Jedna partia: jedna transakcja w bazie, jedno przezbrojenie harmonogramu, jedna odpowiedź
+    ns = state.namespace_for(ctx)
+    state.set_many(ns, entries)
+    history.record_many(ns, entries)
+    for champion, _ in entries:
+        catalog.learn(champion)
+    lines = [
+        f"{catalog.emoji(champion)} **{champion}** - {utc_to_poland(last_resp).strftime('%H:%M')}"
+        f" → resp {utc_to_poland(next_resp(last_resp, champion)).strftime('%H:%M')}"
+        for champion, last_resp in entries
+    ]
+    embed = discord.Embed(title=f"✅ Zapisano {len(entries)} respów", color=0x00ff00)
+    embed.description = "\n".join(lines[:30]) + (f"\n...i {len(lines) - 30} więcej" if len(lines) > 30 else "")
+    await reply(ctx, embed=embed)
 
-@bot.command()
+@bot.hybrid_command(description="Eksportuje wszystkie timery w formacie `czempion HH:MM` (do !import_resp)")
+@commands.guild_only()
+async def export_resp(ctx):
+    timers = state.get(state.namespace_for(ctx))
+    if not timers:
+        await reply(ctx, "📋 Brak zapisanych respów czempionów. Użyj `!set_resp [nazwa]` aby dodać czempiona.")
+        return
+    content = "\n".join(export_lines(dict(timers), datetime.utcnow())) + "\n"
+    if len(content) <= 1900:
+        await reply(ctx, f"```\n{content}```", priority=PRIORITY_BULK)
+    else:
+        # Długa lista jako plik - wczytywalny ponownie przez !import_resp z załącznikiem
+        await reply(ctx, f"📦 {len(timers)} timerów (czas polski)", file=discord.File(io.BytesIO(content.encode("utf-8")), "respy.txt"), priority=PRIORITY_BULK)
+
+@bot.hybrid_command(description="Usuwa czempiona z listy respów")
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa czempiona")
+@app_commands.autocomplete(champion=tracked_autocomplete)
 async def del_resp(ctx, *, champion: str):
-    champion = champion.strip().lower()
-    full_name = champion_aliases.get(champion, champion.title())
-    if full_name in resp_times:
-        del resp_times[full_name]
+    full_name = catalog.resolve(champion) or champion.strip().title()
+    if state.delete(state.namespace_for(ctx), full_name):
         embed = discord.Embed(title="🗑️ Resp usunięty", description=f"**{full_name}** został usunięty z listy respów", color=0xff6b6b)
     else:
-        embed = discord.Embed(title="❌ Nie znaleziono", description=f"Nie znaleziono czempiona **{full_name}** na liście", color=0xff6b6b)
-    await ctx.send(embed=embed)
+        embed = not_found_embed(champion)
+    await reply(ctx, embed=embed)
+
+@bot.hybrid_command(description="Prywatna wiadomość przed respem czempiona (bez nazwy - twoje subskrypcje)")
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa lub skrót czempiona")
+@app_commands.autocomplete(champion=champion_autocomplete)
+async def subscribe(ctx, *, champion: str = None):
+    ns = state.namespace_for(ctx)
+    if champion is None:
+        names = subscriptions.of_user(ns, ctx.author.id)
+        if not names:
+            await reply(ctx, "📭 Nie subskrybujesz żadnego czempiona. Użyj `!subscribe [nazwa]`.", ephemeral=True)
+        else:
+            await reply(ctx, "🔔 Twoje subskrypcje: " + ", ".join(f"**{name}**" for name in names), ephemeral=True)
+        return
+    full_name = await resolve_champion(ctx, champion)
+    if full_name is None:
+        return
+    minutes = int(PING_BEFORE.total_seconds() // 60)
+    if subscriptions.subscribe(ns, full_name, ctx.author.id):
+        await reply(ctx, f"🔔 Dostaniesz prywatną wiadomość {minutes} minut przed respem **{full_name}**.", ephemeral=True)
+    else:
+        await reply(ctx, f"ℹ️ Już subskrybujesz **{full_name}**.", ephemeral=True)
+
+@bot.hybrid_command(description="Rezygnuje z wiadomości o respie czempiona (bez nazwy - ze wszystkich)")
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa czempiona")
+@app_commands.autocomplete(champion=subscribed_autocomplete)
+async def unsubscribe(ctx, *, champion: str = None):
+    ns = state.namespace_for(ctx)
+    if champion is None:
+        removed = subscriptions.unsubscribe_all(ns, ctx.author.id)
+        message = f"🔕 Anulowano subskrypcje: {', '.join(removed)}." if removed else "📭 Nie subskrybujesz żadnego czempiona."
+        await reply(ctx, message, ephemeral=True)
+        return
+    full_name = catalog.resolve(champion) or champion.strip().title()
+    if subscriptions.unsubscribe(ns, full_name, ctx.author.id):
+        await reply(ctx, f"🔕 Nie dostaniesz już wiadomości o respie **{full_name}**.", ephemeral=True)
+    else:
+        await reply(ctx, f"ℹ️ Nie subskrybujesz **{full_name}**.", ephemeral=True)
+
+@bot.hybrid_command(description="Ustawia ten kanał jako kanał pingów respów")
+@commands.guild_only()
+@commands.has_permissions(manage_guild=True)
+async def set_channel(ctx):
+    state.set_channel(ctx.guild.id, ctx.channel.id)
+    embed = discord.Embed(title="📢 Kanał pingów ustawiony", description=f"Pingi respów będą wysyłane na {ctx.channel.mention}", color=0x00ff00)
+    await reply(ctx, embed=embed)
 
-@bot.command(name="ping")
+@bot.hybrid_command(name="ping", description="Pokazuje ping bota i opóźnienie pingów respów")
 async def ping_command(ctx):
     latency = round(bot.latency * 1000)
     embed = discord.Embed(
@@ -152,64 +554,214 @@ async def ping_command(ctx):
         description=f"**Opóźnienie:** {latency}ms",
         color=0x00ff00 if latency < 100 else 0xff9900 if latency < 300 else 0xff0000
     )
-    await ctx.send(embed=embed)
+    summary = dispatcher.latency_summary()
+    if summary:
+        p50, p95, worst = summary
+        embed.add_field(name="🔔 Opóźnienie pingów respów", value=f"p50: {p50:.2f}s • p95: {p95:.2f}s • max: {worst:.2f}s", inline=False)
+    await reply(ctx, embed=embed)
 
-@bot.command(name='pomoc')
+@bot.hybrid_command(name='pomoc', description="Lista komend bota")
 async def pomoc(ctx):
     embed = discord.Embed(title="🤖 Pomoc - Bot respów czempionów", description="Bot automatycznie śledzi czasy respów czempionów i pinguje 30 minut przed ich powrotem!", color=0x0099ff)
     embed.add_field(name="📋 !resp", value="Pokazuje listę wszystkich czempionów i ich czasy respów w czasie polskim", inline=False)
     embed.add_field(name="➕ !set_resp [nazwa] [HH:MM]", value="Dodaje czempiona i ustawia jego czas respu.\nJeśli godzina nie zostanie podana, ustawia respa na teraz.", inline=False)
     embed.add_field(name="🗑️ !del_resp [nazwa]", value="Usuwa czempiona z listy respów", inline=False)
+    embed.add_field(name="📥 !import_resp [lista]", value="Ustawia wiele respów naraz: linie `czempion HH:MM` (czas polski) wklejone po komendzie albo w załączonym pliku .txt/.csv. Błąd w którejkolwiek linii = nic nie jest zapisane", inline=False)
+    embed.add_field(name="📤 !export_resp", value="Wypisuje wszystkie timery w tym samym formacie (do ponownego importu)", inline=False)
     embed.add_field(name="🔄 Specjalne skróty Lugusa", value="• `kowal` → Kowal Lugusa\n• `straz` → Straż Lugusa\n• Po Kowalu automatycznie respi Straż\n• Po Straży automatycznie respi Kowal", inline=False)
+    embed.add_field(name="🔔 !subscribe [nazwa]", value="Prywatna wiadomość 30 minut przed respem czempiona (bez nazwy - lista twoich subskrypcji). Przy zamkniętych DM - wzmianka na kanale pingów", inline=False)
+    embed.add_field(name="🔕 !unsubscribe [nazwa]", value="Rezygnacja z wiadomości o czempionie (bez nazwy - ze wszystkich)", inline=False)
     embed.add_field(name="🏓 !ping", value="Pokazuje ping bota", inline=False)
     embed.add_field(name="📜 !generate_resps [liczba]", value="Generuje listę przyszłych respów od ustawionej godziny respu", inline=False)
-    await ctx.send(embed=embed)
+    embed.add_field(name="📈 !historia [nazwa] [liczba]", value="Ostatnie zapisane respy czempiona i rozkład odstępów między nimi", inline=False)
+    embed.add_field(name="🎯 !kalibracja [true]", value="Proponuje czasy respu z historii; `true` - ustawia je (właściciel bota / administrator serwera głównego)", inline=False)
+    embed.add_field(name="📅 !kalendarz [nazwa]", value="Link do kalendarza respów (.ics) do subskrypcji w telefonie", inline=False)
+    embed.add_field(name="🔎 !resp_between [HH:MM] [HH:MM]", value="Pokazuje, którzy czempioni mogą się zrespić w podanym przedziale (czas polski, np. `!resp_between 20:00 23:00`)", inline=False)
+    embed.add_field(name="📢 !set_channel", value="Ustawia bieżący kanał jako kanał pingów respów na tym serwerze (wymaga uprawnienia Zarządzanie serwerem)", inline=False)
+    await reply(ctx, embed=embed)
 
-@bot.command()
+@bot.hybrid_command(description="Lista przyszłych respów wszystkich czempionów")
+@commands.guild_only()
+@app_commands.describe(number_of_resps="Ile kolejnych respów na czempiona")
 async def generate_resps(ctx, number_of_resps: int):
-    if not resp_times:
-        await ctx.send("📋 Brak zapisanych respów czempionów. Najpierw ustaw resp komendą `!set_resp [nazwa] [HH:MM]`")
+    view = upcoming.current(state.namespace_for(ctx))
+    if not view.entries:
+        await reply(ctx, "📋 Brak zapisanych respów czempionów. Najpierw ustaw resp komendą `!set_resp [nazwa] [HH:MM]`")
         return
 
-    # Mapa emotikon dla czempionów
-    champion_emojis = {
-        "Kowal Lugusa": "🔨",
-        "Straż Lugusa": "🛡️"
-    }
-
+    # Wszystkie respy naraz: tablice czasów + tablica przejść DST zamiast pytz dla każdej wartości
     message_lines = ["⏰ Lista przyszłych respów:"]
-    for champion, last_resp in resp_times.items():
-        resp_time = last_resp
-        current_champion = champion
-        for i in range(number_of_resps):
-            resp_time += RESP_TIME
-            resp_local = utc_to_poland(resp_time)
-            emoji = champion_emojis.get(current_champion, "🐉")
-            message_lines.append(
-                f"{emoji} {current_champion}\nCzas respu: {resp_local.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            )
-            # Rotacja Lugusa
-            if current_champion in lugus_rotation:
-                current_champion = lugus_rotation[current_champion]
+    message_lines += future_resp_lines(
+        ((entry.champion, entry.last_resp) for entry in view.entries),
+        number_of_resps, rotations, catalog.emojis,
+    )
 
     # Podział na wiadomości jeśli przekroczy limit Discorda
     message_chunk = ""
     for line in message_lines:
         if len(message_chunk) + len(line) > 1900:
-            await ctx.send(message_chunk)
+            await reply(ctx, message_chunk, priority=PRIORITY_BULK)
             message_chunk = ""
         message_chunk += line + "\n"
     if message_chunk:
-        await ctx.send(message_chunk)
+        await reply(ctx, message_chunk, priority=PRIORITY_BULK)
+
+@bot.hybrid_command(description="Czempioni, którzy mogą się zrespić w podanym przedziale godzin")
+@commands.guild_only()
+@app_commands.describe(start="Od godziny HH:MM (czas polski)", end="Do godziny HH:MM (czas polski)")
+async def resp_between(ctx, start: str, end: str):
+    try:
+        start_utc, end_utc = local_range(start, end, datetime.utcnow())
+    except ValueError:
+        await reply(ctx, "❌ Niepoprawny format godziny! Użyj `!resp_between HH:MM HH:MM`.")
+        return
+
+    # Indeks okien respów: wyszukiwanie binarne zamiast generowania harmonogramu każdego czempiona
+    windows = upcoming.between(state.namespace_for(ctx), start_utc, end_utc)
+    embed = discord.Embed(title=f"🔎 Respy między {start} a {end}", color=0x0099ff)
+    if not windows:
+        embed.description = "Żaden z zapisanych czempionów nie zrespi się w tym przedziale."
+    for window in windows[:25]:  # limit pól embeda
+        when = utc_to_poland(window.start).strftime('%Y-%m-%d %H:%M:%S')
+        if window.end > window.start:
+            when += f" - {utc_to_poland(window.end).strftime('%H:%M:%S')}"
+        embed.add_field(name=f"{catalog.emoji(window.champion)} {window.champion}", value=f"Czas respu: {when}", inline=True)
+    await reply(ctx, embed=embed)
+
+@bot.hybrid_command(name='historia', description="Ostatnie zaobserwowane respy czempiona i rozkład odstępów między nimi")
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa lub skrót czempiona", count="Ile ostatnich respów (domyślnie 10)")
+@app_commands.autocomplete(champion=tracked_autocomplete)
+async def historia(ctx, champion: str, count: int = 10):
+    full_name = catalog.resolve(champion) or champion.strip().title()
+    ns = state.namespace_for(ctx)
+    spawns = history.last(ns, full_name, min(max(count, 1), 25))
+    if not spawns:
+        await reply(ctx, f"📭 Na tym serwerze nie zapisano jeszcze respu **{full_name}**. Historia rośnie z każdym `!set_resp`.")
+        return
+
+    embed = discord.Embed(title=f"📈 Historia respów: {catalog.emoji(full_name)} {full_name}", color=0x0099ff)
+    lines = []
+    for newer, older in zip(spawns, spawns[1:] + [None]):
+        line = utc_to_poland(newer).strftime('%Y-%m-%d %H:%M')
+        if older is not None:
+            line += f" (+{format_duration((newer - older).total_seconds())})"
+        lines.append(line)
+    embed.description = "\n".join(lines)
+    current = rotations.interval(full_name)
+    # Rozkład z historii wszystkich serwerów - czas respu jest ten sam w całej grze
+    stats = history.distribution(full_name, current)
+    if stats is not None:
+        embed.add_field(
+            name=f"⏱️ Odstępy ({stats.count})",
+            value=f"mediana {format_duration(stats.median)} • p10-p90 {format_duration(stats.p10)} - {format_duration(stats.p90)}"
+                  f"\nśrednia {format_duration(stats.mean)} ± {round(stats.stdev / 60)} min",
+            inline=False
+        )
+    embed.add_field(name="⚙️ Czas respu w bocie", value=format_duration(current.total_seconds()), inline=False)
+    await reply(ctx, embed=embed)
+
+@bot.hybrid_command(name='kalibracja', description="Proponuje czasy respu z historii respów (apply - ustawia je)")
+@commands.guild_only()
+@app_commands.describe(apply="Ustaw proponowane czasy (właściciel bota albo administrator serwera głównego)")
+async def kalibracja(ctx, apply: bool = False):
+    proposals = history.calibrate(rotations, min_samples=CALIBRATION_MIN_SAMPLES)
+    changes = [item for item in proposals if item.proposed != item.current]
+    embed = discord.Embed(title="🎯 Kalibracja czasów respu", color=0x0099ff)
+    if not proposals:
+        embed.description = f"Za mało historii - potrzeba co najmniej {CALIBRATION_MIN_SAMPLES} odstępów między zapisanymi respami czempiona."
+        await reply(ctx, embed=embed)
+        return
+    for item in proposals[:25]:  # limit pól embeda
+        marker = "✏️" if item in changes else "✅"
+        embed.add_field(
+            name=f"{marker} {item.champion}",
+            value=f"{format_duration(item.current.total_seconds())} → **{format_duration(item.proposed.total_seconds())}**"
+                  f"\n{item.stats.count} odstępów, p10-p90 {format_duration(item.stats.p10)} - {format_duration(item.stats.p90)}",
+            inline=True
+        )
+
+    if not apply:
+        if changes:
+            embed.set_footer(text="Użyj `!kalibracja true`, aby ustawić proponowane czasy.")
+        await reply(ctx, embed=embed)
+        return
+    # Czasy respu są wspólne dla wszystkich serwerów bota
+    if not (ctx.guild.id == GUILD_ID and ctx.author.guild_permissions.manage_guild) and not await bot.is_owner(ctx.author):
+        await reply(ctx, "❌ Czasy respu może zmienić tylko właściciel bota albo administrator serwera głównego.")
+        return
+    for item in changes:
+        state.set_interval(item.champion, item.proposed)
+    embed.set_footer(text=f"Ustawiono {len(changes)} czasów respu - timery przezbrojone.")
+    await reply(ctx, embed=embed)
+
+@bot.hybrid_command(name='kalendarz', description="Link do kalendarza respów (.ics) tego serwera")
+@commands.guild_only()
+@app_commands.describe(champion="Tylko ten czempion (opcjonalnie)")
+@app_commands.autocomplete(champion=tracked_autocomplete)
+async def kalendarz(ctx, *, champion: str = None):
+    if not PUBLIC_URL or HTTP_MODE == "off":
+        await reply(ctx, "❌ Kalendarz niedostępny - bot nie ma publicznego serwera HTTP (`RESP_PUBLIC_URL`).")
+        return
+    url = f"{PUBLIC_URL.rstrip('/')}/api/guilds/{ctx.guild.id}/calendar.ics"
+    if champion:
+        url += f"?champion={quote(catalog.resolve(champion) or champion.strip())}"
+    embed = discord.Embed(
+        title="📅 Kalendarz respów",
+        description=f"Dodaj w kalendarzu telefonu jako subskrypcję (z adresu URL):\n{url}",
+        color=0x0099ff
+    )
+    embed.add_field(name="ℹ️", value="Kalendarz odświeża się sam po każdej zmianie timerów; przypomnienie 30 minut przed respem.", inline=False)
+    await reply(ctx, embed=embed)
 
 @bot.event
 async def on_command_error(ctx, error):
+    if isinstance(error, commands.HybridCommandError):
+        error = error.original
     if isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send("❌ Brakuje argumentu w komendzie!")
+        await reply(ctx, "❌ Brakuje argumentu w komendzie!")
+    elif isinstance(error, commands.NoPrivateMessage):
+        await reply(ctx, "❌ Ta komenda działa tylko na serwerze.")
+    elif isinstance(error, commands.MissingPermissions):
+        await reply(ctx, "❌ Brak uprawnień do tej komendy.")
     elif isinstance(error, commands.CommandNotFound):
-        await ctx.send("❌ Nieznana komenda! Użyj `!pomoc` aby zobaczyć listę komend.")
+        await reply(ctx, "❌ Nieznana komenda! Użyj `!pomoc` aby zobaczyć listę komend.")
     else:
-        await ctx.send(f"❌ Wystąpił błąd: {error}")
+        await reply(ctx, f"❌ Wystąpił błąd: {error}")
 
 # ------------------- URUCHOMIENIE BOTA -------------------
-bot.run(TOKEN)
+async def run_bot(serve_http=False):
+    """Bot i (opcjonalnie) serwer HTTP w jednej pętli zdarzeń; False - utracono przywództwo (RESP_HA)"""
+    log_listener = setup_logging(LOG_FILE)  # logi discord.py i bota przez kolejkę, zapis w osobnym wątku
+    upcoming.loop = asyncio.get_running_loop()  # zapytania z wątku Flaska wykonują się w tej pętli
+    restore_state()
+    memory_report(bot, state, "start")
+    http = None
+    heartbeat = heartbeat_from_env(bot_health)  # tylko pod monitor_discord_bot.py
+    try:
+        if heartbeat:
+            heartbeat.start()
+        if serve_http:
+            http = await start_http(publisher, upcoming, HTTP_HOST, HTTP_PORT)
+        async with bot:
+            if elector is None:
+                await bot.start(TOKEN)
+                return True
+            # Zapasowa nie łączy się z Discordem (żadnych podwójnych odpowiedzi) - tylko śledzi dziennik.
+            # Po utracie dzierżawy proces kończy się, a restart wraca jako zapasowa.
+            elector.start()
+            logger.info("⏳ Tryb wysokiej dostępności - czekam na dzierżawę lidera")
+            return await elector.serve(lambda: bot.start(TOKEN), bot.close)
+    finally:
+        if elector is not None:
+            await elector.stop()
+        if heartbeat:
+            heartbeat.stop()
+        if http is not None:
+            await http.cleanup()
+        state.store.close()
+        stop_logging(log_listener)
+
+if __name__ == "__main__":
+    if asyncio.run(run_bot()) is False:
+        sys.exit(1)  # restart (platforma / monitor) wraca jako instancja zapasowa
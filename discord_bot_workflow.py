@@ -5,88 +5,353 @@ Uruchamia Discord bota w trybie workflow z obsługą błędów i restartów
 """
 
 import asyncio
+import io
+import math
 import os
+import random
 import signal
 import sys
+import time
 from datetime import datetime
 import logging
 
 # Importy Discord bota
 import discord
-from discord.ext import commands, tasks
+from discord import app_commands
+from discord.ext import commands
 from datetime import timedelta
 
-# Konfiguracja logowania
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('discord_bot_workflow.log')
-    ]
-)
+from resp_board import LiveBoard
+from resp_bulk import MAX_FILE_BYTES, decode, export_lines, parse_lines
+from resp_catalog import ChampionCatalog, normalize
+from resp_dispatcher import Dispatcher, PRIORITY_BULK
+from resp_fanout import FanOut
+from resp_heartbeat import heartbeat_from_env
+from resp_history import SpawnHistory
+from resp_lease import LeaderElector, LeaderLease
+from resp_ledger import PingLedger
+from resp_logging import rate_limited, setup_logging, stop_logging
+from resp_metrics import BOT_RESTARTS, COMMAND_LATENCY, DM_QUEUE, GATEWAY_OUTAGE, SEND_QUEUE, TRACKED_TIMERS
+from resp_rotation import RotationTable
+from resp_runtime import bot_options, memory_report
+from resp_scheduler import PING
+from resp_state import RespState
+from resp_store import RespStore
+from resp_subscriptions import SubscriptionIndex
+from resp_snapshot import SnapshotPublisher, share_publisher
+from resp_timetable import local_range
+from resp_view import UpcomingView, share_view
+
+# Konfiguracja logowania - zapis w osobnym wątku, pętla zdarzeń tylko wrzuca do kolejki
+log_listener = setup_logging(os.getenv("RESP_LOG_FILE", "discord_bot_workflow.log"))
 logger = logging.getLogger('discord_bot_workflow')
+# Log każdej komendy z on_message - z limitem, żeby spam nie zalał pliku
+message_logger = rate_limited('discord_bot_workflow.messages', int(os.getenv("RESP_LOG_MESSAGES_PER_MINUTE", "30")))
 
 # ------------------- KONFIGURACJA -------------------
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
-GUILD_ID = 1394086742436614316  # ID serwera Discord
-CHANNEL_ID = 1394086743061299349  # ID kanału do pingowania respów
+GUILD_ID = int(os.getenv("DISCORD_GUILD_ID", "1394086742436614316"))  # ID domyślnego serwera Discord
+CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID", "1394086743061299349"))  # ID domyślnego kanału do pingowania respów
 RESP_TIME = timedelta(hours=5, minutes=30)  # Czas między respami czempionów
+PING_BEFORE = timedelta(minutes=30)  # Ping @everyone przed respem
+PING_GRACE = timedelta(minutes=float(os.getenv("RESP_PING_GRACE_MINUTES", "10")))  # Okno nadrabiania spóźnionych pingów
+RESP_DB_PATH = os.getenv("RESP_DB_PATH", "resp_times.db")  # Plik z zapisanymi timerami
+RESP_SCOPE = os.getenv("RESP_SCOPE", "guild")  # "guild" - timery per serwer, "channel" - per kanał
+SHARDED = os.getenv("DISCORD_SHARDED", "0") == "1"  # AutoShardedBot dla wielu serwerów
+LIVE_BOARD = os.getenv("RESP_LIVE_BOARD", "0") == "1"  # !resp odświeża jedną przypiętą wiadomość
+BOARD_INTERVAL = float(os.getenv("RESP_BOARD_INTERVAL", "30"))  # Minimalny odstęp edycji tablicy (s)
+LOW_MEMORY = os.getenv("RESP_LOW_MEMORY", "0") == "1"  # Minimalne intencje i cache (darmowe plany hostingu)
+MESSAGE_CONTENT = os.getenv("RESP_MESSAGE_CONTENT", "1") == "1"  # 0 - bez intencji message_content (same komendy /slash)
+SYNC_COMMANDS = os.getenv("RESP_SYNC_COMMANDS", "1") == "1"  # Rejestracja komend /slash w Discordzie przy starcie
+HA = os.getenv("RESP_HA", "0") == "1"  # Lider/zapasowa: kilka instancji na tym samym RESP_DB_PATH, pinguje tylko lider
+LEASE_TTL = float(os.getenv("RESP_LEASE_TTL", "10"))  # Po tylu sekundach bez odnowienia zapasowa przejmuje
+STANDBY_POLL = float(os.getenv("RESP_STANDBY_POLL", "1"))  # Co ile sekund zapasowa czyta dziennik lidera
+DM_CONCURRENCY = int(os.getenv("RESP_DM_CONCURRENCY", "8"))  # Równoległe wysyłki DM do subskrybentów
+DM_PER_SECOND = float(os.getenv("RESP_DM_PER_SECOND", "20"))  # Limit DM - zapas do globalnych 50/s Discorda dla pingów i odpowiedzi
+CALIBRATION_MIN_SAMPLES = int(os.getenv("RESP_CALIBRATION_MIN_SAMPLES", "5"))  # Tyle odstępów w historii, zanim !kalibracja zaproponuje czas
+CHAMPIONS_FILE = os.getenv("RESP_CHAMPIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "champions.json"))
 
 # ------------------- DISCORD BOT -------------------
-intents = discord.Intents.default()
-intents.messages = True
-intents.message_content = True
+# Bez treści wiadomości bot nie pobiera całego czatu - komendy działają jako /slash i @wzmianka.
+# Profil low-memory: tylko intencja guilds, bez cache członków i wiadomości, bez chunkowania serwerów
+client_options = bot_options(low_memory=LOW_MEMORY, message_content=MESSAGE_CONTENT)
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot_class = commands.AutoShardedBot if SHARDED else commands.Bot
+bot = None  # bieżący klient - nowy przy każdej próbie połączenia (new_client), stan bota zostaje
+dispatcher = Dispatcher()  # kolejka wysyłek: pingi > odpowiedzi > listy
 
 # ------------------- ZMIENNE -------------------
-resp_times = {}
 
-champion_aliases = {
-    "kowal": "Kowal Lugusa",
-    "straz": "Straż Lugusa"
-}
+# Katalog czempionów (nazwy, skróty, emotki) - rozpoznawanie nazw i podpowiedzi
+catalog = ChampionCatalog.from_file(CHAMPIONS_FILE)
 
-lugus_rotation = {
-    "Kowal Lugusa": "Straż Lugusa",
-    "Straż Lugusa": "Kowal Lugusa"
-}
+# Rotacje (np. Kowal Lugusa → Straż Lugusa → ...) z czasami respu członków - też z champions.json
+rotations = RotationTable.from_file(CHAMPIONS_FILE, RESP_TIME)
 
 # ------------------- FUNKCJE -------------------
-def next_resp(last_resp):
-    return last_resp + RESP_TIME
+def next_resp(last_resp, champion=None):
+    return last_resp + rotations.interval(champion)
+
+def ping_resp(champion, channel, target_time, spawn_time):
+    """Zleca ping przez kolejkę wysyłek (nie czeka na Discorda)"""
+    minutes = max(0, round((spawn_time - datetime.utcnow()).total_seconds() / 60))
+    return dispatcher.ping(channel, f"🔔 @everyone **{champion}** resp w lochu za {minutes} minut! 🔔", target_time)
+
+def subscriber_message(champion, channel, spawn_time):
+    """Treść DM dla subskrybentów czempiona"""
+    minutes = max(0, round((spawn_time - datetime.utcnow()).total_seconds() / 60))
+    return f"🔔 **{champion}** resp w lochu za {minutes} minut! ({channel.guild.name}, #{channel.name})"
+
+async def open_dm(user_id):
+    """Kanał DM użytkownika (bieżący klient)"""
+    return await bot.create_dm(discord.Object(user_id))
+
+def mention_fallback(channel, content, user_ids):
+    """Subskrybenci z zamkniętymi DM - zbiorcza wzmianka na kanale pingów (bez @everyone)"""
+    allowed = discord.AllowedMentions(everyone=False, roles=False, users=True)
+    mentions = [f"<@{user_id}>" for user_id in user_ids]
+    for i in range(0, len(mentions), 50):  # 50 wzmianek mieści się w jednej wiadomości
+        sent = dispatcher.send(channel, f"📬 {content}\n{' '.join(mentions[i:i + 50])}", allowed_mentions=allowed)
+        sent.add_done_callback(lambda f: f.cancelled() or f.exception())
 
-async def ping_resp(champion, channel):
-    await channel.send(f"🔔 @everyone **{champion}** resp w lochu za 30 minut! 🔔")
+async def reply(ctx, content=None, **kwargs):
+    """Odpowiedź na komendę przez kolejkę wysyłek (ustępuje pingom)"""
+    return await dispatcher.send(ctx, content, **kwargs)
+
+async def resolve_champion(ctx, text):
+    """Nazwa czempiona z katalogu; przy literówce odpowiada podpowiedziami i zwraca None"""
+    name, suggestions = catalog.lookup(text)
+    if name is None:
+        hints = ", ".join(f"**{suggestion}**" for suggestion in suggestions)
+        embed = discord.Embed(
+            title="❓ Nieznany czempion",
+            description=f"Nie znam czempiona **{text.strip()}**. Czy chodziło o: {hints}?",
+            color=0xff9900
+        )
+        await reply(ctx, embed=embed)
+    return name
+
+def format_duration(seconds):
+    """Sekundy jako "5h 30m" """
+    hours, minutes = divmod(round(seconds / 60), 60)
+    return f"{hours}h {minutes:02d}m"
+
+def not_found_embed(text):
+    """Embed "nie znaleziono" z podpowiedziami z katalogu"""
+    embed = discord.Embed(
+        title="❌ Nie znaleziono",
+        description=f"Nie znaleziono czempiona **{text.strip()}** na liście",
+        color=0xff6b6b
+    )
+    suggestions = catalog.suggest(text, limit=3)
+    if suggestions:
+        embed.add_field(name="Czy chodziło o:", value=", ".join(f"**{name}**" for name in suggestions), inline=False)
+    return embed
 
 # ------------------- TASK SPRAWDZAJĄCY RESP -------------------
-@tasks.loop(minutes=1)
-async def check_resp():
+# Pingi z przerwy w połączeniu (nowy klient nie zna jeszcze kanałów) - obsługiwane w on_ready
+parked_pings = []
+
+async def check_resp(key, kind, deadline):
+    """Obsługuje termin z harmonogramu (ping 30 minut przed respem albo sam resp)"""
+    ns, champion = key
+    if champion not in state.get(ns):
+        return
+    if elector is not None and not elector.is_leader():
+        return  # Dzierżawa wygasła (np. zawieszony proces) - pinguje już inna instancja
+
+    if kind == PING:
+        # Ping dokładnie raz (rejestr), spóźniony tylko w oknie łaski
+        spawn_time = deadline + PING_BEFORE
+        if not bot.is_ready():
+            # Termin zdjęty z harmonogramu - bez odłożenia ping przepadłby bez śladu w rejestrze
+            parked_pings.append((key, deadline))
+            return
+        channel = bot.get_channel(state.channel_for(ns) or 0)
+        if channel is None:
+            if ledger.claim(ns, champion, spawn_time, deadline, datetime.utcnow()):
+                logger.warning(f"⚠️ Brak kanału dla pingu {champion} ({ns}) - oznaczony jako pominięty")
+                ledger.delivered(ns, champion, spawn_time, False)
+            return
+        if ledger.claim(ns, champion, spawn_time, deadline, datetime.utcnow()):
+            sent = ping_resp(champion, channel, deadline, spawn_time)
+            sent.add_done_callback(
+                lambda f: ledger.delivered(ns, champion, spawn_time, not f.cancelled() and f.exception() is None)
+            )
+            # DM subskrybentów w osobnej puli - ping na kanale jest już w kolejce i na nie nie czeka
+            subscribers = subscriptions.subscribers(ns, champion)
+            if subscribers:
+                fanout.notify(channel, subscriber_message(champion, channel, spawn_time), subscribers)
+        return
+
+    # Resp - przesuń timer (dla Lugusa ustawia się rotacja na następnego)
+    state.advance(ns, champion)
+
+state = RespState(
+    RespStore(RESP_DB_PATH), check_resp, RESP_TIME, PING_BEFORE,
+    rotation=rotations, scope=RESP_SCOPE, default_channels={GUILD_ID: CHANNEL_ID},
+)
+
+# Rejestr pingów - każdy resp pingowany dokładnie raz, także po restarcie
+ledger = PingLedger(state.store, PING_GRACE, retention=timedelta(days=2))
+
+# Historia zaobserwowanych respów - rozkład odstępów i kalibracja czasów respu
+history = SpawnHistory(state.store)
+
+# Subskrypcje respów (czempion -> użytkownicy) i pula wysyłek DM
+subscriptions = SubscriptionIndex(state.store)
+fanout = FanOut(
+    open_dm, mention_fallback, concurrency=DM_CONCURRENCY, rate=(DM_PER_SECOND, 1.0),
+    global_bucket=dispatcher.global_bucket,
+)
+
+# Widok nadchodzących respów współdzielony przez komendy i HTTP
+upcoming = UpcomingView(rotations)
+state.listeners.append(upcoming.apply)
+share_view(upcoming)
+
+# Snapshot dla API HTTP (publikowany po każdej zmianie)
+publisher = SnapshotPublisher(upcoming)
+state.listeners.append(publisher.on_change)
+share_publisher(publisher)
+
+def bot_health():
+    """Stan bota dla /api/health - same odczyty atrybutów, bez blokad"""
+    if elector is not None and not elector.is_leader():
+        discord_status = "standby"
+    else:
+        discord_status = "connected" if bot.is_ready() and not bot.is_closed() else "disconnected"
+    return {
+        "discord_bot": discord_status,
+        "role": "single" if elector is None else "leader" if elector.is_leader() else "standby",
+        "latency_ms": None if math.isnan(bot.latency) else round(bot.latency * 1000),
+        "guilds": len(bot.guilds),
+        "timers": state.count(),
+        "scheduler": state.scheduler.is_running(),
+        "send_queue": dispatcher.pending(),
+        "dm_queue": fanout.pending(),
+        "last_outage_s": None if gateway.last_outage is None else round(gateway.last_outage, 1),
+    }
+
+publisher.health = bot_health
+TRACKED_TIMERS.set_function(state.count)
+SEND_QUEUE.set_function(dispatcher.pending)
+DM_QUEUE.set_function(fanout.pending)
+
+def build_resp_embed(ns):
+    """Buduje embed ze statusem respów (dla !resp i tablicy na żywo)"""
+    view = upcoming.current(ns)
     now = datetime.utcnow()
-    for champion, last_resp in resp_times.copy().items():
-        next_resp_time = last_resp + RESP_TIME
-        remaining_seconds = (next_resp_time - now).total_seconds()
+    embed = discord.Embed(title="⏰ Status respów czempionów", color=0x00ff00)
+    if not view.entries:
+        embed.description = "📋 **Brak zapisanych respów czempionów.**\n\nUżyj `!set_resp [nazwa]` aby dodać czempiona."
+    
+    for entry in view.entries[:25]:  # limit pól embeda
+        remaining = entry.next_resp - now
+        
+        if remaining.total_seconds() > 0:
+            hours, remainder = divmod(int(remaining.total_seconds()), 3600)
+            minutes, seconds = divmod(remainder, 60)
+            time_str = f"{hours}h {minutes}m {seconds}s"
+            status = f"🕐 Za: **{time_str}**"
+        else:
+            status = "✅ **DOSTĘPNY TERAZ!**"
+        if entry.window_end > entry.next_resp:
+            status += f"\nOkno respu do: {entry.window_end.strftime('%H:%M:%S')}"
         
-        # Jeśli zostało 30 minut lub mniej do respu
-        if 0 < remaining_seconds <= 1800:  # 30 minut = 1800 sekund
-            channel = bot.get_channel(CHANNEL_ID)
-            
-            if channel:
-                await ping_resp(champion, channel)
-            
-            # Jeśli to czempion Lugusa, ustaw rotację na następnego
-            if champion in lugus_rotation:
-                next_champion = lugus_rotation[champion]
-                resp_times[next_champion] = next_resp_time
-                # Usuń poprzedniego czempiona
-                if champion in resp_times:
-                    del resp_times[champion]
-            else:
-                # Dla innych czempionów - normalny resp
-                resp_times[champion] = next_resp_time
-
-@bot.event
+        embed.add_field(
+            name=f"{catalog.emoji(entry.champion)} {entry.champion}",
+            value=f"Ostatni resp: {entry.last_resp.strftime('%H:%M:%S')}\n{status}",
+            inline=True
+        )
+    return embed
+
+# Tablica na żywo - jedna przypięta wiadomość na kanał
+board = LiveBoard(bot, state.store, build_resp_embed, interval=BOARD_INTERVAL, dispatcher=dispatcher)
+if LIVE_BOARD:
+    state.listeners.append(board.on_change)
+
+def restore_state():
+    """Przywraca timery zapisane przed restartem/redeployem"""
+    saved = state.restore(legacy_namespace=state.namespace(GUILD_ID, CHANNEL_ID))
+    board.restore(saved.get("board", {}))
+    ledger.restore(saved.get("ledger", {}), take_over=not HA)
+    subscriptions.restore(saved.get("sub", {}))
+    history.load(RESP_DB_PATH)
+    for timers in state.timers.values():
+        for champion in timers:
+            catalog.learn(champion)
+    logger.info(f"💾 Przywrócono {state.count()} timerów respów")
+
+# ------------------- WYSOKA DOSTĘPNOŚĆ -------------------
+async def follow_store():
+    """Instancja zapasowa: wczytuje zmiany lidera z dziennika (stan, widoki, rejestr pingów)"""
+    loop = asyncio.get_running_loop()
+    ops = await loop.run_in_executor(None, state.store.tail)
+    if ops is None:
+        # Lider przyciął dziennik snapshotem, zanim go przeczytaliśmy - pełny odczyt
+        saved = await loop.run_in_executor(None, state.store.load)
+        subscriptions.restore(saved.get("sub", {}))
+        other = state.resync(saved)
+    else:
+        other = state.replicate(ops)
+    for op, table, key, value in other:
+        if table == "ledger":
+            ledger.replicate(key, value)
+        elif table == "sub":
+            subscriptions.replicate(key, value)
+        elif table == "board" and value is not None:
+            board.restore({key: value})
+
+def take_over():
+    """Przejęcie przywództwa: niedokończone pingi poprzednika nie są powtarzane"""
+    ledger.take_over()
+    history.load(RESP_DB_PATH)  # Historia nie idzie dziennikiem - czytamy dopisane przez poprzednika
+    for timers in state.timers.values():
+        for champion in timers:
+            catalog.learn(champion)
+    logger.info("👑 Ta instancja jest liderem - łączę z Discordem")
+
+def step_down():
+    """Utrata dzierżawy: harmonogram staje od razu, klient jest zamykany przez workflow"""
+    state.scheduler.stop()
+    fanout.stop()
+    logger.warning("⚠️ Utracono dzierżawę lidera - pingi wstrzymane")
+
+elector = LeaderElector(
+    LeaderLease(RESP_DB_PATH, ttl=LEASE_TTL), follow=follow_store,
+    on_promote=take_over, on_demote=step_down, poll=STANDBY_POLL,
+) if HA else None
+
+# ------------------- POŁĄCZENIE Z DISCORDEM -------------------
+class GatewayTracker:
+    """Przerwy w połączeniu z bramką Discorda - przez wznowienia sesji i nowe klienty"""
+
+    def __init__(self):
+        self.down_since = None
+        self.connected_since = None
+        self.last_outage = None
+
+    def down(self):
+        self.connected_since = None
+        if self.down_since is None:
+            self.down_since = time.monotonic()
+            logger.warning("🔌 Utracono połączenie z Discordem")
+
+    def up(self):
+        now = time.monotonic()
+        self.connected_since = self.connected_since or now
+        if self.down_since is not None:
+            self.last_outage = now - self.down_since
+            self.down_since = None
+            GATEWAY_OUTAGE.observe(self.last_outage)
+            logger.info(f"🔌 Połączenie przywrócone po {self.last_outage:.1f}s przerwy")
+
+    def session_length(self):
+        return 0.0 if self.connected_since is None else time.monotonic() - self.connected_since
+
+gateway = GatewayTracker()
+
 async def on_ready():
     logger.info(f'🤖 {bot.user} jest online!')
     logger.info(f'📊 Bot jest na {len(bot.guilds)} serwerach')
@@ -105,66 +370,127 @@ async def on_ready():
     else:
         logger.error(f'❌ Brak dostępu do serwera o ID: {GUILD_ID}')
     
-    # Uruchom sprawdzanie respów
-    if not check_resp.is_running():
-        check_resp.start()
-        logger.info("⏰ Timer sprawdzania respów uruchomiony!")
+    gateway.up()
+
+    # Kolejka wysyłek i harmonogram żyją dłużej niż klient - startują tylko raz
+    if not dispatcher.is_running():
+        dispatcher.start()
+    fanout.start()
+    if not state.scheduler.is_running():
+        state.scheduler.start()
+        logger.info("⏰ Harmonogram respów uruchomiony!")
+    # Nadrabianie pingów z przerwy - claim() wyśle je w oknie łaski albo oznaczy jako pominięte
+    parked = parked_pings[:]
+    parked_pings.clear()
+    for key, deadline in parked:
+        await check_resp(key, PING, deadline)
+    await sync_commands()
+    memory_report(bot, state, "po połączeniu")
+
+_commands_synced = False
+
+async def sync_commands():
+    """Zarejestruj komendy /slash w Discordzie - raz na proces, nie przy każdym nowym kliencie"""
+    global _commands_synced
+    if _commands_synced or not SYNC_COMMANDS:
+        return
+    try:
+        synced = await bot.tree.sync()
+        _commands_synced = True
+        logger.info(f"🔗 Zarejestrowano {len(synced)} komend /slash")
+    except discord.HTTPException as e:
+        logger.warning(f"⚠️ Nie udało się zarejestrować komend /slash: {e}")
+
+async def on_disconnect():
+    gateway.down()
+
+async def on_resumed():
+    # Wznowienie sesji bramki (bez ponownego IDENTIFY) - discord.py robi to sam
+    gateway.up()
 
-@bot.event
 async def on_message(message):
     # Debug - loguj otrzymane wiadomości zaczynające się od !
     if message.content.startswith('!') and not message.author.bot:
-        logger.info(f'📨 Odebrano komendę: {message.content} od {message.author}')
+        message_logger.info('📨 Odebrano komendę: %s od %s', message.content, message.author)
     
     # Ważne: pozwól botowi przetwarzać komendy
     await bot.process_commands(message)
 
+# ------------------- METRYKI KOMEND -------------------
+# Komendy odpowiadające tylko wywołującemu (ephemeral) - !resp przy tablicy na żywo także
+PRIVATE_COMMANDS = {"subscribe", "unsubscribe"}
+
+def replies_privately(ctx):
+    return ctx.command.qualified_name in PRIVATE_COMMANDS or (LIVE_BOARD and ctx.command.qualified_name == "resp")
+
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+    # Komenda /slash: potwierdź od razu - odpowiedź idzie przez kolejkę wysyłek i może ustąpić pingom
+    if ctx.interaction is not None and not ctx.interaction.response.is_done():
+        # Po publicznym defer ephemeral=True w odpowiedzi jest ignorowane - prywatne komendy potwierdzamy prywatnie
+        await ctx.defer(ephemeral=replies_privately(ctx))
+
+async def observe_command_latency(ctx):
+    """Czas obsługi komendy do histogramu /metrics (wywoływane także po błędzie)"""
+    started_at = getattr(ctx, "started_at", None)
+    if started_at is not None:
+        COMMAND_LATENCY.observe(time.perf_counter() - started_at, command=ctx.command.qualified_name)
+
+# ------------------- KOMENDY SLASH -------------------
+async def champion_autocomplete(interaction, current):
+    """Podpowiedzi nazw z katalogu czempionów (trie + trigramy)"""
+    return [app_commands.Choice(name=name, value=name) for name in catalog.suggest(current, limit=25)]
+
+async def subscribed_autocomplete(interaction, current):
+    """Podpowiedzi spośród subskrypcji użytkownika"""
+    ns = state.namespace(interaction.guild_id, interaction.channel_id)
+    key = normalize(current)
+    names = [name for name in subscriptions.of_user(ns, interaction.user.id) if key in normalize(name)]
+    return [app_commands.Choice(name=name, value=name) for name in names[:25]]
+
+async def tracked_autocomplete(interaction, current):
+    """Podpowiedzi spośród czempionów z timerami w tym kanale/serwerze"""
+    tracked = state.get(state.namespace(interaction.guild_id, interaction.channel_id))
+    names = [name for name in catalog.suggest(current, limit=25) if name in tracked]
+    key = normalize(current)
+    names += sorted(name for name in tracked if key in normalize(name) and name not in names)
+    return [app_commands.Choice(name=name, value=name) for name in names[:25]]
+
 # ------------------- KOMENDY -------------------
-@bot.command()
+@commands.hybrid_command()
+@commands.guild_only()
 async def resp(ctx):
     """Pokazuje kiedy respił się czempion"""
-    if not resp_times:
-        await ctx.send("📋 **Brak zapisanych respów czempionów.**\n\nUżyj `!set_resp [nazwa]` aby dodać czempiona.")
+    ns = state.namespace_for(ctx)
+    if LIVE_BOARD:
+        # Zamiast nowej wiadomości - scalona edycja przypiętej tablicy
+        board.request_update(ctx.channel, ns)
+        if ctx.interaction is not None:
+            await reply(ctx, "🔄 Tablica respów zostanie odświeżona.", ephemeral=True)
         return
     
-    now = datetime.utcnow()
-    embed = discord.Embed(title="⏰ Status respów czempionów", color=0x00ff00)
-    
-    for champion, last_resp in resp_times.items():
-        next_resp_time = next_resp(last_resp)
-        remaining = next_resp_time - now
-        
-        if remaining.total_seconds() > 0:
-            hours, remainder = divmod(int(remaining.total_seconds()), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            time_str = f"{hours}h {minutes}m {seconds}s"
-            status = f"🕐 Za: **{time_str}**"
-        else:
-            status = "✅ **DOSTĘPNY TERAZ!**"
-        
-        embed.add_field(
-            name=f"🐉 {champion}",
-            value=f"Ostatni resp: {last_resp.strftime('%H:%M:%S')}\n{status}",
-            inline=True
-        )
+    if not upcoming.current(ns).entries:
+        await reply(ctx, "📋 **Brak zapisanych respów czempionów.**\n\nUżyj `!set_resp [nazwa]` aby dodać czempiona.")
+        return
     
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=build_resp_embed(ns))
 
-@bot.command()
+@commands.hybrid_command()
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa lub skrót czempiona")
+@app_commands.autocomplete(champion=champion_autocomplete)
 async def set_resp(ctx, *, champion: str):
     """Ręcznie ustawia czas resp czempiona na teraz"""
-    champion = champion.strip().lower()
-    
-    # Sprawdź czy to skrót
-    if champion in champion_aliases:
-        full_name = champion_aliases[champion]
-        short_name = champion
-    else:
-        full_name = champion.title()
-        short_name = champion
+    # Nazwa lub skrót z katalogu; literówka kończy się podpowiedziami, a nie nowym timerem
+    full_name = await resolve_champion(ctx, champion)
+    if full_name is None:
+        return
     
     now = datetime.utcnow()
-    resp_times[full_name] = now
+    ns = state.namespace_for(ctx)
+    state.set(ns, full_name, now)
+    history.record(ns, full_name, now)
+    catalog.learn(full_name)
     
     embed = discord.Embed(
         title="✅ Resp ustawiony",
@@ -172,52 +498,170 @@ async def set_resp(ctx, *, champion: str):
         color=0x00ff00
     )
     
-    next_resp_time = next_resp(now)
+    next_resp_time = next_resp(now, full_name)
     embed.add_field(
         name="⏰ Następny resp",
         value=f"{next_resp_time.strftime('%H:%M:%S')} UTC",
         inline=True
     )
     
-    # Jeśli to Lugus, wyjaśnij rotację
-    if full_name in lugus_rotation:
-        next_champion = lugus_rotation[full_name]
+    # Jeśli czempion jest w rotacji, wyjaśnij kto będzie następny
+    if full_name in rotations:
+        next_champion = rotations.next(full_name)
         embed.add_field(
             name="🔄 Po tym respie",
             value=f"Automatycznie ustawiony: **{next_champion}**",
             inline=True
         )
     
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
 
-@bot.command()
-async def del_resp(ctx, *, champion: str):
-    """Usuwa czempiona z listy respów"""
-    champion = champion.strip().lower()
+@commands.hybrid_command()
+@commands.guild_only()
+@app_commands.describe(file="Plik .txt/.csv z liniami `czempion HH:MM`", text="Linie `czempion HH:MM` (czas polski)")
+async def import_resp(ctx, file: discord.Attachment = None, *, text: str = None):
+    """Ustawia wiele respów naraz z listy `czempion HH:MM` (wklejonej albo z pliku .txt/.csv)"""
+    if file is not None:
+        if file.size > MAX_FILE_BYTES:
+            await reply(ctx, f"❌ Plik jest za duży (maksymalnie {MAX_FILE_BYTES // 1024} KB).")
+            return
+        text = decode(await file.read())
+    if not text or not text.strip():
+        await reply(ctx, "❌ Podaj listę `czempion HH:MM` (każdy w nowej linii) albo załącz plik .txt/.csv.")
+        return
+    
+    # Najpierw cała lista, potem zapis - jeden błąd i żaden timer się nie zmienia
+    entries, errors = parse_lines(text, catalog, datetime.utcnow())
+    if errors:
+        embed = discord.Embed(
+            title="❌ Import przerwany",
+            description="\n".join(f"Linia {number}: {error}" for number, error in errors[:15])[:4000],
+            color=0xff6b6b
+        )
+        footer = "Nic nie zostało zapisane - popraw linie i wyślij całą listę ponownie."
+        if len(errors) > 15:
+            footer = f"...i {len(errors) - 15} innych błędów. " + footer
+        embed.set_footer(text=footer)
+        await reply(ctx, embed=embed)
+        return
+    if not entries:
+        await reply(ctx, "❌ Lista nie zawiera żadnego respu.")
+        return
     
-    # Sprawdź czy to skrót
-    if champion in champion_aliases:
-        full_name = champion_aliases[champion]
+    # Jedna partia: jedna transakcja w bazie, jedno przezbrojenie harmonogramu, jedna odpowiedź
+    ns = state.namespace_for(ctx)
+    state.set_many(ns, entries)
+    history.record_many(ns, entries)
+    for champion, _ in entries:
+        catalog.learn(champion)
+    
+    lines = [
+        f"{catalog.emoji(champion)} **{champion}** → następny resp {next_resp(last_resp, champion).strftime('%H:%M:%S')} UTC"
+        for champion, last_resp in entries
+    ]
+    embed = discord.Embed(
+        title=f"✅ Zapisano {len(entries)} respów",
+        description="\n".join(lines[:30]) + (f"\n...i {len(lines) - 30} więcej" if len(lines) > 30 else ""),
+        color=0x00ff00
+    )
+    await reply(ctx, embed=embed)
+
+@commands.hybrid_command()
+@commands.guild_only()
+async def export_resp(ctx):
+    """Eksportuje wszystkie timery w formacie `czempion HH:MM` (czas polski, do !import_resp)"""
+    timers = state.get(state.namespace_for(ctx))
+    if not timers:
+        await reply(ctx, "📋 **Brak zapisanych respów czempionów.**\n\nUżyj `!set_resp [nazwa]` aby dodać czempiona.")
+        return
+    
+    content = "\n".join(export_lines(dict(timers), datetime.utcnow())) + "\n"
+    if len(content) <= 1900:
+        await reply(ctx, f"```\n{content}```", priority=PRIORITY_BULK)
     else:
-        full_name = champion.title()
+        # Długa lista jako plik - wczytywalny ponownie przez !import_resp z załącznikiem
+        await reply(
+            ctx, f"📦 {len(timers)} timerów (czas polski)",
+            file=discord.File(io.BytesIO(content.encode("utf-8")), "respy.txt"), priority=PRIORITY_BULK
+        )
+
+@commands.hybrid_command()
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa czempiona")
+@app_commands.autocomplete(champion=tracked_autocomplete)
+async def del_resp(ctx, *, champion: str):
+    """Usuwa czempiona z listy respów"""
+    full_name = catalog.resolve(champion) or champion.strip().title()
     
-    if full_name in resp_times:
-        del resp_times[full_name]
+    if state.delete(state.namespace_for(ctx), full_name):
         embed = discord.Embed(
             title="🗑️ Resp usunięty",
             description=f"**{full_name}** został usunięty z listy respów",
             color=0xff6b6b
         )
     else:
-        embed = discord.Embed(
-            title="❌ Nie znaleziono",
-            description=f"Nie znaleziono czempiona **{full_name}** na liście",
-            color=0xff6b6b
-        )
+        embed = not_found_embed(champion)
     
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
 
-@bot.command(name="ping")
+@commands.hybrid_command()
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa lub skrót czempiona")
+@app_commands.autocomplete(champion=champion_autocomplete)
+async def subscribe(ctx, *, champion: str = None):
+    """Prywatna wiadomość przed respem czempiona (bez nazwy - twoje subskrypcje)"""
+    ns = state.namespace_for(ctx)
+    if champion is None:
+        names = subscriptions.of_user(ns, ctx.author.id)
+        if not names:
+            await reply(ctx, "📭 Nie subskrybujesz żadnego czempiona. Użyj `!subscribe [nazwa]`.", ephemeral=True)
+        else:
+            await reply(ctx, "🔔 Twoje subskrypcje: " + ", ".join(f"**{name}**" for name in names), ephemeral=True)
+        return
+    
+    full_name = await resolve_champion(ctx, champion)
+    if full_name is None:
+        return
+    
+    minutes = int(PING_BEFORE.total_seconds() // 60)
+    if subscriptions.subscribe(ns, full_name, ctx.author.id):
+        await reply(ctx, f"🔔 Dostaniesz prywatną wiadomość {minutes} minut przed respem **{full_name}**.", ephemeral=True)
+    else:
+        await reply(ctx, f"ℹ️ Już subskrybujesz **{full_name}**.", ephemeral=True)
+
+@commands.hybrid_command()
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa czempiona")
+@app_commands.autocomplete(champion=subscribed_autocomplete)
+async def unsubscribe(ctx, *, champion: str = None):
+    """Rezygnuje z wiadomości o respie czempiona (bez nazwy - ze wszystkich)"""
+    ns = state.namespace_for(ctx)
+    if champion is None:
+        removed = subscriptions.unsubscribe_all(ns, ctx.author.id)
+        message = f"🔕 Anulowano subskrypcje: {', '.join(removed)}." if removed else "📭 Nie subskrybujesz żadnego czempiona."
+        await reply(ctx, message, ephemeral=True)
+        return
+    
+    full_name = catalog.resolve(champion) or champion.strip().title()
+    if subscriptions.unsubscribe(ns, full_name, ctx.author.id):
+        await reply(ctx, f"🔕 Nie dostaniesz już wiadomości o respie **{full_name}**.", ephemeral=True)
+    else:
+        await reply(ctx, f"ℹ️ Nie subskrybujesz **{full_name}**.", ephemeral=True)
+
+@commands.hybrid_command()
+@commands.guild_only()
+@commands.has_permissions(manage_guild=True)
+async def set_channel(ctx):
+    """Ustawia bieżący kanał jako kanał pingów respów na serwerze"""
+    state.set_channel(ctx.guild.id, ctx.channel.id)
+    embed = discord.Embed(
+        title="📢 Kanał pingów ustawiony",
+        description=f"Pingi respów będą wysyłane na {ctx.channel.mention}",
+        color=0x00ff00
+    )
+    await reply(ctx, embed=embed)
+
+@commands.hybrid_command(name="ping")
 async def ping_command(ctx):
     """Wyświetla ping bota"""
     latency = round(bot.latency * 1000)  # Konwersja na milisekundy
@@ -226,9 +670,117 @@ async def ping_command(ctx):
         description=f"**Opóźnienie:** {latency}ms",
         color=0x00ff00 if latency < 100 else 0xff9900 if latency < 300 else 0xff0000
     )
-    await ctx.send(embed=embed)
+    summary = dispatcher.latency_summary()
+    if summary:
+        p50, p95, worst = summary
+        embed.add_field(name="🔔 Opóźnienie pingów respów", value=f"p50: {p50:.2f}s • p95: {p95:.2f}s • max: {worst:.2f}s", inline=False)
+    await reply(ctx, embed=embed)
+
+@commands.hybrid_command()
+@commands.guild_only()
+@app_commands.describe(start="Od godziny HH:MM (czas polski)", end="Do godziny HH:MM (czas polski)")
+async def resp_between(ctx, start: str, end: str):
+    """Pokazuje czempionów, którzy mogą się zrespić w podanym przedziale godzin"""
+    try:
+        start_utc, end_utc = local_range(start, end, datetime.utcnow())
+    except ValueError:
+        await reply(ctx, "❌ Niepoprawny format godziny! Użyj `!resp_between HH:MM HH:MM`.")
+        return
+    
+    # Indeks okien respów: wyszukiwanie binarne zamiast generowania harmonogramu każdego czempiona
+    windows = upcoming.between(state.namespace_for(ctx), start_utc, end_utc)
+    embed = discord.Embed(title=f"🔎 Respy między {start} a {end} (czas polski)", color=0x0099ff)
+    if not windows:
+        embed.description = "Żaden z zapisanych czempionów nie zrespi się w tym przedziale."
+    
+    for window in windows[:25]:  # limit pól embeda
+        when = window.start.strftime('%Y-%m-%d %H:%M:%S')
+        if window.end > window.start:
+            when += f" - {window.end.strftime('%H:%M:%S')}"
+        embed.add_field(
+            name=f"{catalog.emoji(window.champion)} {window.champion}",
+            value=f"Resp: {when} UTC",
+            inline=True
+        )
+    
+    await reply(ctx, embed=embed)
 
-@bot.command(name='pomoc')
+@commands.hybrid_command(name='historia')
+@commands.guild_only()
+@app_commands.describe(champion="Nazwa lub skrót czempiona", count="Ile ostatnich respów (domyślnie 10)")
+@app_commands.autocomplete(champion=tracked_autocomplete)
+async def historia(ctx, champion: str, count: int = 10):
+    """Ostatnie zaobserwowane respy czempiona i rozkład odstępów między nimi"""
+    full_name = catalog.resolve(champion) or champion.strip().title()
+    spawns = history.last(state.namespace_for(ctx), full_name, min(max(count, 1), 25))
+    if not spawns:
+        await reply(ctx, f"📭 Na tym serwerze nie zapisano jeszcze respu **{full_name}**. Historia rośnie z każdym `!set_resp`.")
+        return
+    
+    lines = []
+    for newer, older in zip(spawns, spawns[1:] + [None]):
+        line = newer.strftime('%Y-%m-%d %H:%M')
+        if older is not None:
+            line += f" (+{format_duration((newer - older).total_seconds())})"
+        lines.append(line)
+    embed = discord.Embed(
+        title=f"📈 Historia respów: {catalog.emoji(full_name)} {full_name} (UTC)",
+        description="\n".join(lines),
+        color=0x0099ff
+    )
+    
+    # Rozkład z historii wszystkich serwerów - czas respu jest ten sam w całej grze
+    current = rotations.interval(full_name)
+    stats = history.distribution(full_name, current)
+    if stats is not None:
+        embed.add_field(
+            name=f"⏱️ Odstępy ({stats.count})",
+            value=f"mediana {format_duration(stats.median)} • p10-p90 {format_duration(stats.p10)} - {format_duration(stats.p90)}"
+                  f"\nśrednia {format_duration(stats.mean)} ± {round(stats.stdev / 60)} min",
+            inline=False
+        )
+    embed.add_field(name="⚙️ Czas respu w bocie", value=format_duration(current.total_seconds()), inline=False)
+    
+    await reply(ctx, embed=embed)
+
+@commands.hybrid_command(name='kalibracja')
+@commands.guild_only()
+@app_commands.describe(apply="Ustaw proponowane czasy (właściciel bota albo administrator serwera głównego)")
+async def kalibracja(ctx, apply: bool = False):
+    """Proponuje czasy respu z historii respów (apply - ustawia je)"""
+    proposals = history.calibrate(rotations, min_samples=CALIBRATION_MIN_SAMPLES)
+    changes = [item for item in proposals if item.proposed != item.current]
+    embed = discord.Embed(title="🎯 Kalibracja czasów respu", color=0x0099ff)
+    if not proposals:
+        embed.description = f"Za mało historii - potrzeba co najmniej {CALIBRATION_MIN_SAMPLES} odstępów między zapisanymi respami czempiona."
+        await reply(ctx, embed=embed)
+        return
+    
+    for item in proposals[:25]:  # limit pól embeda
+        marker = "✏️" if item in changes else "✅"
+        embed.add_field(
+            name=f"{marker} {item.champion}",
+            value=f"{format_duration(item.current.total_seconds())} → **{format_duration(item.proposed.total_seconds())}**"
+                  f"\n{item.stats.count} odstępów, p10-p90 {format_duration(item.stats.p10)} - {format_duration(item.stats.p90)}",
+            inline=True
+        )
+    
+    if not apply:
+        if changes:
+            embed.set_footer(text="Użyj `!kalibracja true`, aby ustawić proponowane czasy.")
+        await reply(ctx, embed=embed)
+        return
+    
+    # Czasy respu są wspólne dla wszystkich serwerów bota
+    if not (ctx.guild.id == GUILD_ID and ctx.author.guild_permissions.manage_guild) and not await ctx.bot.is_owner(ctx.author):
+        await reply(ctx, "❌ Czasy respu może zmienić tylko właściciel bota albo administrator serwera głównego.")
+        return
+    for item in changes:
+        state.set_interval(item.champion, item.proposed)
+    embed.set_footer(text=f"Ustawiono {len(changes)} czasów respu - timery przezbrojone.")
+    await reply(ctx, embed=embed)
+
+@commands.hybrid_command(name='pomoc')
 async def pomoc(ctx):
     """Pokazuje pomoc dla komend bota"""
     embed = discord.Embed(
@@ -261,6 +813,42 @@ async def pomoc(ctx):
         inline=False
     )
     
+    embed.add_field(
+        name="📥 !import_resp [lista]",
+        value="Ustawia wiele respów naraz: linie `czempion HH:MM` (czas polski) po komendzie albo w załączonym pliku .txt/.csv\nBłąd w którejkolwiek linii = nic nie jest zapisane",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="📤 !export_resp",
+        value="Wypisuje wszystkie timery w tym samym formacie (do ponownego importu)",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🔔 !subscribe [nazwa] / 🔕 !unsubscribe [nazwa]",
+        value="Prywatna wiadomość 30 minut przed respem czempiona (przy zamkniętych DM - wzmianka na kanale pingów)\nBez nazwy: lista subskrypcji / rezygnacja ze wszystkich",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🔎 !resp_between [HH:MM] [HH:MM]",
+        value="Czempioni, którzy mogą się zrespić w podanym przedziale (godziny w czasie polskim)\nPrzykład: `!resp_between 20:00 23:00`",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="📈 !historia [nazwa] [liczba] / 🎯 !kalibracja [true]",
+        value="Ostatnie zapisane respy czempiona i rozkład odstępów / proponowane czasy respu z historii (`true` - ustawia je: właściciel bota albo administrator serwera głównego)",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="📢 !set_channel",
+        value="Ustawia bieżący kanał jako kanał pingów respów (wymaga uprawnienia Zarządzanie serwerem)",
+        inline=False
+    )
+    
     embed.add_field(
         name="🔄 Specjalne skróty Lugusa:",
         value="• `kowal` → Kowal Lugusa\n• `straz` → Straż Lugusa\n• Po Kowalu automatycznie respi Straż\n• Po Straży automatycznie respi Kowal",
@@ -273,35 +861,83 @@ async def pomoc(ctx):
         inline=False
     )
     
-    await ctx.send(embed=embed)
+    await reply(ctx, embed=embed)
 
-@bot.event
 async def on_command_error(ctx, error):
     """Obsługa błędów komend"""
+    if isinstance(error, commands.HybridCommandError):
+        error = error.original
     if isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send("❌ Brakuje argumentu! Użyj `!pomoc` aby zobaczyć jak używać komend.")
+        await reply(ctx, "❌ Brakuje argumentu! Użyj `!pomoc` aby zobaczyć jak używać komend.")
+    elif isinstance(error, commands.NoPrivateMessage):
+        await reply(ctx, "❌ Ta komenda działa tylko na serwerze.")
+    elif isinstance(error, commands.MissingPermissions):
+        await reply(ctx, "❌ Brak uprawnień do tej komendy.")
     elif isinstance(error, commands.CommandNotFound):
         return  # Ignoruj nieznane komendy
     else:
         logger.error(f"Błąd komendy: {error}")
-        await ctx.send("❌ Wystąpił błąd podczas wykonywania komendy.")
+        await reply(ctx, "❌ Wystąpił błąd podczas wykonywania komendy.")
+
+# ------------------- KLIENT DISCORDA -------------------
+def create_bot():
+    """Nowy klient z eventami i komendami bota (klienta po close() nie da się użyć ponownie)"""
+    client = bot_class(command_prefix=commands.when_mentioned_or("!"), **client_options)
+    for event in (on_ready, on_disconnect, on_resumed, on_message, on_command_error):
+        client.event(event)
+    client.before_invoke(start_command_timer)
+    client.after_invoke(observe_command_latency)
+    for command in (resp, set_resp, import_resp, export_resp, del_resp, subscribe, unsubscribe, resp_between, historia, kalibracja, set_channel, ping_command, pomoc):
+        client.add_command(command)
+    return client
+
+def new_client():
+    """Podmień bieżącego klienta; timery, harmonogram i kolejka wysyłek zostają; kanały DM starego klienta są porzucane"""
+    global bot
+    bot = create_bot()
+    board.bot = bot
+    fanout.reset()
+    return bot
+
+new_client()
 
 # ------------------- WORKFLOW RUNNER -------------------
+RECONNECT_BASE = 1.0  # pierwsza ponowna próba niemal od razu
+RECONNECT_MAX = 120.0
+STABLE_SESSION = 300.0  # po tylu sekundach połączenia licznik porażek się zeruje
+
+def reconnect_delay(failures):
+    """Wykładnicze opóźnienie z rozrzutem (połowa stała, połowa losowa)"""
+    delay = min(RECONNECT_MAX, RECONNECT_BASE * 2 ** max(0, failures - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
 class DiscordBotWorkflow:
     def __init__(self):
         self.running = False
         self.restart_count = 0
+        self.failures = 0  # kolejne nieudane sesje (zerowane po stabilnej sesji)
         
     async def run_with_restart(self):
-        """Uruchom bota z automatycznym restartem"""
-        while True:
+        """Uruchom bota z automatycznym restartem - nowy klient dla każdej próby"""
+        self.running = True
+        while self.running:
+            if not TOKEN:
+                logger.error("❌ Brak tokenu Discord!")
+                break
+            client = new_client() if bot.is_closed() else bot
+            lost = False
             try:
-                if not TOKEN:
-                    logger.error("❌ Brak tokenu Discord!")
-                    break
                 logger.info("🚀 Uruchamianie Discord bota w workflow...")
-                self.running = True
-                await bot.start(TOKEN)
+                # Krótkie zerwania bramki discord.py wznawia sam (reconnect=True) - tu trafiamy
+                # dopiero, gdy klient się poddał albo połączenie padło przy starcie
+                if elector is None:
+                    await client.start(TOKEN)
+                else:
+                    # Instancja zapasowa czeka tu na dzierżawę; po jej utracie klient jest zamykany
+                    lost = not await elector.serve(lambda: client.start(TOKEN), client.close)
+                if not self.running:
+                    break
+                error = "klient zakończył połączenie"
             except discord.LoginFailure:
                 logger.error("❌ BŁĄD: Nieprawidłowy token Discord bota!")
                 break
@@ -309,19 +945,24 @@ class DiscordBotWorkflow:
                 logger.info("🔄 Bot zatrzymany przez użytkownika")
                 break
             except Exception as e:
-                self.restart_count += 1
-                logger.error(f"❌ BŁĄD ({self.restart_count}): {e}")
-                
-                if self.restart_count > 10:
-                    logger.error("🛑 Zbyt wiele restartów - zatrzymuję bota")
-                    break
-                
-                logger.info(f"🔄 Restart za 5 sekund... (próba {self.restart_count})")
-                await asyncio.sleep(5)
-                
-                # Reset bota dla kolejnej próby
-                if not bot.is_closed():
-                    await bot.close()
+                error = e
+            finally:
+                session = gateway.session_length()
+                if self.running and not lost:
+                    gateway.down()
+                if not client.is_closed():
+                    await client.close()
+
+            if lost:
+                continue  # bez opóźnienia - czekamy na ponowne przejęcie dzierżawy jako zapasowa
+            self.restart_count += 1
+            BOT_RESTARTS.inc()
+            if session >= STABLE_SESSION:
+                self.failures = 0
+            self.failures += 1
+            delay = reconnect_delay(self.failures)
+            logger.error(f"❌ BŁĄD ({self.restart_count}): {error} - ponowne połączenie za {delay:.1f}s (porażka #{self.failures})")
+            await asyncio.sleep(delay)
     
     def stop(self):
         """Zatrzymaj workflow"""
@@ -335,7 +976,16 @@ async def main():
         logger.error("📝 Ustaw zmienną środowiskową DISCORD_BOT_TOKEN")
         return
     
+    restore_state()
+    memory_report(bot, state, "start")
     workflow = DiscordBotWorkflow()
+    # Pod monitor_discord_bot.py - heartbeat z pętli zdarzeń (wykrywa zawieszenie)
+    heartbeat = heartbeat_from_env(bot_health)
+    if heartbeat:
+        heartbeat.start()
+    if elector is not None:
+        elector.start()
+        logger.info("⏳ Tryb wysokiej dostępności - czekam na dzierżawę lidera")
     
     # Obsługa sygnałów dla graceful shutdown
     def signal_handler(signum, frame):
@@ -351,9 +1001,15 @@ async def main():
     except KeyboardInterrupt:
         logger.info("🔄 Bot zatrzymany")
     finally:
+        if elector is not None:
+            await elector.stop()
+        if heartbeat:
+            heartbeat.stop()
         if not bot.is_closed():
             await bot.close()
+        state.store.close()
         logger.info("👋 Discord bot workflow zakończony")
+        stop_logging(log_listener)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,4 +1,12 @@
-from flask import Flask
+from datetime import datetime
+
+from flask import Flask, Response, abort, jsonify, request, stream_with_context
+
+import resp_calendar
+import resp_metrics
+import resp_snapshot
+import resp_timetable
+import resp_view
 
 # Flask aplikacja dla Gunicorn
 app = Flask(__name__)
@@ -20,11 +28,100 @@ def home():
 
 @app.route('/status')
 def status():
+    view = resp_view.shared_view()
+    if view is None:
+        # Bot działa w osobnym procesie (np. gunicorn main:app) - brak dostępu do jego stanu
+        discord_bot = "check console logs"
+        upcoming = []
+    else:
+        discord_bot = "running"
+        upcoming = [
+            {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "champion": entry.champion,
+                "next_resp": entry.next_local,
+            }
+            for (guild_id, channel_id), snapshot in view.call(view.all).items()
+            for entry in snapshot.entries
+        ]
     return {
         "flask": "running",
-        "discord_bot": "check console logs",
+        "discord_bot": discord_bot,
+        "upcoming": upcoming,
         "commands": ["!resp", "!set_resp", "!del_resp", "!pomoc"]
     }
 
+# ------------------- API TIMERÓW -------------------
+def _snapshot_response(snapshot, body):
+    # body() - treść JSON składana przy pierwszym odczycie wersji (tu, w wątku Flaska)
+    if resp_snapshot.not_modified(snapshot, request.headers.get('If-None-Match')):
+        return Response(status=304, headers=resp_snapshot.cache_headers(snapshot))
+    return Response(body(), mimetype='application/json', headers=resp_snapshot.cache_headers(snapshot))
+
+def _current_snapshot():
+    publisher = resp_snapshot.shared_publisher()
+    if publisher is None:
+        abort(503, description="Discord bot nie działa w tym procesie")
+    return publisher.current
+
+@app.route('/api/timers')
+def api_timers():
+    snapshot = _current_snapshot()
+    return _snapshot_response(snapshot, lambda: snapshot.timers_body)
+
+@app.route('/api/next')
+def api_next():
+    snapshot = _current_snapshot()
+    return _snapshot_response(snapshot, lambda: snapshot.next_body)
+
+@app.route('/api/guilds/<int:guild_id>/timers')
+def api_guild_timers(guild_id):
+    snapshot = _current_snapshot()
+    return _snapshot_response(snapshot, lambda: snapshot.guild_body(guild_id))
+
+@app.route('/api/guilds/<int:guild_id>/between')
+def api_guild_between(guild_id):
+    view = resp_view.shared_view()
+    if view is None:
+        abort(503, description="Discord bot nie działa w tym procesie")
+    try:
+        start, end = resp_timetable.parse_range(request.args['from'], request.args['to'], datetime.utcnow())
+    except (KeyError, ValueError):
+        abort(400, description=f"Podaj ?from=...&to=... (HH:MM czasu polskiego albo ISO 8601, najwyżej {resp_timetable.MAX_RANGE_DAYS} dni)")
+    # Indeks okien zmienia pętla bota - zapytanie wykonuje się w niej, nie w wątku Flaska
+    windows = view.call(view.between_guild, guild_id, start, end)
+    return jsonify(resp_snapshot.windows_body(windows, start, end))
+
+@app.route('/api/guilds/<int:guild_id>/calendar.ics')
+def api_guild_calendar(guild_id):
+    view = resp_view.shared_view()
+    if view is None:
+        abort(503, description="Discord bot nie działa w tym procesie")
+    champion = request.args.get('champion')
+    try:
+        days = resp_calendar.parse_days(request.args.get('days'))
+    except ValueError:
+        abort(400, description="?days= musi być liczbą dni")
+    etag, modified, entries = view.call(resp_calendar.feed, view, guild_id, champion, days)
+    headers = {'ETag': etag, 'Last-Modified': resp_calendar.http_date(modified), 'Cache-Control': 'no-cache'}
+    if resp_calendar.not_modified(etag, modified, request.headers.get('If-None-Match'),
+                                  request.headers.get('If-Modified-Since')):
+        return Response(status=304, headers=headers)
+    # Wpisy to niezmienne ViewSnapshot - treść generowana kawałkami tu, w wątku Flaska, nie w pętli bota
+    chunks = resp_calendar.ics_chunks(entries, view.rotations, guild_id, modified, champion, days)
+    return Response(stream_with_context(chunk.encode('utf-8') for chunk in chunks), content_type=f"{resp_calendar.CONTENT_TYPE}; charset=utf-8", headers=headers)
+
+@app.route('/api/health')
+def api_health():
+    publisher = resp_snapshot.shared_publisher()
+    if publisher is None:
+        return jsonify({"flask": "running", "discord_bot": "unknown"}), 503
+    return jsonify({"flask": "running", "snapshot_version": publisher.current.version, **publisher.health()})
+
+@app.route('/metrics')
+def metrics():
+    return Response(resp_metrics.REGISTRY.render(), content_type=resp_metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=False)
\ No newline at end of file
@@ -1,66 +1,166 @@
 #!/usr/bin/env python3
 """
 Monitor Discord Bot Workflow
-Monitoruje i restartuje Discord bota w przypadku problemów
+Nadzorca bota: uruchamia start_discord_bot.py jako proces potomny, odbiera jego
+heartbeaty UDP (resp_heartbeat), przepisuje logi z potoku na bieżąco i restartuje
+bota z wykładniczym opóźnieniem z losowym rozrzutem - także gdy proces żyje,
+ale jego pętla zdarzeń przestała odpowiadać.
 """
 
+import json
+import os
+import random
+import select
+import signal
+import socket
 import subprocess
-import time
 import sys
-import os
+import threading
+import time
 from datetime import datetime
 
-def is_bot_running():
-    """Sprawdź czy Discord bot działa"""
-    try:
-        result = subprocess.run(['pgrep', '-f', 'discord_bot'], capture_output=True, text=True)
-        return result.returncode == 0 and result.stdout.strip()
-    except:
-        return False
+from resp_heartbeat import ENV_ADDR
 
-def start_bot():
-    """Uruchom Discord bota"""
-    try:
-        print(f"[{datetime.now()}] 🚀 Uruchamianie Discord bota...")
-        process = subprocess.Popen(['python', 'start_discord_bot.py'], 
-                                 stdout=subprocess.PIPE, 
-                                 stderr=subprocess.PIPE)
-        return process.pid
-    except Exception as e:
-        print(f"[{datetime.now()}] ❌ Błąd podczas uruchamiania: {e}")
-        return None
-
-def monitor_bot():
-    """Monitoruj Discord bota i restartuj w razie potrzeby"""
-    restart_count = 0
-    max_restarts = 5
-    
-    print(f"[{datetime.now()}] 📊 Uruchamianie monitora Discord bota...")
-    
-    while restart_count < max_restarts:
-        if not is_bot_running():
-            print(f"[{datetime.now()}] ❌ Discord bot nie działa")
-            
-            # Uruchom ponownie
-            pid = start_bot()
-            if pid:
-                restart_count += 1
-                print(f"[{datetime.now()}] ✅ Bot uruchomiony (PID: {pid}, restart #{restart_count})")
-            else:
-                print(f"[{datetime.now()}] 🛑 Nie udało się uruchomić bota")
+BOT_COMMAND = [sys.executable, 'start_discord_bot.py']
+STARTUP_TIMEOUT = float(os.getenv("RESP_MONITOR_STARTUP_TIMEOUT", "60"))  # na pierwszy heartbeat
+HEARTBEAT_TIMEOUT = float(os.getenv("RESP_MONITOR_HEARTBEAT_TIMEOUT", "10"))  # cisza = zawieszona pętla
+GATEWAY_TIMEOUT = float(os.getenv("RESP_MONITOR_GATEWAY_TIMEOUT", "600"))  # tyle bez połączenia z Discordem
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+STABLE_AFTER = 300.0  # po tylu sekundach zdrowej pracy licznik porażek się zeruje
+KILL_TIMEOUT = 10.0
+
+
+def log(message):
+    print(f"[{datetime.now()}] {message}", flush=True)
+
+
+def backoff_delay(failures):
+    """Wykładnicze opóźnienie z rozrzutem (połowa stała, połowa losowa)"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, failures - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def drain_output(pipe):
+    """Przepisuje logi bota na bieżąco - pełny potok zablokowałby proces potomny"""
+    for line in iter(pipe.readline, b''):
+        sys.stdout.write(f"[bot] {line.decode('utf-8', 'replace')}")
+        sys.stdout.flush()
+    pipe.close()
+
+
+class Supervisor:
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.process = None
+        self.failures = 0
+        self.restart_count = 0
+        self.stopping = False
+
+    def start_bot(self):
+        """Uruchom Discord bota z adresem heartbeatu w środowisku"""
+        host, port = self.sock.getsockname()
+        env = dict(os.environ, **{ENV_ADDR: f"{host}:{port}", "PYTHONUNBUFFERED": "1"})
+        log("🚀 Uruchamianie Discord bota...")
+        self.process = subprocess.Popen(BOT_COMMAND, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        threading.Thread(target=drain_output, args=(self.process.stdout,), daemon=True).start()
+        log(f"✅ Bot uruchomiony (PID: {self.process.pid}, restart #{self.restart_count})")
+
+    def stop_bot(self):
+        """SIGTERM, a po KILL_TIMEOUT - SIGKILL"""
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(KILL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            log("🔪 Bot nie reaguje na SIGTERM - SIGKILL")
+            self.process.kill()
+            self.process.wait()
+
+    def receive(self, timeout):
+        """Heartbeat (dict) od bieżącego procesu albo None"""
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return None
+        data, _ = self.sock.recvfrom(65536)
+        try:
+            beat = json.loads(data)
+        except ValueError:
+            return None
+        # Spóźnione datagramy poprzedniego procesu nie świadczą o życiu nowego
+        return beat if beat.get("pid") == self.process.pid else None
+
+    def watch(self):
+        """Nadzoruj jeden proces; zwraca powód zakończenia"""
+        started = time.monotonic()
+        last_beat = None
+        connected_at = started
+        healthy_since = None
+        while not self.stopping:
+            code = self.process.poll()
+            if code is not None:
+                return f"proces zakończył się (kod {code})", code
+            beat = self.receive(1.0)
+            now = time.monotonic()
+            if beat is not None:
+                if last_beat is None:
+                    log(f"💓 Pierwszy heartbeat po {now - started:.1f}s")
+                last_beat = now
+                if beat.get("loop_lag", 0) > HEARTBEAT_TIMEOUT / 2:
+                    log(f"⚠️ Pętla bota spóźniona o {beat['loop_lag']}s")
+                if beat.get("discord_bot") in ("connected", "standby"):  # zapasowa celowo nie łączy się z Discordem
+                    connected_at = now
+                    healthy_since = healthy_since or now
+                else:
+                    healthy_since = None
+                if healthy_since and self.failures and now - healthy_since > STABLE_AFTER:
+                    log("✅ Bot stabilny - zerowanie opóźnienia restartów")
+                    self.failures = 0
+            if last_beat is None and now - started > STARTUP_TIMEOUT:
+                return f"brak heartbeatu {STARTUP_TIMEOUT:.0f}s od startu", None
+            if last_beat is not None and now - last_beat > HEARTBEAT_TIMEOUT:
+                return f"pętla zdarzeń zawieszona ({now - last_beat:.1f}s bez heartbeatu)", None
+            if now - connected_at > GATEWAY_TIMEOUT:
+                return f"brak połączenia z Discordem od {now - connected_at:.0f}s", None
+        return "monitor zatrzymany", None
+
+    def run(self):
+        log("📊 Uruchamianie monitora Discord bota...")
+        while not self.stopping:
+            self.start_bot()
+            reason, code = self.watch()
+            self.stop_bot()
+            if self.stopping:
+                break
+            if code == 0:
+                # Bot zakończył się sam (np. brak/nieprawidłowy token) - restart nic nie da
+                log("🛑 Bot zakończył działanie (kod 0) - monitor kończy pracę")
                 break
-        else:
-            print(f"[{datetime.now()}] ✅ Discord bot działa")
-        
-        # Czekaj 30 sekund przed następnym sprawdzeniem
-        time.sleep(30)
-    
-    print(f"[{datetime.now()}] 🛑 Monitor zakończony - osiągnięto limit restartów")
+            self.failures += 1
+            self.restart_count += 1
+            delay = backoff_delay(self.failures)
+            log(f"❌ {reason} - restart za {delay:.1f}s (porażka #{self.failures})")
+            deadline = time.monotonic() + delay
+            while not self.stopping and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+        self.stop_bot()
+        log("🛑 Monitor zakończony")
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
 
 if __name__ == "__main__":
+    supervisor = Supervisor()
+    signal.signal(signal.SIGTERM, supervisor.stop)
     try:
-        monitor_bot()
+        supervisor.run()
     except KeyboardInterrupt:
-        print(f"[{datetime.now()}] 🔄 Monitor zatrzymany przez użytkownika")
+        log("🔄 Monitor zatrzymany przez użytkownika")
+        supervisor.stopping = True
+        supervisor.stop_bot()
     except Exception as e:
-        print(f"[{datetime.now()}] ❌ Błąd monitora: {e}")
\ No newline at end of file
+        log(f"❌ Błąd monitora: {e}")
+        supervisor.stop_bot()
@@ -0,0 +1,104 @@
+"""
+Resp Board
+Tablica respów na żywo: jedna przypięta wiadomość na kanał, edytowana w miejscu
+najwyżej raz na interwał. Wywołania !resp w tym oknie są scalane w jedną edycję.
+"""
+
+import asyncio
+import logging
+import time
+
+import discord
+
+from resp_dispatcher import PRIORITY_BULK
+
+logger = logging.getLogger('resp_board')
+
+
+class LiveBoard:
+    """Przypięte wiadomości statusu: {channel_id: (namespace, message_id)}"""
+
+    def __init__(self, bot, store, render, interval=30, dispatcher=None):
+        # render(namespace) -> discord.Embed
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.store = store
+        self.render = render
+        self.interval = interval
+        self.boards = {}
+        self._by_namespace = {}
+        self._last_edit = {}
+        self._pending = {}
+
+    def restore(self, saved):
+        """Wczytaj zapisane tablice z RespStore.load()['board']"""
+        for channel_id, (guild_id, ns_channel_id, message_id) in saved.items():
+            self._remember(channel_id, (guild_id, ns_channel_id), message_id)
+
+    def request_update(self, channel, ns):
+        """Zleć odświeżenie tablicy kanału; zwraca False jeśli dołączono do oczekującej edycji"""
+        if channel.id not in self.boards or self.boards[channel.id][0] != ns:
+            self._remember(channel.id, ns, None)
+        task = self._pending.get(channel.id)
+        if task is not None and not task.done():
+            return False
+        delay = self._last_edit.get(channel.id, 0) + self.interval - time.monotonic()
+        self._pending[channel.id] = asyncio.get_running_loop().create_task(
+            self._update_later(channel.id, max(0, delay))
+        )
+        return True
+
+    def on_change(self, ns, changes):
+        """Słuchacz RespState - zmiana timerów odświeża tablice tej przestrzeni"""
+        for channel_id in self._by_namespace.get(ns, ()):
+            channel = self.bot.get_channel(channel_id)
+            if channel is not None:
+                try:
+                    self.request_update(channel, ns)
+                except RuntimeError:
+                    return  # brak działającej pętli (np. przywracanie stanu przed startem)
+
+    # ------------------- WEWNĘTRZNE -------------------
+    def _remember(self, channel_id, ns, message_id):
+        old = self.boards.get(channel_id)
+        if old is not None:
+            self._by_namespace.get(old[0], set()).discard(channel_id)
+        self.boards[channel_id] = (ns, message_id)
+        self._by_namespace.setdefault(ns, set()).add(channel_id)
+
+    async def _update_later(self, channel_id, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        # Zmiany w trakcie edycji zlecą kolejną (po interwale) - liczonym od zlecenia, bo edycja
+        # może jeszcze czekać w kolejce wysyłek
+        self._last_edit[channel_id] = time.monotonic()
+        self._pending.pop(channel_id, None)
+        if self.dispatcher is not None:
+            # Edycja tablicy ustępuje pierwszeństwa pingom i odpowiedziom
+            await self.dispatcher.submit(channel_id, lambda: self._update(channel_id), PRIORITY_BULK)
+        else:
+            await self._update(channel_id)
+
+    async def _update(self, channel_id):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+        ns, message_id = self.boards[channel_id]
+        self._last_edit[channel_id] = time.monotonic()  # interwał od faktycznej edycji
+        embed = self.render(ns)
+        try:
+            if message_id is not None:
+                try:
+                    await channel.get_partial_message(message_id).edit(content=None, embed=embed)
+                    return
+                except discord.NotFound:
+                    pass  # ktoś usunął tablicę - wyślij nową
+            message = await channel.send(embed=embed)
+            self._remember(channel_id, ns, message.id)
+            self.store.put("board", channel_id, [*ns, message.id])
+            try:
+                await message.pin()
+            except discord.HTTPException:
+                logger.warning(f"Nie udało się przypiąć tablicy respów na kanale {channel_id}")
+        except discord.HTTPException as e:
+            logger.error(f"❌ Błąd aktualizacji tablicy respów na kanale {channel_id}: {e}")
@@ -0,0 +1,131 @@
+"""
+Resp Bulk
+Import i eksport wielu timerów naraz w formacie "czempion HH:MM" (czas lokalny, linia na
+czempiona; także CSV "czempion,HH:MM" i opcjonalna data "czempion RRRR-MM-DD HH:MM").
+Cała lista jest sprawdzana przed zapisem - jeden błąd i nic nie jest zmieniane.
+"""
+
+import csv
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+import pytz
+
+from resp_catalog import normalize
+from resp_timetable import TIMEZONE
+
+MAX_LINES = 500
+MAX_FILE_BYTES = 64 * 1024
+FUTURE_TOLERANCE = timedelta(minutes=5)  # godzina do 5 minut "w przyszłości" to jeszcze dziś (zegary graczy)
+TIME_ONLY = timedelta(hours=22)  # eksport bez daty dla respów z ostatnich 22 h (zapas na zmianę czasu)
+
+_DELIMITERS = ",;\t"
+_HEADERS = {"czempion", "champion", "nazwa", "name"}
+
+
+def decode(data):
+    """Treść pliku z Discorda: UTF-8 (także z BOM), a CSV z polskiego Excela bywa w cp1250"""
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1250", errors="replace")
+
+
+def _strip_fence(text):
+    """Blok wklejony jako ```kod``` - bez znaczników"""
+    lines = text.strip().splitlines()
+    if lines and lines[0].startswith("```"):
+        lines = lines[1:]
+    if lines and lines[-1].strip().startswith("```"):
+        lines = lines[:-1]
+    return lines
+
+
+def split_line(line):
+    """(czempion, "HH:MM" albo "RRRR-MM-DD HH:MM") z jednej linii"""
+    delimiter = next((char for char in _DELIMITERS if char in line), None)
+    if delimiter is not None:
+        fields = [field.strip() for field in next(csv.reader([line], delimiter=delimiter))]
+        return fields[0], " ".join(field for field in fields[1:] if field)
+    parts = line.split()
+    if len(parts) >= 3 and _is_date(parts[-2]):
+        return " ".join(parts[:-2]), " ".join(parts[-2:])
+    return " ".join(parts[:-1]), parts[-1] if parts else ""
+
+
+def _is_date(text):
+    try:
+        date.fromisoformat(text)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_when(text, now_utc, zone=TIMEZONE):
+    """Czas lokalny -> naiwny UTC. Sama godzina to ostatnie takie wystąpienie (dziś albo wczoraj),
+    bo zapisujemy respy, które już były"""
+    tz = pytz.timezone(zone)
+    day_text, _, clock = text.rpartition(" ")
+    hour, minute = map(int, clock.split(":"))
+    at = dtime(hour, minute)
+    if day_text:
+        local = tz.localize(datetime.combine(date.fromisoformat(day_text), at))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+    today = now_utc.replace(tzinfo=timezone.utc).astimezone(tz).date()
+    for shift in (0, -1):
+        local = tz.localize(datetime.combine(today + timedelta(days=shift), at))
+        when = local.astimezone(pytz.utc).replace(tzinfo=None)
+        if when <= now_utc + FUTURE_TOLERANCE:
+            return when
+    return when
+
+
+def parse_lines(text, catalog, now_utc, zone=TIMEZONE):
+    """([(czempion, ostatni_resp_utc)], [(nr linii, błąd)]) - nazwy przez katalog jak w !set_resp"""
+    entries, errors, seen = [], [], {}
+    lines = _strip_fence(text)
+    if len(lines) > MAX_LINES:
+        return [], [(0, f"Za dużo linii ({len(lines)}, maksymalnie {MAX_LINES})")]
+    for number, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, when_text = split_line(line)
+        if not name or not when_text:
+            errors.append((number, f"`{line}` - oczekiwano `czempion HH:MM`"))
+            continue
+        try:
+            when = parse_when(when_text, now_utc, zone)
+        except ValueError:
+            # Nagłówek CSV ("czempion,godzina") w pierwszej linii
+            if not entries and not errors and normalize(name) in _HEADERS:
+                continue
+            errors.append((number, f"`{line}` - niepoprawna godzina `{when_text}`"))
+            continue
+        champion, suggestions = catalog.lookup(name)
+        if champion is None:
+            hints = ", ".join(suggestions[:3])
+            errors.append((number, f"`{line}` - nieznany czempion (czy chodziło o: {hints}?)"))
+            continue
+        if champion in seen:
+            errors.append((number, f"`{line}` - **{champion}** już w linii {seen[champion]}"))
+            continue
+        seen[champion] = number
+        entries.append((champion, when))
+    return entries, errors
+
+
+def export_lines(timers, now_utc, zone=TIMEZONE):
+    """Linie "czempion HH:MM" dla {czempion: ostatni_resp_utc} - wczytywalne przez parse_lines.
+    Starsze respy i te w przyszłości dostają datę (sama godzina znaczyłaby dziś albo wczoraj)"""
+    tz = pytz.timezone(zone)
+    lines = []
+    for champion, last_resp in sorted(timers.items()):
+        local = last_resp.replace(tzinfo=pytz.utc).astimezone(tz)
+        # Minuty jak w !set_resp - sekundy są ucinane, więc ponowny import daje ten sam czas co do minuty
+        when = local.strftime('%H:%M' if -FUTURE_TOLERANCE <= now_utc - last_resp < TIME_ONLY else '%Y-%m-%d %H:%M')
+        if any(char in champion for char in _DELIMITERS + '"'):
+            # Nazwa z przecinkiem/średnikiem - linia CSV z nazwą w cudzysłowie
+            lines.append('"{}",{}'.format(champion.replace('"', '""'), when))
+        else:
+            lines.append(f"{champion} {when}")
+    return lines
@@ -0,0 +1,144 @@
+"""
+Resp Calendar
+Kanał iCalendar (.ics) z przyszłymi respami serwera - do subskrypcji w kalendarzu telefonu.
+Plik jest generowany leniwie, kawałkami, prosto z rozkładu (RotationTable), a walidatory
+ETag/Last-Modified zależą tylko od wersji timerów serwera - klient odpytujący co kilka
+minut dostaje tanie 304 zamiast ponownego generowania.
+"""
+
+import os
+import time
+from datetime import timedelta
+from email.utils import formatdate, parsedate_to_datetime
+
+from resp_catalog import normalize
+from resp_snapshot import BOOT_ID
+from resp_store import dt_to_epoch
+
+DEFAULT_DAYS = int(os.getenv("RESP_ICS_DAYS", "14"))
+MAX_DAYS = 62
+EVENTS_PER_CHUNK = 64  # zdarzeń na jeden zapis do strumienia
+CONTENT_TYPE = "text/calendar"
+
+
+def feed(view, guild_id, champion=None, days=DEFAULT_DAYS):
+    """(etag, moment ostatniej zmiany, wpisy) kanału serwera - bez generowania treści"""
+    snapshots = view.guild(guild_id)
+    versions = ".".join(str(snapshot.version) for _, snapshot in sorted(snapshots))
+    key = normalize(champion) if champion else ""
+    etag = f'"{BOOT_ID}-ics-{guild_id}-{versions or 0}-{days}-{key}"'
+    modified = max((snapshot.modified for _, snapshot in snapshots), default=0.0) or time.time()
+    entries = [entry for _, snapshot in snapshots for entry in snapshot.entries]
+    return etag, modified, entries
+
+
+def http_date(modified):
+    return formatdate(modified, usegmt=True)
+
+
+def not_modified(etag, modified, if_none_match, if_modified_since):
+    """Czy klient ma aktualny kanał (If-None-Match ma pierwszeństwo przed If-Modified-Since)"""
+    if if_none_match:
+        return any(tag.strip() in (etag, '*') for tag in if_none_match.split(','))
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_days(text):
+    """Horyzont kanału z parametru ?days= (1..MAX_DAYS)"""
+    if not text:
+        return DEFAULT_DAYS
+    return min(MAX_DAYS, max(1, int(text)))
+
+
+# ------------------- GENEROWANIE -------------------
+def _escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line):
+    """Zawijanie linii do 75 oktetów (RFC 5545), bez dzielenia znaków UTF-8"""
+    if len(line.encode("utf-8")) <= 75:
+        return line + "\r\n"
+    parts, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = "", 0
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(seconds):
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(seconds))
+
+
+def _slug(text):
+    return normalize(text).replace(" ", "-")
+
+
+def ics_chunks(entries, rotations, guild_id, modified, champion=None, days=DEFAULT_DAYS,
+               alarm=timedelta(minutes=30), name="Respy czempionów"):
+    """Treść kanału .ics jako generator kawałków tekstu - respy do days dni od ostatniej zmiany.
+    Treść zależy tylko od timerów (nie od chwili zapytania), więc pasuje do ETagu z feed()"""
+    key = normalize(champion) if champion else None
+    horizon = modified + days * 86400
+    dtstamp = _stamp(modified)
+    alarm_minutes = int(alarm.total_seconds() // 60)
+
+    yield "".join((
+        "BEGIN:VCALENDAR\r\n",
+        "VERSION:2.0\r\n",
+        "PRODID:-//respybot//Respy czempionow//PL\r\n",
+        "CALSCALE:GREGORIAN\r\n",
+        "METHOD:PUBLISH\r\n",
+        _fold(f"X-WR-CALNAME:{_escape(name)}"),
+        "X-PUBLISHED-TTL:PT15M\r\n",
+    ))
+    events = []
+    for entry in entries:
+        last_resp = dt_to_epoch(entry.last_resp)
+        cycle_spawns = rotations.cycle_spawns(entry.champion, last_resp)
+        for member, first, period, window in cycle_spawns:
+            if key is not None and normalize(member) != key:
+                continue
+            # Kolejne respy członka to first + k * okres - bez przechodzenia całej rotacji
+            spawn = first
+            while spawn <= horizon:
+                events.append(_event(member, spawn, window, guild_id, dtstamp, alarm_minutes))
+                if len(events) >= EVENTS_PER_CHUNK:
+                    yield "".join(events)
+                    events = []
+                spawn += period
+    events.append("END:VCALENDAR\r\n")
+    yield "".join(events)
+
+
+def _event(member, spawn, window, guild_id, dtstamp, alarm_minutes):
+    lines = [
+        "BEGIN:VEVENT\r\n",
+        # UID stały dla danego respu (także po przejściu rotacji) - klient aktualizuje zdarzenie zamiast dublować
+        _fold(f"UID:{guild_id}-{_slug(member)}-{int(spawn)}@respybot"),
+        f"DTSTAMP:{dtstamp}\r\n",
+        f"DTSTART:{_stamp(spawn)}\r\n",
+    ]
+    if window:
+        lines.append(f"DTEND:{_stamp(spawn + window)}\r\n")
+    lines.append(_fold(f"SUMMARY:{_escape(member)} - resp"))
+    if alarm_minutes:
+        lines += [
+            "BEGIN:VALARM\r\n",
+            "ACTION:DISPLAY\r\n",
+            _fold(f"DESCRIPTION:{_escape(member)} resp za {alarm_minutes} minut"),
+            f"TRIGGER:-PT{alarm_minutes}M\r\n",
+            "END:VALARM\r\n",
+        ]
+    lines.append("END:VEVENT\r\n")
+    return "".join(lines)
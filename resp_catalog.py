@@ -0,0 +1,157 @@
+"""
+Resp Catalog
+Katalog czempionów z pliku danych (champions.json): nazwy kanoniczne, skróty i emotki.
+Nazwy są indeksowane drzewem prefiksów (podpowiedzi w trakcie pisania) i indeksem
+trigramów (literówki) - rozpoznanie nazwy to kilka przeszukań słownika, nie skan listy.
+"""
+
+import heapq
+import json
+import logging
+import unicodedata
+from collections import Counter, namedtuple
+
+logger = logging.getLogger('resp_catalog')
+
+Champion = namedtuple('Champion', 'name aliases emoji')
+
+DEFAULT_EMOJI = "🐉"
+MIN_SCORE = 0.3  # podobieństwo trigramów, poniżej którego nie podpowiadamy
+TYPO_SCORE = 0.5  # od tego podobieństwa nieznana nazwa to raczej literówka niż nowy czempion
+
+_FOLD = str.maketrans({"ł": "l", "Ł": "l"})
+
+
+def normalize(text):
+    """Małe litery bez polskich znaków i nadmiarowych spacji ("Straż  Lugusa" -> "straz lugusa")"""
+    text = unicodedata.normalize("NFKD", text.translate(_FOLD).lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.split())
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PrefixTrie:
+    """Drzewo prefiksów: klucz znormalizowany -> nazwy kanoniczne"""
+
+    _END = ""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, name):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(self._END, set()).add(name)
+
+    def complete(self, prefix, limit):
+        """Do limit nazw, których klucz zaczyna się od prefix (krótsze klucze najpierw)"""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        found, level = [], [node]
+        while level and len(found) < limit:
+            next_level = []
+            for current in level:
+                for char, child in current.items():
+                    if char == self._END:
+                        found.extend(sorted(child - set(found)))
+                    else:
+                        next_level.append(child)
+            level = next_level
+        return found[:limit]
+
+
+class ChampionCatalog:
+    def __init__(self, champions=()):
+        self.champions = {}
+        self._keys = {}  # znormalizowana nazwa/skrót -> nazwa kanoniczna
+        self._trie = PrefixTrie()
+        self._grams = {}  # trigram -> {klucz}
+        for champion in champions:
+            self.add(*champion)
+
+    @classmethod
+    def from_file(cls, path):
+        """Wczytaj champions.json; brak pliku = pusty katalog (nazwy dowolne jak dotąd)"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Brak katalogu czempionów {path}")
+            return cls()
+        return cls(
+            Champion(item["name"], tuple(item.get("aliases", ())), item.get("emoji") or DEFAULT_EMOJI)
+            for item in data.get("champions", ())
+        )
+
+    def add(self, name, aliases=(), emoji=DEFAULT_EMOJI):
+        self.champions[name] = Champion(name, tuple(aliases), emoji)
+        for text in (name, *aliases):
+            self._index(normalize(text), name)
+
+    def learn(self, name):
+        """Dodaj nazwę spoza katalogu (np. zapisany timer), żeby działały dla niej podpowiedzi"""
+        if normalize(name) not in self._keys:
+            self._index(normalize(name), name)
+
+    def _index(self, key, name):
+        self._keys[key] = name
+        words = key.split(" ")
+        # Prefiksy całej nazwy i każdego kolejnego słowa ("lug" -> "Kowal Lugusa")
+        for i in range(len(words)):
+            self._trie.insert(" ".join(words[i:]), name)
+        for gram in trigrams(key):
+            self._grams.setdefault(gram, set()).add(key)
+
+    # ------------------- WYSZUKIWANIE -------------------
+    def resolve(self, text):
+        """Nazwa kanoniczna dla dokładnej nazwy lub skrótu (bez wielkości liter i ogonków)"""
+        return self._keys.get(normalize(text))
+
+    def similar(self, text, limit=5):
+        """[(podobieństwo, nazwa)] według wspólnych trigramów (współczynnik Dice'a)"""
+        key = normalize(text)
+        grams = trigrams(key)
+        common = Counter()
+        for gram in grams:
+            common.update(self._grams.get(gram, ()))
+        best = {}
+        # Ocena tylko kandydatów z największą liczbą wspólnych trigramów (Counter.most_common)
+        for candidate, shared in common.most_common(limit * 4):
+            score = 2 * shared / (len(grams) + len(candidate) + 1)
+            name = self._keys[candidate]
+            if score >= MIN_SCORE and score > best.get(name, 0):
+                best[name] = score
+        return heapq.nlargest(limit, ((score, name) for name, score in best.items()))
+
+    def suggest(self, text, limit=5):
+        """Podpowiedzi: najpierw dopasowania prefiksu, potem najbardziej podobne nazwy"""
+        names = self._trie.complete(normalize(text), limit)
+        if len(names) < limit:
+            names += [name for _, name in self.similar(text, limit) if name not in names]
+        return names[:limit]
+
+    def lookup(self, text):
+        """(nazwa, podpowiedzi) - nazwa None, gdy tekst wygląda na literówkę znanej nazwy"""
+        name = self.resolve(text)
+        if name is not None:
+            return name, []
+        similar = self.similar(text)
+        if similar and similar[0][0] >= TYPO_SCORE:
+            return None, [name for _, name in similar]
+        return " ".join(text.split()).title(), []
+
+    def emoji(self, name, default=DEFAULT_EMOJI):
+        champion = self.champions.get(name)
+        return champion.emoji if champion else default
+
+    @property
+    def emojis(self):
+        return {name: champion.emoji for name, champion in self.champions.items()}
@@ -0,0 +1,258 @@
+"""
+Resp Dispatcher
+Centralna kolejka wysyłki wiadomości do Discorda z priorytetami:
+pingi respów > odpowiedzi na komendy > długie listy. Pilnuje limitów per kanał
+(i globalnego) zanim Discord odpowie 429, scala pingi z tej samej minuty
+w jedną wiadomość i mierzy opóźnienie pingów względem planowanego czasu.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from datetime import datetime
+
+import discord
+
+from resp_metrics import DISCORD_API_CALLS, PING_LATENESS
+
+logger = logging.getLogger('resp_dispatcher')
+
+PRIORITY_PING = 0
+PRIORITY_REPLY = 1
+PRIORITY_BULK = 2
+
+MESSAGE_LIMIT = 2000  # limit znaków wiadomości Discorda
+
+
+class RateBucket:
+    """Wiadro tokenów: capacity wiadomości na period sekund"""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Ile sekund do dostępnego tokenu (0 = można wysyłać)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds):
+        """Discord odpowiedział 429 - wstrzymaj trasę"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class _Job:
+    __slots__ = ('priority', 'route', 'factory', 'future', 'enqueued', 'target_time', 'lines', 'length', 'key')
+
+    def __init__(self, priority, route, factory, target_time=None):
+        self.priority = priority
+        self.route = route
+        self.factory = factory
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+        self.target_time = target_time
+        self.lines = None
+        self.length = 0  # znaki scalonej wiadomości ("\n".join(lines))
+        self.key = None
+
+
+class Dispatcher:
+    """Kolejka priorytetowa wysyłek z limitami per trasa (kanał)"""
+
+    def __init__(self, concurrency=4, route_limit=(5, 5.0), global_limit=(50, 1.0), latency_samples=1000):
+        self.concurrency = concurrency
+        self.route_limit = route_limit
+        self._global = RateBucket(*global_limit)
+        self._buckets = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._inflight = set()
+        self._coalesce = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # Opóźnienie pingów (s) od planowanego terminu do potwierdzenia wysłania
+        self.ping_latency = deque(maxlen=latency_samples)
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "rate_limited": 0, "coalesced": 0}
+
+    # ------------------- API -------------------
+    @property
+    def global_bucket(self):
+        """Globalny limit wysyłek bota - współdzielony z innymi nadawcami (np. DM subskrybentów)"""
+        return self._global
+
+    def submit(self, route, factory, priority=PRIORITY_REPLY, target_time=None):
+        """Zleć wywołanie factory() (korutyna wysyłająca) na trasie; zwraca future z wynikiem"""
+        job = _Job(priority, route, factory, target_time)
+        self._push(job)
+        return job.future
+
+    def send(self, target, content=None, priority=PRIORITY_REPLY, **kwargs):
+        """Wyślij wiadomość przez kolejkę (target: kanał albo ctx)"""
+        return self.submit(route_of(target), lambda: target.send(content, **kwargs), priority)
+
+    def ping(self, channel, line, target_time):
+        """Ping respu - pingi dla tego samego kanału i minuty idą jedną wiadomością
+        (do MESSAGE_LIMIT znaków - dłuższa lista idzie kolejnymi wiadomościami)"""
+        key = (channel.id, target_time.replace(second=0, microsecond=0))
+        job = self._coalesce.get(key)
+        if job is not None and job.lines is not None and job.length + 1 + len(line) <= MESSAGE_LIMIT:
+            job.lines.append(line)
+            job.length += 1 + len(line)
+            self._count("coalesced")
+            return job.future
+        job = _Job(PRIORITY_PING, channel.id, None, target_time)
+        job.lines = [line]
+        job.length = len(line)
+        job.key = key
+        job.factory = lambda: channel.send("\n".join(job.lines))
+        job.future.add_done_callback(_log_failure)
+        self._coalesce[key] = job
+        self._push(job)
+        return job.future
+
+    def latency_summary(self):
+        """(p50, p95, max) opóźnienia pingów w sekundach albo None"""
+        if not self.ping_latency:
+            return None
+        samples = sorted(self.ping_latency)
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return pick(0.5), pick(0.95), samples[-1]
+
+    def pending(self):
+        return len(self._heap)
+
+    # ------------------- PĘTLA -------------------
+    def start(self):
+        if not self.is_running():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    async def run(self):
+        """Wybiera najważniejsze zadanie, którego trasa ma wolny limit, i wysyła je w tle"""
+        while True:
+            self._wakeup.clear()
+            job, wait = self._next_ready()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            asyncio.get_running_loop().create_task(self._deliver(job))
+
+    # ------------------- WEWNĘTRZNE -------------------
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+        self._count("queued")
+        self._wakeup.set()
+
+    def _count(self, result):
+        self.stats[result] += 1
+        DISCORD_API_CALLS.inc(result=result)
+
+    def _bucket(self, route):
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = RateBucket(*self.route_limit)
+        return bucket
+
+    def _next_ready(self):
+        """Zdejmij pierwsze zadanie gotowe do wysłania; inaczej (None, czas oczekiwania)"""
+        if len(self._inflight) >= self.concurrency:
+            return None, None
+        now = time.monotonic()
+        global_wait = self._global.wait_time(now)
+        if global_wait:
+            return None, global_wait
+        skipped, wait, ready = [], None, None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            route = entry[2].route
+            if route in self._inflight:
+                skipped.append(entry)  # kolejność w obrębie kanału
+                continue
+            route_wait = self._bucket(route).wait_time(now)
+            if route_wait:
+                skipped.append(entry)
+                wait = route_wait if wait is None else min(wait, route_wait)
+                continue
+            ready = entry[2]
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if ready is not None:
+            self._bucket(ready.route).take(now)
+            self._global.take(now)
+            self._inflight.add(ready.route)
+        return ready, wait
+
+    async def _deliver(self, job):
+        if job.key is not None and self._coalesce.get(job.key) is job:
+            # Od teraz kolejne pingi z tej minuty idą w nowej wiadomości
+            del self._coalesce[job.key]
+        try:
+            result = await job.factory()
+        except discord.HTTPException as e:
+            if e.status == 429:
+                retry_after = getattr(e, 'retry_after', None) or 1.0
+                self._bucket(job.route).block(retry_after)
+                self._count("rate_limited")
+                self._inflight.discard(job.route)
+                heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+                self._wakeup.set()
+                return
+            self._count("failed")
+            if not job.future.done():
+                job.future.set_exception(e)
+        except Exception as e:
+            self._count("failed")
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self._count("sent")
+            if job.target_time is not None:
+                latency = (datetime.utcnow() - job.target_time).total_seconds()
+                self.ping_latency.append(latency)
+                PING_LATENESS.observe(max(0.0, latency))
+                logger.info(f"⏱️ Ping wysłany {latency:.2f}s po planowanym czasie")
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._inflight.discard(job.route)
+            self._wakeup.set()
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"❌ Nie udało się wysłać pingu: {future.exception()}")
+
+
+def route_of(target):
+    """Klucz limitu: ID kanału (dla ctx - kanał komendy)"""
+    channel = getattr(target, 'channel', None)
+    return channel.id if channel is not None else target.id
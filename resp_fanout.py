@@ -0,0 +1,171 @@
+"""
+Resp Fan-out
+Prywatne wiadomości do subskrybentów respu. Pula kilku workerów z własnym limitem
+(wiadro tokenów poniżej globalnego limitu Discorda) działa obok kolejki wysyłek:
+ping na kanale i odpowiedzi na komendy nigdy nie czekają za tysiącami DM.
+Każda wysyłka i otwarcie kanału DM zużywa też token globalnego limitu kolejki wysyłek.
+Użytkownicy z zamkniętymi DM dostają na kanale jedną zbiorczą wzmiankę.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+
+import discord
+
+from resp_dispatcher import RateBucket
+from resp_metrics import DM_MESSAGES
+
+logger = logging.getLogger('resp_fanout')
+
+
+class _Batch:
+    """Jedno powiadomienie: treść, odbiorcy do wysłania i ci, do których DM nie doszedł"""
+
+    __slots__ = ('channel', 'content', 'users', 'left', 'failed')
+
+    def __init__(self, channel, content, users):
+        self.channel = channel
+        self.content = content
+        self.users = deque(users)
+        self.left = len(self.users)  # wysyłki jeszcze nierozstrzygnięte (także w toku)
+        self.failed = []
+
+
+class FanOut:
+    """Kolejka powiadomień subskrybentów obsługiwana przez concurrency workerów"""
+
+    def __init__(self, open_dm, fallback=None, concurrency=8, rate=(20, 1.0), max_pending=50000, max_channels=10000,
+                 global_bucket=None):
+        # open_dm(user_id) - korutyna zwracająca kanał DM; fallback(kanał, treść, [user_id]) - wzmianka na kanale
+        # global_bucket - RateBucket wspólny z kolejką wysyłek (Dispatcher.global_bucket)
+        self.open_dm = open_dm
+        self.fallback = fallback
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._bucket = RateBucket(*rate)
+        self._global = global_bucket
+        self._batches = deque()
+        self._pending = 0
+        self.max_channels = max_channels
+        self._channels = OrderedDict()  # user_id -> kanał DM (LRU - bez ponownego tworzenia przy każdym respie)
+        self._wakeup = asyncio.Event()
+        self._workers = []
+
+    def pending(self):
+        return self._pending
+
+    def notify(self, channel, content, user_ids):
+        """Zleć DM dla user_ids - O(1) dla wołającego, wysyłka w tle; zwraca liczbę przyjętych"""
+        room = self.max_pending - self._pending
+        if room <= 0 or not user_ids:
+            if user_ids:
+                logger.warning(f"⚠️ Kolejka DM pełna - pominięto {len(user_ids)} powiadomień")
+                DM_MESSAGES.inc(len(user_ids), result="dropped")
+            return 0
+        users = list(user_ids)
+        if len(users) > room:
+            logger.warning(f"⚠️ Kolejka DM pełna - pominięto {len(users) - room} powiadomień")
+            DM_MESSAGES.inc(len(users) - room, result="dropped")
+            users = users[:room]
+        self._batches.append(_Batch(channel, content, users))
+        self._pending += len(users)
+        self._wakeup.set()
+        return len(users)
+
+    # ------------------- PĘTLA -------------------
+    def start(self):
+        if not self.is_running():
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def stop(self):
+        """Zatrzymaj workery i porzuć niewysłane powiadomienia (utrata przywództwa - DM wyśle lider)"""
+        self._batches.clear()
+        self._pending = 0
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def is_running(self):
+        return any(not worker.done() for worker in self._workers)
+
+    def reset(self):
+        """Zapomnij kanały DM (nowy klient po ponownym połączeniu - stare należą do zamkniętego)"""
+        self._channels.clear()
+
+    async def _worker(self):
+        while True:
+            batch, user_id = await self._next()
+            await self._take(self._bucket)
+            try:
+                await self._send(batch, user_id)
+            except Exception:
+                logger.exception(f"❌ Błąd wysyłki DM do {user_id}")
+                self._channels.pop(user_id, None)
+                self._settle(batch, user_id, ok=False)
+
+    async def _take(self, *buckets):
+        """Token z podanych wiader i z globalnego limitu - sprawdzenie i pobranie bez await pomiędzy"""
+        if self._global is not None:
+            buckets += (self._global,)
+        while True:
+            now = time.monotonic()
+            wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        for bucket in buckets:
+            bucket.take(now)
+
+    async def _next(self):
+        while True:
+            while self._batches:
+                batch = self._batches[0]
+                if batch.users:
+                    self._pending -= 1
+                    return batch, batch.users.popleft()
+                self._batches.popleft()  # reszta wysyłek tej partii jest już w toku
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _send(self, batch, user_id):
+        try:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                await self._take()  # utworzenie kanału DM to osobne żądanie do API
+                channel = await self.open_dm(user_id)
+                self._channels[user_id] = channel
+                if len(self._channels) > self.max_channels:
+                    self._channels.popitem(last=False)
+            else:
+                self._channels.move_to_end(user_id)
+            await channel.send(batch.content)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                # Limit Discorda - wstrzymaj wszystkie workery i spróbuj tego samego odbiorcy ponownie
+                self._bucket.block(getattr(e, 'retry_after', None) or 1.0)
+                DM_MESSAGES.inc(result="rate_limited")
+                batch.users.appendleft(user_id)
+                self._pending += 1
+                if batch not in self._batches:
+                    self._batches.appendleft(batch)
+                self._wakeup.set()
+                return
+            # 403 - zamknięte DM albo brak wspólnego serwera
+            self._channels.pop(user_id, None)
+            self._settle(batch, user_id, ok=False)
+            return
+        self._settle(batch, user_id, ok=True)
+
+    def _settle(self, batch, user_id, ok):
+        DM_MESSAGES.inc(result="sent" if ok else "failed")
+        if not ok:
+            batch.failed.append(user_id)
+        batch.left -= 1
+        if batch.left == 0 and batch.failed and self.fallback is not None and batch.channel is not None:
+            try:
+                self.fallback(batch.channel, batch.content, batch.failed)
+            except Exception:
+                logger.exception("❌ Błąd zbiorczej wzmianki subskrybentów")
@@ -0,0 +1,74 @@
+"""
+Resp Heartbeat
+Heartbeat bota dla nadzorcy (monitor_discord_bot.py): co kilka sekund datagram UDP
+wysyłany z pętli zdarzeń, ze stanem bramki Discorda i opóźnieniem pętli. Brak
+datagramów oznacza zawieszoną pętlę, nawet jeśli proces nadal istnieje.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+
+logger = logging.getLogger('resp_heartbeat')
+
+ENV_ADDR = "RESP_HEARTBEAT_ADDR"  # "host:port" nadzorcy - ustawiane przez monitor
+INTERVAL = 2.0
+
+
+def parse_addr(value):
+    host, port = value.rsplit(":", 1)
+    return host, int(port)
+
+
+class HeartbeatSender:
+    """Zadanie w pętli bota wysyłające {pid, seq, loop_lag, **status()} co interval sekund"""
+
+    def __init__(self, addr, status, interval=INTERVAL):
+        self.addr = addr
+        self.status = status
+        self.interval = interval
+        self._task = None
+
+    def _payload(self, seq, lag):
+        payload = {"pid": os.getpid(), "seq": seq, "loop_lag": round(lag, 3)}
+        try:
+            payload.update(self.status())
+        except Exception as e:
+            payload["status_error"] = str(e)
+        return json.dumps(payload).encode("utf-8")
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        seq, lag = 0, 0.0
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            while True:
+                seq += 1
+                try:
+                    sock.sendto(self._payload(seq, lag), self.addr)
+                except OSError:
+                    pass  # nadzorca chwilowo niedostępny - następny heartbeat za chwilę
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                # O ile później niż planowo pętla nas obudziła (blokujący kod w handlerach)
+                lag = max(0.0, loop.time() - expected)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+            logger.info(f"💓 Heartbeat do nadzorcy {self.addr[0]}:{self.addr[1]} co {self.interval}s")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def heartbeat_from_env(status):
+    """HeartbeatSender jeśli bot działa pod nadzorcą (RESP_HEARTBEAT_ADDR), inaczej None"""
+    addr = os.getenv(ENV_ADDR)
+    if not addr:
+        return None
+    return HeartbeatSender(parse_addr(addr), status)
@@ -0,0 +1,167 @@
+"""
+Resp History
+Historia zaobserwowanych respów (każde !set_resp / !import_resp) i kalibracja czasów respu.
+Zapis tylko dopisuje wiersze do tabeli resp_history (i przycina najstarsze ponad limit);
+w pamięci każdy czempion to kolumna array('q') sekund epoki, więc odstępy, rozkład i ostatnie
+N respów to jeden przebieg po spakowanej tablicy - O(n), bez list obiektów datetime.
+"""
+
+import bisect
+import logging
+import math
+from array import array
+from collections import namedtuple
+from datetime import timedelta
+
+from resp_store import connect, dt_to_epoch, epoch_to_dt
+
+logger = logging.getLogger('resp_history')
+
+# Tabela resp_history (z indeksem po czempionie) powstaje w resp_store.connect
+_INSERT = "INSERT INTO resp_history (guild_id, channel_id, champion, spawn) VALUES (?, ?, ?, ?)"
+_TRIM = "DELETE FROM resp_history WHERE guild_id = ? AND channel_id = ? AND champion = ? AND spawn < ?"
+
+BUCKET = 60  # rozdzielczość rozkładu odstępów (s)
+MAX_DRIFT = 0.25  # odstęp dalej niż 25% od wielokrotności czasu respu to pomyłka wpisu, nie resp
+
+# Rozkład odstępów czempiona (sekundy); k-krotne odstępy (pominięte respy) są dzielone przez k
+IntervalStats = namedtuple('IntervalStats', 'count median p10 p90 mean stdev')
+# Propozycja kalibracji: obecny i proponowany czas respu (timedelta) + rozkład, z którego wynika
+Calibration = namedtuple('Calibration', 'champion current proposed stats')
+
+
+class SpawnHistory:
+    """Kolumny {czempion: {przestrzeń: array('q')}} rosnących momentów respu"""
+
+    def __init__(self, store, correction=timedelta(minutes=30), keep=1000):
+        self.store = store
+        # Drugi wpis tego samego czempiona w tym czasie to poprawka poprzedniego, nie nowy resp
+        self.correction = int(correction.total_seconds())
+        self.keep = keep  # ostatnie keep respów czempiona w przestrzeni - starsze są usuwane
+        self._columns = {}
+
+    def __len__(self):
+        return sum(len(column) for spaces in list(self._columns.values()) for column in spaces.values())
+
+    def load(self, path):
+        """Wczytaj historię z bazy (blokujące - przy starcie i przejęciu przywództwa)"""
+        conn = connect(path)
+        try:
+            rows = conn.execute(
+                "SELECT guild_id, channel_id, champion, spawn FROM resp_history ORDER BY rowid"
+            ).fetchall()
+        finally:
+            conn.close()
+        self._columns = {}
+        trimmed = {}
+        for guild_id, channel_id, champion, spawn in rows:
+            cutoff = self._add((guild_id, channel_id), champion, spawn)
+            if cutoff is not None:
+                trimmed[(guild_id, channel_id, champion)] = cutoff
+        if trimmed:
+            # Baza sprzed limitu (albo z większym keep) - przytnij ją do tego, co w pamięci
+            self.store.append(_TRIM, [(*key, cutoff) for key, cutoff in trimmed.items()])
+        logger.info(f"📈 Historia respów: {len(rows)} wpisów, {len(self._columns)} czempionów")
+
+    def record(self, ns, champion, when):
+        """Zaobserwowany resp (naiwny UTC) - dopisanie do kolumny i do bazy"""
+        self.record_many(ns, [(champion, when)])
+
+    def record_many(self, ns, items):
+        rows, trimmed = [], {}
+        for champion, when in items:
+            spawn = int(dt_to_epoch(when))
+            cutoff = self._add(ns, champion, spawn)
+            if cutoff is not None:
+                trimmed[champion] = cutoff
+            rows.append((*ns, champion, spawn))
+        if rows:
+            self.store.append(_INSERT, rows)
+        if trimmed:
+            self.store.append(_TRIM, [(*ns, champion, cutoff) for champion, cutoff in trimmed.items()])
+
+    def _add(self, ns, champion, spawn):
+        """Dopisz resp do kolumny; zwraca najstarszy zachowany moment, gdy kolumna została przycięta"""
+        spaces = self._columns.get(champion)
+        if spaces is None:
+            spaces = self._columns[champion] = {}
+        column = spaces.get(ns)
+        if column is None:
+            column = spaces[ns] = array('q')
+        if column and abs(spawn - column[-1]) < self.correction:
+            column[-1] = spawn  # poprawka ostatniego wpisu
+            return None
+        if column and spawn < column[-1]:
+            column.insert(bisect.bisect_right(column, spawn), spawn)  # wpis wstecz (np. import)
+        else:
+            column.append(spawn)
+        if len(column) <= self.keep:
+            return None
+        del column[:len(column) - self.keep]
+        return column[0]
+
+    # ------------------- ZAPYTANIA -------------------
+    def champions(self):
+        return sorted(self._columns)
+
+    def last(self, ns, champion, count):
+        """Ostatnie count respów czempiona (naiwny UTC), od najnowszego"""
+        column = self._columns.get(champion, {}).get(ns, ())
+        return [epoch_to_dt(spawn) for spawn in reversed(column[-count:])] if count > 0 else []
+
+    def gaps(self, champion, expected, ns=None):
+        """array('d') odstępów między kolejnymi respami (wszystkie przestrzenie albo jedna).
+        Odstęp bliski k * expected to k respów (pozostałe niezapisane) - liczony jako odstęp / k"""
+        expected = expected.total_seconds()
+        result = array('d')
+        for column_ns, column in list(self._columns.get(champion, {}).items()):
+            if ns is not None and column_ns != ns:
+                continue
+            for i in range(1, len(column)):
+                gap = column[i] - column[i - 1]
+                k = max(1, round(gap / expected))
+                if abs(gap - k * expected) <= MAX_DRIFT * expected:
+                    result.append(gap / k)
+        return result
+
+    def distribution(self, champion, expected, ns=None):
+        """IntervalStats odstępów albo None - średnia i odchylenie jednym przebiegiem,
+        kwantyle z histogramu minutowego (bez sortowania)"""
+        gaps = self.gaps(champion, expected, ns)
+        count = len(gaps)
+        if not count:
+            return None
+        low, high = min(gaps), max(gaps)
+        counts = array('l', [0]) * (int((high - low) // BUCKET) + 1)
+        total = squares = 0.0
+        for gap in gaps:
+            counts[int((gap - low) // BUCKET)] += 1
+            total += gap
+            squares += gap * gap
+        mean = total / count
+        stdev = math.sqrt(max(0.0, squares / count - mean * mean))
+
+        def quantile(q):
+            rank, seen = q * (count - 1), 0
+            for i, bucket in enumerate(counts):
+                seen += bucket
+                if seen > rank:
+                    return min(high, low + (i + 0.5) * BUCKET)
+            return high
+
+        return IntervalStats(count, quantile(0.5), quantile(0.1), quantile(0.9), mean, stdev)
+
+    def calibrate(self, rotations, min_samples=5):
+        """[Calibration] dla czempionów spoza rotacji z co najmniej min_samples odstępami.
+        Proponowany czas to mediana zaokrąglona do minuty (odporna na pojedyncze spóźnione wpisy)"""
+        found = []
+        for champion in self.champions():
+            if champion in rotations:
+                continue  # czasy członków rotacji pochodzą z definicji rotacji
+            current = rotations.interval(champion)
+            stats = self.distribution(champion, current)
+            if stats is None or stats.count < min_samples:
+                continue
+            proposed = timedelta(minutes=round(stats.median / 60))
+            found.append(Calibration(champion, current, proposed, stats))
+        return found
@@ -0,0 +1,150 @@
+"""
+Resp HTTP
+Lekki serwer HTTP (aiohttp - i tak instalowany z discord.py) działający w tej samej
+pętli zdarzeń co bot. Zastępuje wątek Flaska i osobny proces gunicorn: handlery
+czytają stan bota bezpośrednio, bez blokad i przełączania wątków.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from aiohttp import web
+
+import resp_calendar
+import resp_metrics
+import resp_snapshot
+import resp_timetable
+
+logger = logging.getLogger('resp_http')
+
+HOME_PAGE = """
+    <h1>Bot do trackowania respów czempionów działa!</h1>
+    <h2>Dostępne komendy Discord:</h2>
+    <ul>
+        <li><code>!resp</code> - pokazuje kiedy respią się czempioni</li>
+        <li><code>!set_resp [nazwa_czempiona]</code> - ustawia czas respu na teraz</li>
+        <li><code>!del_resp [nazwa_czempiona]</code> - usuwa czempiona z listy</li>
+        <li><code>!pomoc</code> - pomoc</li>
+    </ul>
+    <p>Bot automatycznie pinguje @everyone 30 minut przed respem czempiona!</p>
+    """
+
+COMMANDS = ["!resp", "!set_resp", "!del_resp", "!pomoc"]
+
+
+async def _snapshot_response(request, snapshot, body):
+    headers = resp_snapshot.cache_headers(snapshot)
+    if resp_snapshot.not_modified(snapshot, request.headers.get('If-None-Match')):
+        return web.Response(status=304, headers=headers)
+    # body() składa JSON przy pierwszym odczycie wersji - w wątku, żeby nie wstrzymywać pingów
+    body = await asyncio.get_running_loop().run_in_executor(None, body)
+    return web.Response(body=body, content_type='application/json', charset='utf-8', headers=headers)
+
+
+def create_app(publisher, view):
+    """Aplikacja aiohttp z tymi samymi ścieżkami co flask_app"""
+    routes = web.RouteTableDef()
+
+    @routes.get('/')
+    async def home(request):
+        return web.Response(text=HOME_PAGE, content_type='text/html')
+
+    @routes.get('/status')
+    async def status(request):
+        upcoming = [
+            {
+                "guild_id": guild_id,
+                "channel_id": channel_id,
+                "champion": entry.champion,
+                "next_resp": entry.next_local,
+            }
+            for (guild_id, channel_id), snapshot in view.all().items()
+            for entry in snapshot.entries
+        ]
+        health = publisher.health()
+        return web.json_response({
+            "http": "running",
+            "discord_bot": health.get("discord_bot", "unknown"),
+            "upcoming": upcoming,
+            "commands": COMMANDS,
+        })
+
+    @routes.get('/api/timers')
+    async def api_timers(request):
+        snapshot = publisher.current
+        return await _snapshot_response(request, snapshot, lambda: snapshot.timers_body)
+
+    @routes.get('/api/next')
+    async def api_next(request):
+        snapshot = publisher.current
+        return await _snapshot_response(request, snapshot, lambda: snapshot.next_body)
+
+    @routes.get(r'/api/guilds/{guild_id:\d+}/timers')
+    async def api_guild_timers(request):
+        snapshot = publisher.current
+        guild_id = int(request.match_info['guild_id'])
+        return await _snapshot_response(request, snapshot, lambda: snapshot.guild_body(guild_id))
+
+    @routes.get(r'/api/guilds/{guild_id:\d+}/between')
+    async def api_guild_between(request):
+        try:
+            start, end = resp_timetable.parse_range(
+                request.query['from'], request.query['to'], datetime.utcnow()
+            )
+        except (KeyError, ValueError):
+            raise web.HTTPBadRequest(text=f"Podaj ?from=...&to=... (HH:MM czasu polskiego albo ISO 8601, najwyżej {resp_timetable.MAX_RANGE_DAYS} dni)")
+        windows = view.between_guild(int(request.match_info['guild_id']), start, end)
+        return web.json_response(resp_snapshot.windows_body(windows, start, end))
+
+    @routes.get(r'/api/guilds/{guild_id:\d+}/calendar.ics')
+    async def api_guild_calendar(request):
+        guild_id = int(request.match_info['guild_id'])
+        champion = request.query.get('champion')
+        try:
+            days = resp_calendar.parse_days(request.query.get('days'))
+        except ValueError:
+            raise web.HTTPBadRequest(text="?days= musi być liczbą dni")
+        etag, modified, entries = resp_calendar.feed(view, guild_id, champion, days)
+        headers = {'ETag': etag, 'Last-Modified': resp_calendar.http_date(modified), 'Cache-Control': 'no-cache'}
+        if resp_calendar.not_modified(etag, modified, request.headers.get('If-None-Match'),
+                                      request.headers.get('If-Modified-Since')):
+            return web.Response(status=304, headers=headers)
+
+        # Strumień: kolejne kawałki .ics idą do klienta w trakcie generowania
+        response = web.StreamResponse(headers=headers)
+        response.content_type = resp_calendar.CONTENT_TYPE
+        response.charset = 'utf-8'
+        await response.prepare(request)
+        for chunk in resp_calendar.ics_chunks(entries, view.rotations, guild_id, modified, champion, days):
+            await response.write(chunk.encode('utf-8'))
+        await response.write_eof()
+        return response
+
+    @routes.get('/api/health')
+    async def api_health(request):
+        return web.json_response({
+            "http": "running",
+            "snapshot_version": publisher.current.version,
+            **publisher.health(),
+        })
+
+    @routes.get('/metrics')
+    async def metrics(request):
+        return web.Response(
+            body=resp_metrics.REGISTRY.render().encode('utf-8'),
+            headers={'Content-Type': resp_metrics.CONTENT_TYPE},
+        )
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+async def start_http(publisher, view, host="0.0.0.0", port=5000):
+    """Uruchom serwer w bieżącej pętli; zwraca runner (await runner.cleanup() przy zamykaniu)"""
+    runner = web.AppRunner(create_app(publisher, view), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"🌐 Serwer HTTP nasłuchuje na {host}:{port} (pętla bota)")
+    return runner
@@ -0,0 +1,184 @@
+"""
+Resp Lease
+Wybór lidera między instancjami bota dzielącymi plik SQLite (bez zewnętrznych usług).
+Lider trzyma dzierżawę z terminem ważności i odnawia ją co ttl/3; tylko on łączy się
+z Discordem i pinguje. Instancja zapasowa śledzi dziennik zmian lidera (RespStore.tail)
+i przejmuje dzierżawę, gdy ta wygaśnie - po kilku sekundach od śmierci lidera.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+from resp_store import connect
+
+logger = logging.getLogger('resp_lease')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resp_lease (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    term INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class LeaderLease:
+    """Dzierżawa w tabeli resp_lease; term rośnie przy każdym przejęciu (token odgradzający)"""
+
+    def __init__(self, path, name="leader", ttl=10.0, holder=None):
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.term = 0
+        self._valid_until = 0.0  # time.monotonic() - do kiedy ta instancja na pewno jest liderem
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.isolation_level = None  # transakcje ręcznie (BEGIN IMMEDIATE)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def try_acquire(self):
+        """Przejmij albo odnów dzierżawę - blokujące (wołać w wątku); zwraca czy jesteśmy liderem"""
+        started = time.monotonic()
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT holder, term, expires FROM resp_lease WHERE name = ?", (self.name,)
+            ).fetchone()
+            if row is not None and row[0] != self.holder and row[2] > now:
+                conn.execute("ROLLBACK")
+                self._valid_until = 0.0
+                return False
+            term = row[1] if row is not None and row[0] == self.holder else (row[1] + 1 if row else 1)
+            conn.execute(
+                "INSERT OR REPLACE INTO resp_lease (name, holder, term, expires) VALUES (?, ?, ?, ?)",
+                (self.name, self.holder, term, now + self.ttl),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        # Liczone od początku próby i zegarem monotonicznym - wygasamy u siebie wcześniej niż u innych
+        self._valid_until = started + self.ttl
+        self.term = term
+        return True
+
+    def is_leader(self):
+        return time.monotonic() < self._valid_until
+
+    def release(self):
+        """Oddaj dzierżawę (zamykanie) - zapasowa instancja przejmie ją od razu"""
+        self._valid_until = 0.0
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("DELETE FROM resp_lease WHERE name = ? AND holder = ?", (self.name, self.holder))
+        except sqlite3.Error:
+            logger.exception("❌ Nie udało się oddać dzierżawy lidera")
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+class LeaderElector:
+    """Pętla dzierżawy: lider odnawia co ttl/3, zapasowa próbuje przejąć co poll i śledzi dziennik"""
+
+    def __init__(self, lease, follow=None, on_promote=None, on_demote=None, poll=1.0):
+        self.lease = lease
+        # follow() - korutyna: wczytaj zmiany lidera (instancja zapasowa i tuż przed przejęciem)
+        self.follow = follow
+        self.on_promote = on_promote
+        self.on_demote = on_demote
+        self.poll = poll
+        self.promoted = asyncio.Event()
+        self.demoted = asyncio.Event()
+        self._task = None
+
+    def is_leader(self):
+        return self.promoted.is_set() and self.lease.is_leader()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                held = await loop.run_in_executor(None, self.lease.try_acquire)
+            except sqlite3.Error:
+                logger.exception("❌ Błąd odnawiania dzierżawy lidera")
+                held = False
+            if held and not self.promoted.is_set():
+                await self._follow()  # ostatnie zmiany poprzedniego lidera przed przejęciem
+                logger.info(f"👑 Instancja {self.lease.holder} jest liderem (kadencja {self.lease.term})")
+                self.demoted.clear()
+                self.promoted.set()
+                await self._call(self.on_promote)
+            elif not held and self.promoted.is_set():
+                logger.warning(f"⚠️ Instancja {self.lease.holder} straciła dzierżawę lidera - przechodzi w tryb zapasowy")
+                self.promoted.clear()
+                self.demoted.set()
+                await self._call(self.on_demote)
+            elif not held:
+                await self._follow()
+            await asyncio.sleep(self.lease.ttl / 3 if held else self.poll)
+
+    async def _follow(self):
+        if self.follow is None:
+            return
+        try:
+            await self.follow()
+        except Exception:
+            logger.exception("❌ Błąd śledzenia dziennika lidera")
+
+    @staticmethod
+    async def _call(callback):
+        if callback is None:
+            return
+        try:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception:
+            logger.exception("❌ Błąd obsługi zmiany lidera")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Zatrzymaj pętlę i oddaj dzierżawę"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        was_leader = self.promoted.is_set()
+        self.promoted.clear()
+        if was_leader:
+            await asyncio.get_running_loop().run_in_executor(None, self.lease.release)
+
+    async def serve(self, start, stop):
+        """Czekaj na przywództwo, uruchom start(); utrata dzierżawy -> stop(). Zwraca False po utracie"""
+        await self.promoted.wait()
+        task = asyncio.ensure_future(start())
+        lost = asyncio.ensure_future(self.demoted.wait())
+        done, _ = await asyncio.wait({task, lost}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            lost.cancel()
+            task.result()
+            return True
+        await stop()
+        try:
+            await task
+        except Exception:
+            logger.exception("❌ Błąd zamykania po utracie przywództwa")
+        return False
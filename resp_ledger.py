@@ -0,0 +1,93 @@
+"""
+Resp Ledger
+Rejestr dostarczenia pingów: każdy (przestrzeń, czempion, moment respu) jest
+pending -> sent albo missed. Po zawieszeniu pętli lub restarcie zaległe pingi
+są nadrabiane w oknie łaski, a ten sam resp nigdy nie jest pingowany dwa razy.
+"""
+
+import logging
+from collections import deque
+
+from resp_store import dt_to_epoch
+
+logger = logging.getLogger('resp_ledger')
+
+PENDING = "pending"
+SENT = "sent"
+MISSED = "missed"
+
+
+class PingLedger:
+    """Statusy pingów {(guild_id, channel_id, czempion, resp_epoch): status}"""
+
+    def __init__(self, store, grace, retention):
+        self.store = store
+        self.grace = grace
+        self.retention = retention.total_seconds()
+        self.entries = {}
+        self._order = deque()  # klucze w kolejności dodania - do przycinania starych wpisów
+
+    def restore(self, saved, take_over=True):
+        """Wczytaj rejestr z RespStore.load()['ledger']; take_over=False - instancja zapasowa
+        (wysyłki w toku należą do działającego lidera, rozstrzyga je dopiero take_over())"""
+        for key, status in sorted(saved.items(), key=lambda item: item[0][3]):
+            if status == PENDING and take_over:
+                # Wysyłka przerwana restartem - nie wiemy czy doszła, więc nie powtarzamy
+                status = MISSED
+                self.store.put("ledger", key, status)
+                logger.warning(f"⚠️ Ping {key[2]} ({key[3]}) przerwany restartem - oznaczony jako pominięty")
+            self.entries[key] = status
+            self._order.append(key)
+
+    def replicate(self, key, status):
+        """Wpis lidera z RespStore.tail() (instancja zapasowa) - bez ponownego zapisu"""
+        if status is None:
+            self.entries.pop(key, None)
+            return
+        if key not in self.entries:
+            self._order.append(key)
+        self.entries[key] = status
+
+    def take_over(self):
+        """Przejęcie po poprzednim liderze: jego niedokończone wysyłki traktujemy jak restart"""
+        for key, status in list(self.entries.items()):
+            if status == PENDING:
+                self._record(key, MISSED)
+                logger.warning(f"⚠️ Ping {key[2]} ({key[3]}) przerwany zmianą lidera - oznaczony jako pominięty")
+
+    @staticmethod
+    def key(ns, champion, spawn_time):
+        return (*ns, champion, int(dt_to_epoch(spawn_time)))
+
+    def claim(self, ns, champion, spawn_time, deadline, now):
+        """Czy wysłać ping teraz - O(1); rezerwuje wysyłkę (pending) albo oznacza missed"""
+        key = self.key(ns, champion, spawn_time)
+        if key in self.entries:
+            return False
+        if now - deadline > self.grace:
+            self._record(key, MISSED)
+            logger.warning(f"⚠️ Ping {champion} spóźniony o {now - deadline} - poza oknem łaski, pominięty")
+            return False
+        self._record(key, PENDING)
+        self._prune(dt_to_epoch(now))
+        return True
+
+    def delivered(self, ns, champion, spawn_time, ok):
+        """Wynik wysyłki pingu zarezerwowanego przez claim()"""
+        self._record(self.key(ns, champion, spawn_time), SENT if ok else MISSED)
+
+    def status(self, ns, champion, spawn_time):
+        return self.entries.get(self.key(ns, champion, spawn_time))
+
+    # ------------------- WEWNĘTRZNE -------------------
+    def _record(self, key, status):
+        if key not in self.entries:
+            self._order.append(key)
+        self.entries[key] = status
+        self.store.put("ledger", key, status)
+
+    def _prune(self, now_epoch):
+        while self._order and now_epoch - self._order[0][3] > self.retention:
+            key = self._order.popleft()
+            if self.entries.pop(key, None) is not None:
+                self.store.delete("ledger", key)
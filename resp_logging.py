@@ -0,0 +1,136 @@
+"""
+Resp Logging
+Logowanie bez blokowania pętli zdarzeń: handlery wrzucają wpisy do kolejki, a zapis
+na dysk/stdout robi wątek QueueListener. Rotacja pliku po rozmiarze albo czasie,
+opcjonalny format JSON i limit dla hałaśliwych logów (np. każda komenda w on_message).
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+QUEUE_SIZE = 10000
+
+_traceback_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Jeden obiekt JSON na linię: ts, level, logger, message (+ exc)"""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, który przy pełnej kolejce gubi wpis zamiast czekać (lub sypać błędami)"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Tylko scalenie argumentów - formatowanie (i JSON) robi wątek zapisu
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """Najwyżej limit wpisów na okres; pominięte są zliczane i raportowane w następnym wpisie"""
+
+    def __init__(self, limit, period=60.0, clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self.clock = clock
+        self._window_start = clock()
+        self._count = 0
+        self._suppressed = 0
+
+    def filter(self, record):
+        now = self.clock()
+        if now - self._window_start >= self.period:
+            self._window_start = now
+            self._count = 0
+        if self._count >= self.limit:
+            self._suppressed += 1
+            return False
+        self._count += 1
+        if self._suppressed:
+            record.msg = f"{record.msg} (+{self._suppressed} pominiętych wpisów)"
+            self._suppressed = 0
+        return True
+
+
+def _file_handler(path):
+    when = os.getenv("RESP_LOG_ROTATE_WHEN")  # np. "midnight", "H" - rotacja czasowa zamiast rozmiaru
+    backups = int(os.getenv("RESP_LOG_BACKUPS", "5"))
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backups, encoding='utf-8')
+    max_bytes = int(os.getenv("RESP_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+    return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+
+
+def setup_logging(path=None, level=logging.INFO, json_format=None):
+    """Skonfiguruj root logger przez kolejkę; zwraca uruchomiony QueueListener"""
+    if json_format is None:
+        json_format = os.getenv("RESP_LOG_JSON", "0") == "1"
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(_file_handler(path))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_logging, listener)
+    return listener
+
+
+def stop_logging(listener):
+    """Dopisz zaległe wpisy i zatrzymaj wątek zapisu (bezpieczne przy wielokrotnym wywołaniu)"""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def rate_limited(name, per_minute):
+    """Logger z limitem wpisów na minutę (dla logów każdej wiadomości)"""
+    limited = logging.getLogger(name)
+    if not any(isinstance(f, RateLimitFilter) for f in limited.filters):
+        limited.addFilter(RateLimitFilter(per_minute))
+    return limited
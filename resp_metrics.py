@@ -0,0 +1,174 @@
+"""
+Resp Metrics
+Minimalne metryki w formacie tekstowym Prometheusa (bez zależności zewnętrznych).
+Zapis odbywa się w pętli zdarzeń bota, odczyt (/metrics) z dowolnego wątku.
+"""
+
+import bisect
+import math
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENESS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+OUTAGE_BUCKETS = (1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, value in list(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """Wartość liczona przy każdym odczycie (np. liczba timerów)"""
+        self._function = function
+
+    def render(self):
+        if self._function is not None:
+            try:
+                self._values[()] = self._function()
+            except Exception:
+                pass
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            # [liczniki kubełków..., suma, liczba]
+            series = self._values[key] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, series in list(self._values.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key, ('le', '+Inf'))
+            lines.append(f'{self.name}_bucket{labels} {series[-1]}')
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{plain} {_format_value(float(series[-2]))}')
+            lines.append(f'{self.name}_count{plain} {series[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        """Tekst w formacie ekspozycji Prometheusa (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# ------------------- METRYKI BOTA -------------------
+REGISTRY = Registry()
+
+COMMAND_LATENCY = REGISTRY.histogram(
+    'resp_command_duration_seconds', 'Czas obsługi komend bota', ['command'])
+PING_LATENESS = REGISTRY.histogram(
+    'resp_ping_lateness_seconds', 'Opóźnienie wysłania pingu względem planowanego czasu',
+    buckets=LATENESS_BUCKETS)
+SCHEDULER_DRIFT = REGISTRY.histogram(
+    'resp_scheduler_drift_seconds', 'Spóźnienie obsługi terminu harmonogramu', ['kind'],
+    buckets=LATENESS_BUCKETS)
+TICK_DURATION = REGISTRY.histogram(
+    'resp_check_resp_tick_duration_seconds', 'Czas jednego przebiegu check_resp (obsługa terminów)')
+DISCORD_API_CALLS = REGISTRY.counter(
+    'resp_discord_api_calls_total', 'Wywołania API Discorda przez kolejkę wysyłek', ['result'])
+BOT_RESTARTS = REGISTRY.counter(
+    'resp_bot_restarts_total', 'Restarty połączenia bota (DiscordBotWorkflow.restart_count)')
+GATEWAY_OUTAGE = REGISTRY.histogram(
+    'resp_gateway_outage_seconds', 'Czas przerwy w połączeniu z Discordem (do wznowienia lub nowej sesji)',
+    buckets=OUTAGE_BUCKETS)
+TRACKED_TIMERS = REGISTRY.gauge(
+    'resp_tracked_timers', 'Liczba śledzonych timerów respów')
+SEND_QUEUE = REGISTRY.gauge(
+    'resp_send_queue_depth', 'Wiadomości czekające w kolejce wysyłek')
+DM_MESSAGES = REGISTRY.counter(
+    'resp_dm_messages_total', 'Prywatne wiadomości do subskrybentów respów', ['result'])
+DM_QUEUE = REGISTRY.gauge(
+    'resp_dm_queue_depth', 'Subskrybenci czekający na prywatną wiadomość')
@@ -0,0 +1,169 @@
+"""
+Resp Rotation
+Czasy respu, okna respu i rotacje czempionów z pliku danych (champions.json). Rotacje to
+cykle dowolnej długości (A → B → C → A) z własnym czasem do respu każdego członka. Cykl
+trzyma skumulowane przesunięcia, więc "który czempion i kiedy za N respów" to dzielenie
+z resztą, a nie przejście N kroków.
+"""
+
+import json
+import logging
+from array import array
+from datetime import timedelta
+
+logger = logging.getLogger('resp_rotation')
+
+ZERO = timedelta(0)
+
+
+class Rotation:
+    """Cykl czempionów: members[i] respi intervals[i] sekund po starcie swojego timera"""
+
+    __slots__ = ('name', 'members', 'intervals', 'offsets', 'period', '_index')
+
+    def __init__(self, name, members):
+        # members: [(czempion, timedelta)] w kolejności respów
+        self.name = name
+        self.members = tuple(champion for champion, _ in members)
+        self.intervals = array('d', (interval.total_seconds() for _, interval in members))
+        # offsets[i] = suma czasów członków 0..i-1, offsets[-1] = pełny obieg cyklu
+        self.offsets = array('d', [0.0])
+        for seconds in self.intervals:
+            self.offsets.append(self.offsets[-1] + seconds)
+        self.period = self.offsets[-1]
+        self._index = {champion: i for i, champion in enumerate(self.members)}
+
+    def __len__(self):
+        return len(self.members)
+
+    def index(self, champion):
+        return self._index[champion]
+
+    def offset(self, start, n):
+        """Sekundy od startu timera members[start] do jego n-tego kolejnego respu (n >= 1) - O(1)"""
+        laps, position = divmod(start + n, len(self.members))
+        return laps * self.period + self.offsets[position] - self.offsets[start]
+
+    def member(self, start, n):
+        """Czempion, który zrespi się jako n-ty licząc od members[start]"""
+        return self.members[(start + n - 1) % len(self.members)]
+
+    def cycle(self, start):
+        """Członkowie w kolejności respów zaczynając od members[start]"""
+        return self.members[start:] + self.members[:start]
+
+
+class RotationTable:
+    """Czempion -> (rotacja, pozycja), czas do respu i okno respu (domyślnie default_interval, bez okna)"""
+
+    def __init__(self, default_interval, rotations=(), intervals=None, windows=None):
+        self.default_interval = default_interval
+        self.intervals = dict(intervals or {})  # czempion -> timedelta (spoza rotacji)
+        self.windows = dict(windows or {})  # czempion -> timedelta: resp najpóźniej tyle po najwcześniejszym
+        self._members = {}
+        for rotation in rotations:
+            self.add(rotation)
+
+    @classmethod
+    def from_config(cls, data, default_interval):
+        """Czasy z "champions" (interval_minutes, window_minutes) i rotacje z "rotations"
+        (członek to nazwa albo {"champion", "interval_minutes"})"""
+        intervals, windows = {}, {}
+        for item in data.get("champions", ()):
+            if item.get("interval_minutes"):
+                intervals[item["name"]] = timedelta(minutes=item["interval_minutes"])
+            if item.get("window_minutes"):
+                windows[item["name"]] = timedelta(minutes=item["window_minutes"])
+        rotations = []
+        for item in data.get("rotations", ()):
+            members = []
+            for member in item["members"]:
+                if isinstance(member, str):
+                    member = {"champion": member}
+                minutes = member.get("interval_minutes")
+                champion = member["champion"]
+                interval = timedelta(minutes=minutes) if minutes else intervals.get(champion, default_interval)
+                members.append((champion, interval))
+            rotations.append(Rotation(item.get("name") or " → ".join(name for name, _ in members), members))
+        return cls(default_interval, rotations, intervals, windows)
+
+    @classmethod
+    def from_file(cls, path, default_interval):
+        """Wczytaj czasy i rotacje z champions.json; brak pliku = wszyscy co default_interval"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(default_interval)
+        return cls.from_config(data, default_interval)
+
+    def add(self, rotation):
+        for i, champion in enumerate(rotation.members):
+            if champion in self._members:
+                logger.warning(f"⚠️ {champion} jest już w rotacji {self._members[champion][0].name} - pomijam w {rotation.name}")
+                continue
+            self._members[champion] = (rotation, i)
+
+    def set_interval(self, champion, interval):
+        """Czas respu czempiona spoza rotacji (np. z kalibracji) - zastępuje wartość z champions.json"""
+        if champion in self._members:
+            raise ValueError(f"{champion} jest w rotacji {self._members[champion][0].name}")
+        self.intervals[champion] = interval
+
+    def __contains__(self, champion):
+        return champion in self._members
+
+    def rotation(self, champion):
+        """Rotacja czempiona albo None"""
+        found = self._members.get(champion)
+        return found[0] if found else None
+
+    # ------------------- ZAPYTANIA -------------------
+    def interval(self, champion):
+        """Czas od startu timera czempiona do jego (najwcześniejszego) respu"""
+        found = self._members.get(champion)
+        if found is None:
+            return self.intervals.get(champion, self.default_interval)
+        rotation, start = found
+        return timedelta(seconds=rotation.intervals[start])
+
+    def window(self, champion):
+        """Szerokość okna respu - 0, gdy czempion respi co do minuty"""
+        return self.windows.get(champion, ZERO)
+
+    def next(self, champion):
+        """Czempion, którego timer rusza po respie champion (spoza rotacji - ten sam)"""
+        return self.nth(champion, None, 2)[0]
+
+    def nth(self, champion, last_resp, n):
+        """(czempion, czas) n-tego respu licząc od timera champion z last_resp - O(1)"""
+        found = self._members.get(champion)
+        if found is None:
+            when = last_resp + self.interval(champion) * n if last_resp is not None else None
+            return champion, when
+        rotation, start = found
+        when = last_resp + timedelta(seconds=rotation.offset(start, n)) if last_resp is not None else None
+        return rotation.member(start, n), when
+
+    def instants(self, champion, last_resp_epoch, count):
+        """(array('d') momentów count kolejnych respów, cykl nazw od champion)"""
+        found = self._members.get(champion)
+        if found is None:
+            step = self.interval(champion).total_seconds()
+            return array('d', (last_resp_epoch + step * k for k in range(1, count + 1))), (champion,)
+        rotation, start = found
+        instants = array('d', (last_resp_epoch + rotation.offset(start, k) for k in range(1, count + 1)))
+        return instants, rotation.cycle(start)
+
+    def cycle_spawns(self, champion, last_resp_epoch):
+        """Okresowy plan respów timera: [(czempion, pierwszy resp, okres, okno)] w sekundach epoki -
+        każdy kolejny resp czempiona to pierwszy resp + k * okres"""
+        found = self._members.get(champion)
+        if found is None:
+            interval = self.interval(champion).total_seconds()
+            return [(champion, last_resp_epoch + interval, interval, self.window(champion).total_seconds())]
+        rotation, start = found
+        return [
+            (member, last_resp_epoch + rotation.offset(start, n), rotation.period, self.window(member).total_seconds())
+            for n, member in enumerate(rotation.cycle(start), 1)
+        ]
@@ -0,0 +1,57 @@
+"""
+Resp Runtime
+Profil pamięci klienta Discorda. Bot czyta tylko kanały swoich serwerów i wywołania
+komend, więc w profilu low-memory nie trzyma członków, wiadomości ani chunków serwerów.
+"""
+
+import logging
+import os
+
+import discord
+
+logger = logging.getLogger('resp_runtime')
+
+
+def bot_options(low_memory=False, message_content=True):
+    """kwargs dla commands.Bot: intencje i cache zależnie od profilu"""
+    if not low_memory:
+        intents = discord.Intents.default()
+        intents.messages = True
+        intents.message_content = message_content
+        return {"intents": intents}
+
+    # Minimum: serwery i kanały (get_channel dla pingów) + wiadomości tylko dla komend z prefiksem
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = message_content
+    intents.dm_messages = message_content
+    intents.message_content = message_content
+    return {
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "max_messages": None,
+        "chunk_guilds_at_startup": False,
+    }
+
+
+def rss_mb():
+    """Bieżąca pamięć rezydentna procesu (MB)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource  # bez /proc (macOS) - szczytowe zużycie zamiast bieżącego
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def memory_report(bot, state, label):
+    """Jedna linia logu: RSS i rozmiar cache klienta"""
+    cached_members = sum(len(guild.members) for guild in bot.guilds)
+    message_cache = len(bot.cached_messages) if bot._connection.max_messages else "wyłączony"
+    report = (
+        f"🧠 Pamięć ({label}): RSS {rss_mb():.1f} MB | serwery {len(bot.guilds)} | "
+        f"członkowie w cache {cached_members} | cache wiadomości {message_cache} | timery {state.count()}"
+    )
+    logger.info(report)
+    return report
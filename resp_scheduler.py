@@ -0,0 +1,171 @@
+"""
+Resp Scheduler
+Harmonogram terminów respów oparty na kopcu (min-heap) - śpi do najbliższego terminu
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+
+from resp_metrics import SCHEDULER_DRIFT, TICK_DURATION
+
+logger = logging.getLogger('resp_scheduler')
+
+# Rodzaje terminów
+PING = "ping"
+SPAWN = "spawn"
+
+
+class _Timer:
+    """Stan klucza w harmonogramie: liczba ważnych wpisów w kopcu i znacznik anulowania"""
+
+    __slots__ = ('live', 'cancelled')
+
+    def __init__(self):
+        self.live = 0
+        self.cancelled = False
+
+
+class RespScheduler:
+    """Kopiec terminów (ping/resp) z leniwym unieważnianiem wpisów"""
+
+    def __init__(self, handler, clock=datetime.utcnow):
+        # handler(key, kind, deadline) - korutyna wywoływana dla każdego terminu
+        self.handler = handler
+        self.clock = clock
+        self._heap = []
+        self._timers = {}  # klucz -> _Timer (tylko klucze z ważnymi wpisami)
+        self._stale = 0
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._heap) - self._stale
+
+    def schedule(self, key, kind, deadline):
+        """Dodaj termin dla klucza - O(log n)"""
+        timer = self._timers.get(key)
+        if timer is None:
+            timer = self._timers[key] = _Timer()
+        timer.live += 1
+        entry = (deadline, next(self._seq), key, kind, timer)
+        heapq.heappush(self._heap, entry)
+        # Budzimy pętlę tylko gdy nowy termin jest najwcześniejszy
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def schedule_many(self, entries):
+        """Dodaj wiele terminów [(klucz, rodzaj, termin)] naraz - przy dużej partii jedno
+        heapify O(n) zamiast n wstawień, i jedno wybudzenie pętli"""
+        if not entries:
+            return
+        head = self._heap[0] if self._heap else None
+        pushed = []
+        for key, kind, deadline in entries:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = _Timer()
+            timer.live += 1
+            pushed.append((deadline, next(self._seq), key, kind, timer))
+        if len(pushed) * 4 > len(self._heap):
+            self._heap.extend(pushed)
+            heapq.heapify(self._heap)
+        else:
+            for entry in pushed:
+                heapq.heappush(self._heap, entry)
+        if self._heap[0] is not head:
+            self._wakeup.set()
+
+    def cancel(self, key):
+        """Unieważnij wszystkie terminy klucza - O(1), wpisy zdejmowane leniwie"""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return
+        # Wpisy w kopcu trzymają ten obiekt - wystarczy go oznaczyć
+        timer.cancelled = True
+        self._stale += timer.live
+        self._maybe_compact()
+
+    def next_deadline(self):
+        """Najbliższy ważny termin albo None"""
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    async def run_pending(self, now=None):
+        """Obsłuż wszystkie terminy, które już minęły; zwraca liczbę obsłużonych"""
+        if now is None:
+            now = self.clock()
+        started = time.perf_counter()
+        handled = 0
+        while True:
+            self._drop_stale_head()
+            if not self._heap or self._heap[0][0] > now:
+                if handled:
+                    TICK_DURATION.observe(time.perf_counter() - started)
+                return handled
+            deadline, _, key, kind, timer = heapq.heappop(self._heap)
+            self._release(key, timer)
+            handled += 1
+            SCHEDULER_DRIFT.observe(max(0.0, (now - deadline).total_seconds()), kind=kind)
+            try:
+                await self.handler(key, kind, deadline)
+            except Exception:
+                logger.exception(f"Błąd obsługi terminu {kind} dla {key}")
+
+    async def run(self):
+        """Pętla główna - śpi do najbliższego terminu albo do przezbrojenia"""
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            if deadline is None:
+                await self._wakeup.wait()
+                continue
+            delay = (deadline - self.clock()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            await self.run_pending()
+
+    def start(self):
+        """Uruchom pętlę harmonogramu jako zadanie asyncio"""
+        if not self.is_running():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    # ------------------- WEWNĘTRZNE -------------------
+    @staticmethod
+    def _is_stale(entry):
+        return entry[4].cancelled
+
+    def _drop_stale_head(self):
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale -= 1
+
+    def _release(self, key, timer):
+        timer.live -= 1
+        if timer.live == 0:
+            # Klucz bez terminów nie zostaje w słowniku (usunięte czempiony nie zajmują pamięci)
+            del self._timers[key]
+
+    def _maybe_compact(self):
+        # Przebuduj kopiec gdy ponad połowa wpisów jest nieaktualna
+        if self._stale > 32 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if not self._is_stale(entry)]
+            heapq.heapify(self._heap)
+            self._stale = 0
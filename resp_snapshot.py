@@ -0,0 +1,192 @@
+"""
+Resp Snapshot
+Niezmienny snapshot stanu timerów publikowany przez bota po każdej zmianie.
+Pętla bota odświeża tylko pozycje zmienionej przestrzeni; bajty JSON serwer HTTP
+(Flask albo aiohttp) składa przy pierwszym odczycie wersji w swoim wątku i zapamiętuje -
+bez blokad i bez serializacji wszystkich timerów w pętli zdarzeń Discorda.
+"""
+
+import asyncio
+import heapq
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from itertools import islice
+
+# Identyfikator uruchomienia - ETag z poprzedniego procesu nigdy nie pasuje
+BOOT_ID = format(int(time.time()), 'x')
+
+
+def _iso(dt):
+    return dt.isoformat(timespec='seconds') + 'Z'
+
+
+def _next_resp(item):
+    return item["next_resp"]
+
+
+class Snapshot:
+    """Stan timerów jednej wersji: {guild_id: krotka krotek pozycji (każda przestrzeń po next_resp)}.
+    Treści JSON liczone przy pierwszym odczycie - wynik zależy tylko od snapshotu, więc
+    równoległe odczyty najwyżej policzą te same bajty dwa razy"""
+
+    __slots__ = ('version', 'etag', 'last_modified', 'guilds', 'next_limit',
+                 '_timers_body', '_next_body', '_guild_bodies')
+
+    def __init__(self, version, etag, last_modified, guilds, next_limit=50):
+        self.version = version
+        self.etag = etag
+        self.last_modified = last_modified
+        self.guilds = guilds
+        self.next_limit = next_limit
+        self._timers_body = None
+        self._next_body = None
+        self._guild_bodies = {}
+
+    def _merged(self, groups):
+        return heapq.merge(*groups, key=_next_resp)
+
+    @property
+    def timers_body(self):
+        if self._timers_body is None:
+            items = list(self._merged(group for groups in self.guilds.values() for group in groups))
+            self._timers_body = _dumps({"version": self.version, "timers": items})
+        return self._timers_body
+
+    @property
+    def next_body(self):
+        if self._next_body is None:
+            groups = (group for groups in self.guilds.values() for group in groups)
+            items = list(islice(self._merged(groups), self.next_limit))
+            self._next_body = _dumps({"version": self.version, "next": items})
+        return self._next_body
+
+    def guild_body(self, guild_id):
+        body = self._guild_bodies.get(guild_id)
+        if body is None:
+            items = list(self._merged(self.guilds.get(guild_id, ())))
+            body = self._guild_bodies[guild_id] = _dumps({"version": self.version, "timers": items})
+        return body
+
+
+EMPTY = Snapshot(0, '"0"', None, {})
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def windows_body(windows, start, end):
+    """Dane JSON zapytania zakresowego /api/guilds/{id}/between (liczone na żądanie, bez snapshotu)"""
+    return {
+        "from": _iso(start),
+        "to": _iso(end),
+        "spawns": [
+            {"champion": window.champion, "start": _iso(window.start), "end": _iso(window.end)}
+            for window in windows
+        ],
+    }
+
+
+def not_modified(snapshot, if_none_match):
+    """Czy klient ma już aktualną wersję (If-None-Match)"""
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (snapshot.etag, '*') for tag in if_none_match.split(','))
+
+
+def cache_headers(snapshot):
+    headers = {'ETag': snapshot.etag, 'Cache-Control': 'no-cache'}
+    if snapshot.last_modified:
+        headers['Last-Modified'] = snapshot.last_modified
+    return headers
+
+
+class SnapshotPublisher:
+    """Słuchacz RespState - po zmianach (scalonych w jednej iteracji pętli) publikuje nowy snapshot.
+    Pozycje JSON są odświeżane tylko dla zmienionych przestrzeni (niezmienione wpisy z pamięci)"""
+
+    def __init__(self, view, next_limit=50):
+        self.view = view
+        self.next_limit = next_limit
+        self.current = EMPTY
+        # health() -> dict ze stanem bota (ustawiane przez bota)
+        self.health = lambda: {}
+        self._scheduled = False
+        self._dirty = set()
+        self._items = {}   # namespace -> {czempion: (SpawnEntry, pozycja JSON)}
+        self._groups = {}  # guild_id -> {namespace: krotka pozycji po next_resp}
+
+    def on_change(self, ns, changes):
+        self._dirty.add(ns)
+        if self._scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.publish()  # przywracanie stanu przed startem pętli
+            return
+        self._scheduled = True
+        loop.call_soon(self.publish)
+
+    def publish(self):
+        """Odśwież pozycje zmienionych przestrzeni i opublikuj nowy snapshot (podmiana referencji)"""
+        self._scheduled = False
+        dirty, self._dirty = self._dirty, set()
+        for ns in dirty:
+            self._refresh(ns)
+
+        version = self.view.version
+        now = datetime.now(timezone.utc)
+        self.current = Snapshot(
+            version=version,
+            etag=f'"{BOOT_ID}-{version}"',
+            last_modified=format_datetime(now, usegmt=True),
+            guilds={guild_id: tuple(groups.values()) for guild_id, groups in self._groups.items()},
+            next_limit=self.next_limit,
+        )
+
+    def _refresh(self, ns):
+        guild_id, channel_id = ns
+        entries = self.view.current(ns).entries
+        groups = self._groups.get(guild_id)
+        if not entries:
+            self._items.pop(ns, None)
+            if groups is not None:
+                groups.pop(ns, None)
+                if not groups:
+                    del self._groups[guild_id]
+            return
+        old = self._items.get(ns, {})
+        cached, items = {}, []
+        for entry in entries:
+            known = old.get(entry.champion)
+            if known is None or known[0] is not entry:
+                known = (entry, {
+                    "guild_id": str(guild_id),
+                    "channel_id": str(channel_id),
+                    "champion": entry.champion,
+                    "last_resp": _iso(entry.last_resp),
+                    "next_resp": _iso(entry.next_resp),
+                    "next_resp_local": entry.next_local,
+                    "window_end": _iso(entry.window_end),
+                })
+            cached[entry.champion] = known
+            items.append(known[1])
+        self._items[ns] = cached
+        self._groups.setdefault(guild_id, {})[ns] = tuple(items)
+
+
+# ------------------- WSPÓŁDZIELENIE -------------------
+_shared = None
+
+
+def share_publisher(publisher):
+    """Udostępnij publikatora serwerowi HTTP w tym samym procesie"""
+    global _shared
+    _shared = publisher
+
+
+def shared_publisher():
+    return _shared
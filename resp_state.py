@@ -0,0 +1,241 @@
+"""
+Resp State
+Stan timerów respów podzielony na przestrzenie (serwer / kanał) + kanały powiadomień serwerów.
+Każda zmiana trafia do harmonogramu i do trwałego zapisu (RespStore).
+"""
+
+import logging
+from datetime import timedelta
+
+from resp_rotation import RotationTable
+from resp_scheduler import RespScheduler, PING, SPAWN
+from resp_store import DELETE, PUT, dt_to_epoch, epoch_to_dt
+
+logger = logging.getLogger('resp_state')
+
+SCOPE_GUILD = "guild"
+SCOPE_CHANNEL = "channel"
+
+
+class RespState:
+    """Timery czempionów: {(guild_id, channel_id): {czempion: ostatni_resp_utc}}"""
+
+    def __init__(self, store, handler, resp_time, ping_before, rotation=None,
+                 scope=SCOPE_GUILD, default_channels=None):
+        self.store = store
+        self.resp_time = resp_time
+        self.ping_before = ping_before
+        self.rotation = rotation or RotationTable(resp_time)
+        self.scope = scope
+        self.timers = {}
+        self.channels = dict(default_channels or {})
+        # listener(namespace, [(czempion, ostatni_resp albo None)]) - widoki, snapshoty itp.
+        self.listeners = []
+        # handler(key, kind, deadline) gdzie key = (namespace, czempion)
+        self.scheduler = RespScheduler(handler)
+
+    # ------------------- PRZESTRZENIE -------------------
+    def namespace(self, guild_id, channel_id):
+        """Klucz przestrzeni timerów dla serwera/kanału (zależnie od RESP_SCOPE)"""
+        return (guild_id, channel_id if self.scope == SCOPE_CHANNEL else 0)
+
+    def namespace_for(self, ctx):
+        return self.namespace(ctx.guild.id if ctx.guild else 0, ctx.channel.id)
+
+    def get(self, ns):
+        """Timery jednej przestrzeni - O(1)"""
+        return self.timers.get(ns, {})
+
+    def channel_for(self, ns):
+        """Kanał, na który idą pingi dla danej przestrzeni"""
+        guild_id, channel_id = ns
+        return channel_id or self.channels.get(guild_id)
+
+    def set_channel(self, guild_id, channel_id):
+        self.channels[guild_id] = channel_id
+        self.store.put("channel", guild_id, channel_id)
+
+    def count(self):
+        """Liczba timerów (bezpieczne także z wątku HTTP)"""
+        return sum(map(len, list(self.timers.values())))
+
+    # ------------------- ZMIANY -------------------
+    def next_resp(self, last_resp, champion=None):
+        """Resp czempiona, którego timer ruszył w last_resp (czas zależny od rotacji)"""
+        return last_resp + self.rotation.interval(champion)
+
+    def set(self, ns, champion, last_resp):
+        """Ustaw czas ostatniego respu czempiona i przezbrój harmonogram"""
+        self.timers.setdefault(ns, {})[champion] = last_resp
+        self.store.put("resp", (*ns, champion), dt_to_epoch(last_resp))
+        self.arm(ns, champion)
+        self._notify(ns, [(champion, last_resp)])
+
+    def set_many(self, ns, items):
+        """Ustaw wiele timerów naraz [(czempion, ostatni_resp)]: jedna transakcja zapisu,
+        jedno przezbrojenie harmonogramu i jedno powiadomienie słuchaczy"""
+        if not items:
+            return
+        timers = self.timers.setdefault(ns, {})
+        ops, deadlines = [], []
+        for champion, last_resp in items:
+            timers[champion] = last_resp
+            ops.append((PUT, "resp", (*ns, champion), dt_to_epoch(last_resp)))
+            self.scheduler.cancel((ns, champion))
+            deadlines += self._deadlines(ns, champion)
+        self.store.apply(ops)
+        self.scheduler.schedule_many(deadlines)
+        self._notify(ns, list(items))
+
+    def set_interval(self, champion, interval):
+        """Nowy czas respu czempiona (kalibracja) - zapis i przezbrojenie jego timerów"""
+        self.rotation.set_interval(champion, interval)
+        self.store.put("interval", champion, interval.total_seconds())
+        self.rearm([champion])
+
+    def rearm(self, champions):
+        """Czas respu czempionów się zmienił - przezbrój ich timery i odśwież widoki"""
+        for ns, timers in list(self.timers.items()):
+            changes = [(champion, timers[champion]) for champion in champions if champion in timers]
+            for champion, _ in changes:
+                self.arm(ns, champion)
+            if changes:
+                self._notify(ns, changes)
+
+    def delete(self, ns, champion):
+        timers = self.timers.get(ns)
+        if not timers or champion not in timers:
+            return False
+        self._drop(ns, champion)
+        self.store.delete("resp", (*ns, champion))
+        self._notify(ns, [(champion, None)])
+        return True
+
+    def advance(self, ns, champion):
+        """Czempion się zrespił - przesuń timer (z rotacją); zwraca nowego czempiona"""
+        timers = self.timers.get(ns)
+        if not timers or champion not in timers:
+            return None
+        next_resp_time = self.next_resp(timers[champion], champion)
+        next_champion = self.rotation.next(champion)
+        if next_champion != champion:
+            self._drop(ns, champion)
+            self.timers.setdefault(ns, {})[next_champion] = next_resp_time
+            self.store.apply([
+                (DELETE, "resp", (*ns, champion), None),
+                (PUT, "resp", (*ns, next_champion), dt_to_epoch(next_resp_time)),
+            ])
+            changes = [(champion, None), (next_champion, next_resp_time)]
+        else:
+            timers[champion] = next_resp_time
+            self.store.put("resp", (*ns, champion), dt_to_epoch(next_resp_time))
+            changes = [(champion, next_resp_time)]
+        self.arm(ns, next_champion)
+        self._notify(ns, changes)
+        return next_champion
+
+    def arm(self, ns, champion):
+        """Ustaw w harmonogramie ping i resp czempiona"""
+        self.scheduler.cancel((ns, champion))
+        for key, kind, deadline in self._deadlines(ns, champion):
+            self.scheduler.schedule(key, kind, deadline)
+
+    def _deadlines(self, ns, champion):
+        """[(klucz, rodzaj, termin)] pingu i respu czempiona"""
+        key = (ns, champion)
+        next_resp_time = self.next_resp(self.timers[ns][champion], champion)
+        return [(key, PING, next_resp_time - self.ping_before), (key, SPAWN, next_resp_time)]
+
+    def _notify(self, ns, changes):
+        for listener in self.listeners:
+            try:
+                listener(ns, changes)
+            except Exception:
+                logger.exception(f"Błąd słuchacza zmian timerów dla {ns}")
+
+    def _drop(self, ns, champion):
+        timers = self.timers[ns]
+        del timers[champion]
+        if not timers:
+            del self.timers[ns]
+        self.scheduler.cancel((ns, champion))
+
+    # ------------------- PRZYWRACANIE -------------------
+    def restore(self, legacy_namespace=None):
+        """Wczytaj zapisany stan i uzbrój harmonogram; zwraca wszystkie zapisane tabele"""
+        saved = self.store.load()
+        for guild_id, channel_id in saved.get("channel", {}).items():
+            self.channels[guild_id] = channel_id
+        # Skalibrowane czasy respu przed uzbrojeniem timerów
+        for champion, seconds in saved.get("interval", {}).items():
+            self._restore_interval(champion, seconds)
+        for key, ts in saved.get("resp", {}).items():
+            if isinstance(key, tuple):
+                guild_id, channel_id, champion = key
+                ns = (guild_id, channel_id)
+            elif legacy_namespace is not None:
+                # Zapis sprzed podziału na serwery - przenosimy do domyślnej przestrzeni
+                ns, champion = legacy_namespace, key
+                self.store.apply([
+                    (DELETE, "resp", key, None),
+                    (PUT, "resp", (*ns, champion), ts),
+                ])
+            else:
+                continue
+            self.timers.setdefault(ns, {})[champion] = epoch_to_dt(ts)
+            self.arm(ns, champion)
+        for ns, timers in self.timers.items():
+            self._notify(ns, list(timers.items()))
+        self.store.start()
+        return saved
+
+    # ------------------- REPLIKACJA (instancja zapasowa) -------------------
+    def replicate(self, ops):
+        """Zastosuj zmiany lidera z RespStore.tail() bez ponownego zapisu; zwraca zmiany innych tabel"""
+        other = []
+        touched = {}  # namespace -> {czempion: ostatni_resp albo None}
+        for op, table, key, value in ops:
+            if table == "resp" and isinstance(key, tuple):
+                guild_id, channel_id, champion = key
+                ns = (guild_id, channel_id)
+                if op == PUT:
+                    last_resp = epoch_to_dt(value)
+                    self.timers.setdefault(ns, {})[champion] = last_resp
+                    # Harmonogram zapasowej instancji nie działa - terminy czekają na przejęcie
+                    self.arm(ns, champion)
+                    touched.setdefault(ns, {})[champion] = last_resp
+                elif champion in self.get(ns):
+                    self._drop(ns, champion)
+                    touched.setdefault(ns, {})[champion] = None
+            elif table == "channel":
+                if op == PUT:
+                    self.channels[key] = value
+                else:
+                    self.channels.pop(key, None)
+            elif table == "interval" and op == PUT:
+                if self._restore_interval(key, value):
+                    self.rearm([key])
+            else:
+                other.append((op, table, key, value))
+        for ns, changes in touched.items():
+            self._notify(ns, list(changes.items()))
+        return other
+
+    def _restore_interval(self, champion, seconds):
+        try:
+            self.rotation.set_interval(champion, timedelta(seconds=seconds))
+        except ValueError:
+            logger.warning(f"⚠️ Pomijam zapisany czas respu {champion} - czempion jest teraz w rotacji")
+            return False
+        return True
+
+    def resync(self, saved):
+        """Pełny stan z RespStore.load() (dziennik lidera przycięty) jako zmiany dla replicate()"""
+        saved_resp = saved.get("resp", {})
+        ops = [
+            (DELETE, "resp", (*ns, champion), None)
+            for ns, timers in self.timers.items() for champion in timers
+            if (*ns, champion) not in saved_resp
+        ]
+        ops += [(PUT, table, key, value) for table, rows in saved.items() for key, value in rows.items()]
+        return self.replicate(ops)
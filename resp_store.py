@@ -0,0 +1,304 @@
+"""
+Resp Store
+Trwały zapis stanu bota w SQLite: dziennik zmian (write-ahead log) + okresowe snapshoty.
+Zapis odbywa się w osobnym wątku partiami, więc pętla asyncio nigdy nie czeka na dysk.
+Instancja zapasowa czyta ten sam dziennik (tail), żeby mieć stan lidera.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger('resp_store')
+
+PUT = "put"
+DELETE = "del"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resp_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS resp_snapshot (
+    tbl TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (tbl, key)
+);
+CREATE TABLE IF NOT EXISTS resp_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resp_history (
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    champion TEXT NOT NULL,
+    spawn INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resp_history_champion ON resp_history (guild_id, channel_id, champion, spawn);
+"""
+
+
+# ------------------- KONWERSJE -------------------
+def dt_to_epoch(dt):
+    """Naiwny datetime UTC -> sekundy epoki"""
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def epoch_to_dt(ts):
+    """Sekundy epoki -> naiwny datetime UTC (jak datetime.utcnow())"""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def _encode_key(key):
+    return json.dumps(key, ensure_ascii=False, separators=(',', ':'))
+
+
+def _decode_key(raw):
+    key = json.loads(raw)
+    # Klucze złożone (krotki) wracają jako listy - przywracamy krotki
+    return tuple(key) if isinstance(key, list) else key
+
+
+def connect(path):
+    """Połączenie SQLite w trybie WAL (fsync tylko przy checkpointach)"""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+# ------------------- STORE -------------------
+class RespStore:
+    """Dziennik zmian tabel klucz -> wartość z zapisem partiami w tle"""
+
+    def __init__(self, path, batch_size=500, snapshot_every=2000, snapshot_interval=300):
+        self.path = path
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self._queue = queue.Queue()
+        self._mirror = {}
+        self._mirror_lock = threading.Lock()  # lustro zmieniają wątek zapisu i tail()
+        self.seq = 0  # ostatni wpis dziennika odzwierciedlony w lustrze
+        self._tail_conn = None
+        self._thread = None
+        self._closed = False
+
+    def load(self):
+        """Odtwórz stan: snapshot + odtworzenie dziennika; zwraca {tabela: {klucz: wartość}}"""
+        conn = connect(self.path)
+        try:
+            mirror = {}
+            for tbl, key, value in conn.execute("SELECT tbl, key, value FROM resp_snapshot"):
+                mirror.setdefault(tbl, {})[key] = value
+            row = conn.execute("SELECT value FROM resp_meta WHERE name = 'snapshot_seq'").fetchone()
+            snapshot_seq = last_seq = int(row[0]) if row else 0
+            replayed = 0
+            for seq, op, tbl, key, value in conn.execute(
+                "SELECT seq, op, tbl, key, value FROM resp_log WHERE seq > ? ORDER BY seq", (snapshot_seq,)
+            ):
+                _apply(mirror, op, tbl, key, value)
+                last_seq = seq
+                replayed += 1
+        finally:
+            conn.close()
+
+        with self._mirror_lock:
+            self._mirror = mirror
+            self.seq = last_seq
+        logger.info(f"💾 Odtworzono stan z {self.path} (wpisów dziennika: {replayed})")
+        return {
+            tbl: {_decode_key(key): json.loads(value) for key, value in rows.items()}
+            for tbl, rows in mirror.items()
+        }
+
+    def tail(self):
+        """Zmiany zapisane przez inne instancje od ostatniego odczytu [(op, tabela, klucz, wartość)] -
+        blokujące (wołać w wątku). None, gdy dziennik przycięto snapshotem (potrzebny load())"""
+        if self._tail_conn is None:
+            self._tail_conn = connect(self.path)
+            self._tail_conn.isolation_level = None
+        conn = self._tail_conn
+        conn.execute("BEGIN")  # snapshot_seq i dziennik z jednego stanu bazy
+        try:
+            row = conn.execute("SELECT value FROM resp_meta WHERE name = 'snapshot_seq'").fetchone()
+            if row and int(row[0]) > self.seq:
+                return None
+            rows = conn.execute(
+                "SELECT seq, op, tbl, key, value FROM resp_log WHERE seq > ? ORDER BY seq", (self.seq,)
+            ).fetchall()
+        finally:
+            conn.execute("ROLLBACK")
+
+        with self._mirror_lock:
+            for seq, op, tbl, key, value in rows:
+                _apply(self._mirror, op, tbl, key, value)
+                self.seq = seq
+        return [
+            (op, tbl, _decode_key(key), None if value is None else json.loads(value))
+            for _, op, tbl, key, value in rows
+        ]
+
+    def start(self):
+        """Uruchom wątek zapisujący (wywołaj po load())"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name='resp-store', daemon=True)
+            self._thread.start()
+
+    def put(self, table, key, value):
+        self.apply([(PUT, table, key, value)])
+
+    def delete(self, table, key):
+        self.apply([(DELETE, table, key, None)])
+
+    def apply(self, ops):
+        """Zapisz kilka zmian atomowo (jedna transakcja) - nie blokuje wywołującego"""
+        if self._closed:
+            return
+        encoded = [
+            (op, table, _encode_key(key), None if op == DELETE else json.dumps(value, ensure_ascii=False))
+            for op, table, key, value in ops
+        ]
+        self._queue.put(encoded)
+        self.start()
+
+    def append(self, sql, rows):
+        """Wykonaj sql dla wierszy tabeli spoza dziennika (np. historia respów) - w wątku zapisu,
+        we własnej transakcji (błąd nie cofa zmian dziennika); bez lustra i snapshotów"""
+        if self._closed:
+            return
+        self._queue.put(_Rows(sql, rows))
+        self.start()
+
+    def flush(self, timeout=None):
+        """Poczekaj aż wszystkie zlecone zmiany trafią do bazy"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        """Zapisz zaległe zmiany i zatrzymaj wątek"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+        if self._tail_conn is not None:
+            self._tail_conn.close()
+            self._tail_conn = None
+
+    # ------------------- WĄTEK ZAPISU -------------------
+    def _writer(self):
+        conn = connect(self.path)
+        since_snapshot = 0
+        last_snapshot = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.snapshot_interval)
+                except queue.Empty:
+                    item = ()  # brak zmian - tylko sprawdzenie snapshotu
+                batch, appended, waiters, stop = [], [], [], False
+                # Zbierz wszystko co czeka w kolejce w jedną transakcję
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif isinstance(item, _Rows):
+                        appended.append(item)
+                    else:
+                        batch.extend(item)
+                    if stop or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    try:
+                        with conn:
+                            conn.executemany(
+                                "INSERT INTO resp_log (op, tbl, key, value) VALUES (?, ?, ?, ?)", batch
+                            )
+                            last_seq = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                        with self._mirror_lock:
+                            for op, tbl, key, value in batch:
+                                _apply(self._mirror, op, tbl, key, value)
+                            self.seq = max(self.seq, last_seq)
+                        since_snapshot += len(batch)
+                    except sqlite3.Error:
+                        logger.exception("❌ Błąd zapisu dziennika respów")
+
+                # Osobne transakcje - błąd historii nie cofa zapisanych timerów ani innych wierszy
+                for rows in appended:
+                    try:
+                        with conn:
+                            conn.executemany(rows.sql, rows.rows)
+                    except sqlite3.Error:
+                        logger.exception("❌ Błąd zapisu historii respów")
+
+                if since_snapshot and (
+                    since_snapshot >= self.snapshot_every
+                    or time.monotonic() - last_snapshot >= self.snapshot_interval
+                    or stop
+                ):
+                    try:
+                        self._snapshot(conn)
+                        since_snapshot = 0
+                        last_snapshot = time.monotonic()
+                    except sqlite3.Error:
+                        logger.exception("❌ Błąd zapisu snapshotu respów")
+
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _snapshot(self, conn):
+        """Zapisz pełny stan i przytnij dziennik"""
+        with conn:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM resp_log").fetchone()[0]
+            conn.execute("DELETE FROM resp_snapshot")
+            with self._mirror_lock:
+                rows = [(tbl, key, value) for tbl, table in self._mirror.items() for key, value in table.items()]
+            conn.executemany("INSERT INTO resp_snapshot (tbl, key, value) VALUES (?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO resp_meta (name, value) VALUES ('snapshot_seq', ?)", (str(seq),)
+            )
+            conn.execute("DELETE FROM resp_log WHERE seq <= ?", (seq,))
+
+
+class _Rows:
+    """Wiersze dla RespStore.append() w kolejce zapisu"""
+
+    __slots__ = ('sql', 'rows')
+
+    def __init__(self, sql, rows):
+        self.sql = sql
+        self.rows = rows
+
+
+def _apply(mirror, op, tbl, key, value):
+    rows = mirror.setdefault(tbl, {})
+    if op == PUT:
+        rows[key] = value
+    else:
+        rows.pop(key, None)
@@ -0,0 +1,94 @@
+"""
+Resp Subscriptions
+Subskrypcje respów: kto chce dostać prywatną wiadomość, gdy zbliża się resp czempiona.
+Indeks czempion -> zbiór użytkowników (dla pingu) i użytkownik -> czempioni (dla komend),
+zapisywany w RespStore jak timery - tabela "sub", klucz (guild_id, channel_id, czempion, user_id).
+"""
+
+import logging
+
+from resp_store import DELETE
+
+logger = logging.getLogger('resp_subscriptions')
+
+TABLE = "sub"
+
+
+class SubscriptionIndex:
+    """{(przestrzeń, czempion): {user_id}} + odwrotny indeks {(przestrzeń, user_id): {czempion}}"""
+
+    def __init__(self, store):
+        self.store = store
+        self._subscribers = {}
+        self._champions = {}
+
+    def __len__(self):
+        return sum(map(len, list(self._subscribers.values())))
+
+    def restore(self, saved):
+        """Wczytaj RespStore.load()['sub'] (zastępuje bieżący stan)"""
+        self._subscribers.clear()
+        self._champions.clear()
+        for guild_id, channel_id, champion, user_id in saved:
+            self._add((guild_id, channel_id), champion, user_id)
+
+    def replicate(self, key, value):
+        """Wpis lidera z RespStore.tail() (instancja zapasowa) - bez ponownego zapisu"""
+        guild_id, channel_id, champion, user_id = key
+        if value is None:
+            self._remove((guild_id, channel_id), champion, user_id)
+        else:
+            self._add((guild_id, channel_id), champion, user_id)
+
+    # ------------------- ZMIANY -------------------
+    def subscribe(self, ns, champion, user_id):
+        """False, gdy użytkownik już subskrybuje czempiona"""
+        if not self._add(ns, champion, user_id):
+            return False
+        self.store.put(TABLE, (*ns, champion, user_id), 1)
+        return True
+
+    def unsubscribe(self, ns, champion, user_id):
+        if not self._remove(ns, champion, user_id):
+            return False
+        self.store.delete(TABLE, (*ns, champion, user_id))
+        return True
+
+    def unsubscribe_all(self, ns, user_id):
+        """Wypisz użytkownika ze wszystkich czempionów przestrzeni; zwraca ich nazwy"""
+        champions = sorted(self._champions.get((ns, user_id), ()))
+        for champion in champions:
+            self._remove(ns, champion, user_id)
+        if champions:
+            self.store.apply([(DELETE, TABLE, (*ns, champion, user_id), None) for champion in champions])
+        return champions
+
+    # ------------------- ZAPYTANIA -------------------
+    def subscribers(self, ns, champion):
+        """Użytkownicy do powiadomienia o respie - O(1) (zbiór tylko do odczytu, kopiuje FanOut)"""
+        return self._subscribers.get((ns, champion), frozenset())
+
+    def of_user(self, ns, user_id):
+        return sorted(self._champions.get((ns, user_id), ()))
+
+    # ------------------- WEWNĘTRZNE -------------------
+    def _add(self, ns, champion, user_id):
+        users = self._subscribers.setdefault((ns, champion), set())
+        if user_id in users:
+            return False
+        users.add(user_id)
+        self._champions.setdefault((ns, user_id), set()).add(champion)
+        return True
+
+    def _remove(self, ns, champion, user_id):
+        users = self._subscribers.get((ns, champion))
+        if not users or user_id not in users:
+            return False
+        users.discard(user_id)
+        if not users:
+            del self._subscribers[(ns, champion)]
+        champions = self._champions[(ns, user_id)]
+        champions.discard(champion)
+        if not champions:
+            del self._champions[(ns, user_id)]
+        return True
@@ -0,0 +1,139 @@
+"""
+Resp Timetable
+Wsadowe liczenie przyszłych respów dla !generate_resps: momenty respów jako tablice
+(array) sekund epoki, a przesunięcie Europe/Warsaw z tablicy przejść DST liczonej raz,
+zamiast wywołania pytz astimezone dla każdej wartości.
+"""
+
+import bisect
+import time
+from array import array
+from datetime import datetime, time as dtime, timedelta, timezone
+from functools import lru_cache
+
+import pytz
+
+TIMEZONE = "Europe/Warsaw"
+MAX_RANGE_DAYS = 31  # dłuższy zakres z zapytania HTTP to błąd (400), nie kilka milionów obiegów
+
+
+@lru_cache(maxsize=8)
+def transition_table(zone=TIMEZONE):
+    """(momenty przejść w epoce UTC, przesunięcia w sekundach) - liczone raz na strefę"""
+    tz = pytz.timezone(zone)
+    utc_times = getattr(tz, '_utc_transition_times', None)
+    if not utc_times:
+        offset = int(tz.utcoffset(None).total_seconds()) if hasattr(tz, '_utcoffset') else 0
+        return array('d', [float('-inf')]), array('l', [offset])
+    starts = array('d', [float('-inf')])
+    offsets = array('l', [int(tz._transition_info[0][0].total_seconds())])
+    for moment, info in zip(utc_times[1:], tz._transition_info[1:]):
+        starts.append(moment.replace(tzinfo=timezone.utc).timestamp())
+        offsets.append(int(info[0].total_seconds()))
+    return starts, offsets
+
+
+def local_offset(instant, zone=TIMEZONE):
+    """Przesunięcie lokalne pojedynczego momentu - wyszukiwanie binarne w tablicy przejść"""
+    starts, offsets = transition_table(zone)
+    return offsets[bisect.bisect_right(starts, instant) - 1]
+
+
+def local_offsets(instants, zone=TIMEZONE):
+    """Przesunięcia lokalne dla rosnącej tablicy momentów - O(n + liczba przejść)"""
+    starts, offsets = transition_table(zone)
+    result = array('l', [0]) * len(instants)
+    if not instants:
+        return result
+    index = bisect.bisect_right(starts, instants[0]) - 1
+    next_start = starts[index + 1] if index + 1 < len(starts) else float('inf')
+    offset = offsets[index]
+    for i, instant in enumerate(instants):
+        while instant >= next_start:
+            index += 1
+            offset = offsets[index]
+            next_start = starts[index + 1] if index + 1 < len(starts) else float('inf')
+        result[i] = offset
+    return result
+
+
+def local_range(start_text, end_text, now_utc, zone=TIMEZONE):
+    """Przedział "HH:MM" - "HH:MM" czasu lokalnego jako (początek, koniec) w naiwnym UTC:
+    najbliższy, który się jeszcze nie skończył (koniec przed początkiem = przez północ)"""
+    tz = pytz.timezone(zone)
+
+    def at(text, day):
+        hour, minute = map(int, text.split(":"))
+        local = tz.localize(datetime.combine(day, dtime(hour, minute)))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+    today = now_utc.replace(tzinfo=timezone.utc).astimezone(tz).date()
+    overnight = timedelta(days=1) if at(end_text, today) <= at(start_text, today) else timedelta(0)
+    # Wczorajszy przedział przez północ może jeszcze trwać
+    for shift in (-1, 0, 1):
+        day = today + timedelta(days=shift)
+        start, end = at(start_text, day), at(end_text, day + overnight)
+        if end > now_utc:
+            return start, end
+    return start, end
+
+
+def parse_range(start_text, end_text, now_utc, zone=TIMEZONE):
+    """Zakres z zapytania HTTP: dwie godziny "HH:MM" (jak local_range) albo dwa momenty ISO 8601"""
+    if ":" in start_text and len(start_text) <= 5 and ":" in end_text and len(end_text) <= 5:
+        return local_range(start_text, end_text, now_utc, zone)
+    start, end = (_utc_naive(datetime.fromisoformat(text.replace("Z", "+00:00"))) for text in (start_text, end_text))
+    if end < start:
+        raise ValueError("koniec zakresu przed początkiem")
+    if end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise ValueError(f"zakres dłuższy niż {MAX_RANGE_DAYS} dni")
+    return start, end
+
+
+def _utc_naive(dt):
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class _DateFormatter:
+    """Formatowanie '%Y-%m-%d %H:%M:%S' z pamięcią części dziennej"""
+
+    def __init__(self):
+        self._days = {}
+
+    def __call__(self, local_seconds):
+        day, second = divmod(int(local_seconds // 1), 86400)
+        prefix = self._days.get(day)
+        if prefix is None:
+            parts = time.gmtime(day * 86400)
+            prefix = self._days[day] = f"{parts.tm_year:04d}-{parts.tm_mon:02d}-{parts.tm_mday:02d} "
+        hour, rest = divmod(second, 3600)
+        minute, sec = divmod(rest, 60)
+        return f"{prefix}{hour:02d}:{minute:02d}:{sec:02d}"
+
+
+def future_resp_lines(entries, count, rotations, emojis, default_emoji="🐉", zone=TIMEZONE):
+    """Linie !generate_resps dla wszystkich czempionów [(czempion, ostatni_resp_utc)]"""
+    fmt = _DateFormatter()
+    lines = []
+    for champion, last_resp in entries:
+        # Momenty respów z przesunięć cyklu rotacji (RotationTable) - bez przechodzenia rotacji krok po kroku
+        instants, cycle = rotations.instants(champion, last_resp.replace(tzinfo=timezone.utc).timestamp(), count)
+        offsets = local_offsets(instants, zone)
+        labels = [f"{emojis.get(name, default_emoji)} {name}\nCzas respu: " for name in cycle]
+        period = len(cycle)
+        windows = [rotations.window(name).total_seconds() for name in cycle]
+        if not any(windows):
+            for i in range(count):
+                lines.append(f"{labels[i % period]}{fmt(instants[i] + offsets[i])}\n")
+            continue
+        # Czempioni z oknem respu: "najwcześniej - najpóźniej" (koniec okna może być już po zmianie czasu)
+        for i in range(count):
+            spawn = fmt(instants[i] + offsets[i])
+            window = windows[i % period]
+            if window:
+                end = instants[i] + window
+                spawn += f" - {fmt(end + local_offset(end, zone))[11:]}"
+            lines.append(f"{labels[i % period]}{spawn}\n")
+    return lines
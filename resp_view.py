@@ -0,0 +1,153 @@
+"""
+Resp View
+Zmaterializowany widok nadchodzących respów - posortowany, z gotowym czasem polskim.
+Aktualizowany przyrostowo przy każdej zmianie timera (wstawienie do posortowanej listy),
+a niezmienny snapshot przestrzeni powstaje dopiero przy pierwszym odczycie po zmianie.
+Czytany w pętli bota (inne wątki przez call()). Obok widoku - indeks okien
+respów (WindowIndex) dla zapytań "co może się zrespić między X a Y".
+"""
+
+import asyncio
+import bisect
+import time
+from collections import namedtuple
+
+import pytz
+
+from resp_store import dt_to_epoch, epoch_to_dt
+from resp_windows import WindowIndex
+
+POLAND_TZ = pytz.timezone("Europe/Warsaw")
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Jeden wiersz widoku: czempion, ostatni resp (UTC), następny resp (UTC), następny resp po polsku,
+# koniec okna respu (UTC, == next_resp gdy czempion nie ma okna)
+SpawnEntry = namedtuple('SpawnEntry', 'champion last_resp next_resp next_local window_end')
+# Wynik zapytania zakresowego: czempion, początek i koniec okna (UTC), timer, z którego wynika
+SpawnWindow = namedtuple('SpawnWindow', 'champion start end timer')
+# modified - moment ostatniej zmiany przestrzeni (sekundy epoki, np. dla Last-Modified)
+ViewSnapshot = namedtuple('ViewSnapshot', 'version entries modified')
+
+EMPTY = ViewSnapshot(0, (), 0.0)
+
+
+def _order_key(entry):
+    return entry.next_resp, entry.champion
+
+
+def utc_to_poland(utc_dt):
+    return utc_dt.replace(tzinfo=pytz.utc).astimezone(POLAND_TZ)
+
+
+class UpcomingView:
+    """Widok per przestrzeń timerów: {namespace: ViewSnapshot}"""
+
+    def __init__(self, rotations):
+        # RotationTable: czas do respu, okno i rotacja każdego czempiona
+        self.rotations = rotations
+        self.version = 0
+        self._snapshots = {}
+        self._stale = {}    # namespace -> (wersja, moment zmiany) - snapshot do odświeżenia przy odczycie
+        self._order = {}    # namespace -> lista SpawnEntry posortowana po (next_resp, czempion)
+        self._entries = {}  # namespace -> {czempion: SpawnEntry}
+        self._windows = {}  # namespace -> WindowIndex
+        self.loop = None  # pętla bota - ustawiana przy starcie, gdy widok czytają też inne wątki (Flask)
+
+    # ------------------- ODCZYT (pętla zdarzeń) -------------------
+    def current(self, ns):
+        """Aktualny snapshot przestrzeni (posortowany po najbliższym respie)"""
+        if ns in self._stale:
+            self._freeze(ns)
+        return self._snapshots.get(ns, EMPTY)
+
+    def all(self):
+        """Wszystkie snapshoty {namespace: ViewSnapshot} - kopia referencji"""
+        for ns in list(self._stale):
+            self._freeze(ns)
+        return dict(self._snapshots)
+
+    def guild(self, guild_id):
+        """Snapshoty wszystkich przestrzeni serwera [(namespace, ViewSnapshot)]"""
+        return [(ns, snapshot) for ns, snapshot in self.all().items() if ns[0] == guild_id]
+
+    def between(self, ns, start, end):
+        """Okna respów (także kolejnych obiegów i rotacji) nachodzące na [start, end] UTC - O(log n + k)"""
+        index = self._windows.get(ns)
+        if index is None:
+            return []
+        return [
+            SpawnWindow(champion, epoch_to_dt(first), epoch_to_dt(last), timer)
+            for first, last, champion, timer in index.between(dt_to_epoch(start), dt_to_epoch(end))
+        ]
+
+    def between_guild(self, guild_id, start, end):
+        """Jak between, dla wszystkich przestrzeni serwera (zakres "channel")"""
+        found = []
+        for ns in [ns for ns in self._windows if ns[0] == guild_id]:
+            found += self.between(ns, start, end)
+        found.sort(key=lambda window: window.start)
+        return found
+
+    def call(self, fn, *args, timeout=10):
+        """fn(*args) wykonane w pętli bota i jego wynik - dla wątków spoza pętli (Flask), bo indeks okien
+        i rotacje zmienia pętla. Bez działającej pętli nic ich nie zmienia - wywołanie bezpośrednie"""
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            return fn(*args)
+
+        async def run():
+            return fn(*args)
+
+        return asyncio.run_coroutine_threadsafe(run(), loop).result(timeout)
+
+    # ------------------- ZAPIS (pętla zdarzeń) -------------------
+    def apply(self, ns, changes):
+        """Zastosuj zmiany [(czempion, ostatni_resp albo None)] i opublikuj nowy snapshot"""
+        order = self._order.setdefault(ns, [])
+        entries = self._entries.setdefault(ns, {})
+        windows = self._windows.setdefault(ns, WindowIndex())
+        for champion, last_resp in changes:
+            old = entries.pop(champion, None)
+            if old is not None:
+                del order[bisect.bisect_left(order, _order_key(old), key=_order_key)]
+            if last_resp is None:
+                windows.remove(champion)
+                continue
+            next_resp = last_resp + self.rotations.interval(champion)
+            # Konwersja strefy tylko dla zmienionego wpisu
+            entry = entries[champion] = SpawnEntry(
+                champion, last_resp, next_resp, utc_to_poland(next_resp).strftime(TIME_FORMAT),
+                next_resp + self.rotations.window(champion),
+            )
+            bisect.insort(order, entry, key=_order_key)
+            windows.put(champion, self.rotations.cycle_spawns(champion, dt_to_epoch(last_resp)))
+
+        self.version += 1
+        if order:
+            # Krotka snapshotu powstaje przy odczycie - kolejne zmiany przed nim jej nie kopiują
+            self._stale[ns] = (self.version, time.time())
+        else:
+            self._snapshots.pop(ns, None)
+            self._stale.pop(ns, None)
+            del self._order[ns]
+            del self._entries[ns]
+            del self._windows[ns]
+
+    def _freeze(self, ns):
+        version, modified = self._stale.pop(ns)
+        self._snapshots[ns] = ViewSnapshot(version, tuple(self._order[ns]), modified)
+
+
+# ------------------- WSPÓŁDZIELENIE -------------------
+_shared = None
+
+
+def share_view(view):
+    """Udostępnij widok innym komponentom procesu (np. Flask /status)"""
+    global _shared
+    _shared = view
+
+
+def shared_view():
+    """Widok opublikowany przez bota albo None (bot działa w innym procesie)"""
+    return _shared
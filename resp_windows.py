@@ -0,0 +1,83 @@
+"""
+Resp Windows
+Indeks okien respów do zapytań zakresowych ("co może się zrespić między 20:00 a 23:00").
+Respy timera są okresowe (pierwszy resp + k * okres), więc każdy timer to kilka faz
+modulo okres. Fazy jednego okresu są posortowane, a zapytanie to dwa wyszukiwania
+binarne na każdy obieg okresu w zakresie - O(log n + k), bez generowania harmonogramów.
+"""
+
+import bisect
+
+
+class _Period:
+    """Posortowane fazy wszystkich respów o jednym okresie"""
+
+    __slots__ = ('keys', 'items', 'max_window', 'first')
+
+    def __init__(self):
+        self.keys = []   # fazy (sekundy od początku obiegu)
+        self.items = []  # (faza, pierwszy resp, okno, czempion, timer) - w kolejności keys
+        self.max_window = 0.0  # najszersze okno - nie maleje przy usuwaniu (tylko więcej kandydatów)
+        self.first = float('inf')  # najwcześniejszy pierwszy resp - nie rośnie przy usuwaniu (jw.)
+
+
+class WindowIndex:
+    """Okna respów jednej przestrzeni timerów: okres -> posortowane fazy"""
+
+    def __init__(self):
+        self._periods = {}
+        self._timers = {}  # czempion z timerem -> [(okres, wpis)]
+
+    def __len__(self):
+        return len(self._timers)
+
+    def put(self, timer, spawns):
+        """Zastąp plan timera: spawns = [(czempion, pierwszy resp, okres, okno)] w sekundach epoki"""
+        self.remove(timer)
+        placed = []
+        for champion, first, period, window in spawns:
+            if period <= 0:
+                continue
+            group = self._periods.get(period)
+            if group is None:
+                group = self._periods[period] = _Period()
+            item = (first % period, first, window, champion, timer)
+            i = bisect.bisect_right(group.keys, item[0])
+            group.keys.insert(i, item[0])
+            group.items.insert(i, item)
+            group.max_window = max(group.max_window, window)
+            group.first = min(group.first, first)
+            placed.append((period, item))
+        self._timers[timer] = placed
+
+    def remove(self, timer):
+        for period, item in self._timers.pop(timer, ()):
+            group = self._periods[period]
+            i = bisect.bisect_left(group.keys, item[0])
+            while group.items[i] is not item:
+                i += 1
+            del group.keys[i]
+            del group.items[i]
+            if not group.keys:
+                del self._periods[period]
+
+    def between(self, start, end):
+        """[(początek, koniec, czempion, timer)] okien nachodzących na [start, end], po początku"""
+        found = []
+        for period, group in list(self._periods.items()):
+            # Okno nachodzi na zakres, gdy resp wypada w [start - okno, end]
+            low = start - group.max_window
+            # Obiegi przed pierwszym respem grupy są puste - zakres sprzed niego nic nie kosztuje
+            lap = (max(low, group.first) // period) * period
+            while lap <= end:
+                i = bisect.bisect_left(group.keys, low - lap)
+                j = bisect.bisect_right(group.keys, end - lap)
+                for phase, first, window, champion, timer in group.items[i:j]:
+                    # Liczone od pierwszego respu, żeby nie gubić dokładności na fazie
+                    k = round((lap + phase - first) / period)
+                    spawn = first + k * period
+                    if k >= 0 and spawn + window >= start:
+                        found.append((spawn, spawn + window, champion, timer))
+                lap += period
+        found.sort()
+        return found
@@ -1,27 +1,30 @@
 import asyncio
+import sys
 import threading
-from flask_app import app  # Twój Flask z main.py
-from discord_bot import run_bot  # Funkcja run_bot z discord_bot.py
+from discord_bot import run_bot, HTTP_MODE, HTTP_HOST, HTTP_PORT  # Funkcja run_bot z discord_bot.py
 
 
 # ----------------------- FLASK -----------------------
 def start_flask():
+    from flask_app import app  # Twój Flask z main.py (tylko w trybie RESP_HTTP=flask)
     print("🌐 Uruchamianie Flask...")
-    # Flask nasłuchuje na porcie 5000 dla UptimeRobot
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    # Flask nasłuchuje na porcie dla UptimeRobot
+    app.run(host=HTTP_HOST, port=HTTP_PORT, debug=False)
 
 
 # ----------------------- DISCORD BOT -----------------------
-def start_discord_bot():
+def start_discord_bot(serve_http):
     print("🤖 Uruchamianie Discord bota...")
-    asyncio.run(run_bot())
+    if asyncio.run(run_bot(serve_http=serve_http)) is False:
+        sys.exit(1)  # utracono przywództwo (RESP_HA) - restart wraca jako instancja zapasowa
 
 
 # ----------------------- URUCHAMIANIE -----------------------
 if __name__ == "__main__":
-    # Flask w osobnym wątku (daemon, aby zakończył się razem z głównym wątkiem)
-    flask_thread = threading.Thread(target=start_flask, daemon=True)
-    flask_thread.start()
+    if HTTP_MODE == "flask":
+        # Flask w osobnym wątku (daemon, aby zakończył się razem z głównym wątkiem)
+        flask_thread = threading.Thread(target=start_flask, daemon=True)
+        flask_thread.start()
 
-    # Discord bota uruchamiamy w głównym wątku
-    start_discord_bot()
+    # Discord bota uruchamiamy w głównym wątku; w trybie "aiohttp" serwer HTTP działa w jego pętli
+    start_discord_bot(serve_http=HTTP_MODE == "aiohttp")